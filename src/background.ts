@@ -2,6 +2,9 @@ import browser from 'webextension-polyfill';
 import { updateCurrentActiveTab, isValidUrl, isBlankPage } from './utils/active-tab-manager';
 import { TextHighlightData } from './utils/highlighter';
 import { debounce } from './utils/debounce';
+import { HighlightsStorage, isHighlightShardKey, migrateHighlightStorage } from './utils/highlight-storage';
+import { indexHighlightShard, reconcileHighlightDb } from './utils/highlight-db';
+import { MarkdownConversionRequest, MarkdownConversionResponse } from './utils/markdown-service';
 
 let sidePanelOpenWindows: Set<number> = new Set();
 let highlighterModeState: { [tabId: number]: boolean } = {};
@@ -66,6 +69,60 @@ async function openHighlightsSidePanel(tabId: number, windowId: number): Promise
 	await ensureContentScriptLoadedInBackground(tabId);
 }
 
+const OFFSCREEN_DOCUMENT_PATH = 'offscreen.html';
+let creatingOffscreenDocument: Promise<void> | null = null;
+
+function getOffscreenApi(): typeof chrome.offscreen | undefined {
+	return (globalThis as typeof globalThis & { chrome?: typeof chrome }).chrome?.offscreen;
+}
+
+async function ensureOffscreenDocument(): Promise<void> {
+	const offscreenApi = getOffscreenApi()!;
+	const documentUrl = chrome.runtime.getURL(OFFSCREEN_DOCUMENT_PATH);
+
+	if (typeof chrome.runtime.getContexts === 'function') {
+		const contexts = await chrome.runtime.getContexts({
+			contextTypes: [chrome.runtime.ContextType.OFFSCREEN_DOCUMENT],
+			documentUrls: [documentUrl]
+		});
+		if (contexts.length > 0) {
+			return;
+		}
+	}
+
+	// Only one offscreen document can exist, so concurrent callers share one creation
+	if (!creatingOffscreenDocument) {
+		creatingOffscreenDocument = offscreenApi.createDocument({
+			url: OFFSCREEN_DOCUMENT_PATH,
+			reasons: [chrome.offscreen.Reason.DOM_PARSER],
+			justification: 'Convert clipped pages to Markdown without blocking the popup or the page'
+		}).catch((error: Error) => {
+			// Already created, e.g. by a previous instance of the service worker
+			if (!error.message.includes('single offscreen document')) {
+				throw error;
+			}
+		}).finally(() => {
+			creatingOffscreenDocument = null;
+		});
+	}
+	await creatingOffscreenDocument;
+}
+
+// Convert markdown in the offscreen document on behalf of the popup or a content script
+async function convertMarkdownOffscreen(request: MarkdownConversionRequest): Promise<MarkdownConversionResponse> {
+	if (!getOffscreenApi()) {
+		return { success: false, unsupported: true };
+	}
+
+	try {
+		await ensureOffscreenDocument();
+		return await browser.runtime.sendMessage({ ...request, target: 'offscreen' });
+	} catch (error) {
+		console.error('Offscreen markdown conversion failed:', error);
+		return { success: false, unsupported: true };
+	}
+}
+
 async function initialize() {
 	try {
 		// Set up tab listeners
@@ -150,6 +207,11 @@ browser.runtime.onMessage.addListener((request: unknown, sender: browser.Runtime
 			return true;
 		}
 
+		if (typedRequest.action === "convertMarkdown") {
+			convertMarkdownOffscreen(request as MarkdownConversionRequest).then(sendResponse);
+			return true;
+		}
+
 		if (typedRequest.action === "extractContent" && sender.tab && sender.tab.id) {
 			browser.tabs.sendMessage(sender.tab.id, request).then(sendResponse);
 			return true;
@@ -598,8 +660,35 @@ browser.contextMenus.onClicked.addListener(async (info, tab) => {
 		}
 });
 
+// The index only follows storage changes while the background script listens,
+// so check it against the shards when the browser starts and after updates
+function reconcileHighlightIndex(): void {
+	reconcileHighlightDb().catch((error) => {
+		console.error('Failed to reconcile highlight index:', error);
+	});
+}
+
 browser.runtime.onInstalled.addListener(() => {
 	debouncedUpdateContextMenu(-1); // Use a dummy tabId for initial creation
+	migrateHighlightStorage().then(reconcileHighlightIndex, (error) => {
+		console.error('Failed to migrate highlight storage:', error);
+	});
+});
+
+browser.runtime.onStartup.addListener(reconcileHighlightIndex);
+
+// Keep the IndexedDB highlight index in step with the storage shards
+browser.storage.onChanged.addListener((changes, areaName) => {
+	if (areaName !== 'local') {
+		return;
+	}
+	for (const [key, change] of Object.entries(changes)) {
+		if (isHighlightShardKey(key)) {
+			indexHighlightShard(change.newValue as HighlightsStorage | undefined, change.oldValue as HighlightsStorage | undefined).catch((error) => {
+				console.error('Failed to index highlights:', error);
+			});
+		}
+	}
 });
 
 async function isSidePanelOpen(windowId: number): Promise<boolean> {
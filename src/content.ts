@@ -3,7 +3,7 @@ import * as highlighter from './utils/highlighter';
 import { loadSettings, generalSettings } from './utils/storage-utils';
 import Defuddle from 'defuddle';
 import { getDomain } from './utils/string-utils';
-import { createMarkdownContent } from './utils/markdown-converter';
+import { convertToMarkdown } from './utils/markdown-service';
 
 declare global {
 	interface Window {
@@ -232,26 +232,28 @@ declare global {
 		}
 
 		if (request.action === "copyMarkdownToClipboard") {
-			try {
-				// Extract page content using Defuddle
-				const defuddled = new Defuddle(document, { url: document.URL }).parse();
-
-				// Convert HTML content to markdown
-				const markdown = createMarkdownContent(defuddled.content, document.URL);
-
-				// Copy to clipboard
-				const textArea = document.createElement("textarea");
-				textArea.value = markdown;
-				document.body.appendChild(textArea);
-				textArea.select();
-				document.execCommand('copy');
-				document.body.removeChild(textArea);
-
-				sendResponse({ success: true });
-			} catch (err) {
-				console.error('Failed to copy markdown to clipboard:', err);
-				sendResponse({ success: false, error: (err as Error).message });
-			}
+			(async () => {
+				try {
+					// Extract page content using Defuddle
+					const defuddled = new Defuddle(document, { url: document.URL }).parse();
+
+					// Convert HTML content to markdown off the page's thread
+					const markdown = await convertToMarkdown(defuddled.content, document.URL);
+
+					// Copy to clipboard
+					const textArea = document.createElement("textarea");
+					textArea.value = markdown;
+					document.body.appendChild(textArea);
+					textArea.select();
+					document.execCommand('copy');
+					document.body.removeChild(textArea);
+
+					sendResponse({ success: true });
+				} catch (err) {
+					console.error('Failed to copy markdown to clipboard:', err);
+					sendResponse({ success: false, error: (err as Error).message });
+				}
+			})();
 			return true;
 		}
 
@@ -338,6 +340,10 @@ declare global {
 		} else if (request.action === "extractContent") {
 			const content = extractContentBySelector(request.selector, request.attribute, request.extractHtml);
 			sendResponse({ content: content });
+		} else if (request.action === "extractContentBatch") {
+			const requests: { selector: string; attribute?: string; extractHtml?: boolean }[] = Array.isArray(request.requests) ? request.requests : [];
+			const contents = requests.map(item => extractContentBySelector(item.selector, item.attribute, item.extractHtml));
+			sendResponse({ contents: contents });
 		} else if (request.action === "paintHighlights") {
 			highlighter.loadHighlights().then(() => {
 				if (generalSettings.alwaysShowHighlights) {
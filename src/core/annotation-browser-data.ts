@@ -1,4 +1,12 @@
 import { normalizeHighlightCreatedAt } from '../utils/highlight-timestamp-utils';
+import { loadAllHighlights } from '../utils/highlight-storage';
+import {
+	countHighlightPages,
+	countHighlights,
+	queryHighlightPages,
+	type HighlightPageOrder,
+	type HighlightPageRecord
+} from '../utils/highlight-db';
 
 interface AnnotationStorageHighlight {
 	id?: string;
@@ -22,6 +30,13 @@ export interface AnnotationBrowserSnapshot {
 	mostAnnotatedPages: AnnotationBrowserPage[];
 }
 
+// Totals plus paged access to the sorted page lists
+export interface AnnotationBrowserSource {
+	totalPages: number;
+	totalAnnotations: number;
+	loadPages: (order: HighlightPageOrder, offset: number, limit: number) => Promise<AnnotationBrowserPage[]>;
+}
+
 function isRecord(value: unknown): value is Record<string, unknown> {
 	return typeof value === 'object' && value !== null;
 }
@@ -120,6 +135,18 @@ function sortByMostAnnotations(left: AnnotationBrowserPage, right: AnnotationBro
 	return left.title.localeCompare(right.title);
 }
 
+function createAnnotationBrowserPage(url: URL, annotationsCount: number, firstCreatedAt: number, lastCreatedAt: number): AnnotationBrowserPage {
+	return {
+		url: url.toString(),
+		title: derivePageTitle(url),
+		siteLabel: deriveSiteLabel(url),
+		path: derivePathLabel(url),
+		annotationsCount,
+		firstCreatedAt,
+		lastCreatedAt
+	};
+}
+
 export function buildAnnotationBrowserSnapshot(rawHighlightsStorage: unknown): AnnotationBrowserSnapshot {
 	if (!isRecord(rawHighlightsStorage)) {
 		return {
@@ -164,15 +191,12 @@ export function buildAnnotationBrowserSnapshot(rawHighlightsStorage: unknown): A
 		const annotationsCount = highlightTimestamps.length;
 		totalAnnotations += annotationsCount;
 
-		pages.push({
-			url: parsedUrl.toString(),
-			title: derivePageTitle(parsedUrl),
-			siteLabel: deriveSiteLabel(parsedUrl),
-			path: derivePathLabel(parsedUrl),
+		pages.push(createAnnotationBrowserPage(
+			parsedUrl,
 			annotationsCount,
-			firstCreatedAt: Math.min(...highlightTimestamps),
-			lastCreatedAt: Math.max(...highlightTimestamps)
-		});
+			Math.min(...highlightTimestamps),
+			Math.max(...highlightTimestamps)
+		));
 	}
 
 	return {
@@ -182,3 +206,44 @@ export function buildAnnotationBrowserSnapshot(rawHighlightsStorage: unknown): A
 		mostAnnotatedPages: [...pages].sort(sortByMostAnnotations)
 	};
 }
+
+function createSnapshotSource(snapshot: AnnotationBrowserSnapshot): AnnotationBrowserSource {
+	return {
+		totalPages: snapshot.totalPages,
+		totalAnnotations: snapshot.totalAnnotations,
+		loadPages: async (order, offset, limit) => {
+			const pages = order === 'recent' ? snapshot.recentPages : snapshot.mostAnnotatedPages;
+			return pages.slice(offset, offset + limit);
+		}
+	};
+}
+
+function createIndexedPage(record: HighlightPageRecord): AnnotationBrowserPage | null {
+	const parsedUrl = parseUrl(record.url);
+	return parsedUrl
+		? createAnnotationBrowserPage(parsedUrl, record.annotationsCount, record.firstCreatedAt, record.lastCreatedAt)
+		: null;
+}
+
+/**
+ * Reads page lists from the IndexedDB highlight index, one batch at a time.
+ * Falls back to scanning every stored page where IndexedDB isn't available.
+ */
+export async function loadAnnotationBrowserSource(): Promise<AnnotationBrowserSource> {
+	try {
+		const [totalPages, totalAnnotations] = await Promise.all([countHighlightPages(), countHighlights()]);
+		return {
+			totalPages,
+			totalAnnotations,
+			loadPages: async (order, offset, limit) => {
+				const records = await queryHighlightPages(order, offset, limit);
+				return records
+					.map(createIndexedPage)
+					.filter((page): page is AnnotationBrowserPage => page !== null);
+			}
+		};
+	} catch (error) {
+		console.warn('Highlight index unavailable, reading highlights from storage:', error);
+		return createSnapshotSource(buildAnnotationBrowserSnapshot(await loadAllHighlights()));
+	}
+}
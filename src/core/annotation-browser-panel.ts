@@ -1,10 +1,11 @@
 import dayjs from 'dayjs';
 import browser from '../utils/browser-polyfill';
 import { getMessage } from '../utils/i18n';
+import type { HighlightPageOrder } from '../utils/highlight-db';
 import {
-	buildAnnotationBrowserSnapshot,
+	loadAnnotationBrowserSource,
 	type AnnotationBrowserPage,
-	type AnnotationBrowserSnapshot
+	type AnnotationBrowserSource
 } from './annotation-browser-data';
 
 const INITIAL_VISIBLE_ITEMS = 25;
@@ -58,7 +59,7 @@ function openPageInNewTab(url: string): void {
 	});
 }
 
-function createStatsGrid(snapshot: AnnotationBrowserSnapshot): HTMLElement {
+function createStatsGrid(source: AnnotationBrowserSource): HTMLElement {
 	const stats = document.createElement('section');
 	stats.className = 'highlights-summary-stats';
 
@@ -66,7 +67,7 @@ function createStatsGrid(snapshot: AnnotationBrowserSnapshot): HTMLElement {
 	pageStat.className = 'highlights-summary-stat';
 	const pageValue = document.createElement('p');
 	pageValue.className = 'highlights-summary-stat-value';
-	pageValue.textContent = formatCount(snapshot.totalPages);
+	pageValue.textContent = formatCount(source.totalPages);
 	const pageLabel = document.createElement('p');
 	pageLabel.className = 'highlights-summary-stat-label';
 	pageLabel.textContent = getMessage('highlightsSummaryStatsPages');
@@ -76,7 +77,7 @@ function createStatsGrid(snapshot: AnnotationBrowserSnapshot): HTMLElement {
 	annotationStat.className = 'highlights-summary-stat';
 	const annotationValue = document.createElement('p');
 	annotationValue.className = 'highlights-summary-stat-value';
-	annotationValue.textContent = formatCount(snapshot.totalAnnotations);
+	annotationValue.textContent = formatCount(source.totalAnnotations);
 	const annotationLabel = document.createElement('p');
 	annotationLabel.className = 'highlights-summary-stat-label';
 	annotationLabel.textContent = getMessage('highlightsSummaryStatsAnnotations');
@@ -141,7 +142,8 @@ function createPageCard(page: AnnotationBrowserPage): HTMLElement {
 interface SectionConfig {
 	titleMessageKey: string;
 	sortHintMessageKey: string;
-	pages: AnnotationBrowserPage[];
+	totalPages: number;
+	loadPages: (offset: number, limit: number) => Promise<AnnotationBrowserPage[]>;
 	getVisibleCount: () => number;
 	setVisibleCount: (value: number) => void;
 	observeSentinel: (sentinel: HTMLElement, callback: () => void) => void;
@@ -183,29 +185,61 @@ function createSection(config: SectionConfig): HTMLElement {
 	sentinel.className = 'highlights-summary-load-sentinel';
 	sentinel.setAttribute('aria-hidden', 'true');
 
+	// Pages are loaded in batches as they scroll into view, and only new cards are added
+	const pages: AnnotationBrowserPage[] = [];
+	let renderedCount = 0;
+	let isExhausted = false;
+	let loading: Promise<void> | null = null;
+
+	const loadPages = async (count: number): Promise<void> => {
+		while (pages.length < count && !isExhausted) {
+			const requested = count - pages.length;
+			const batch = await config.loadPages(pages.length, requested);
+			pages.push(...batch);
+			// Pages were removed since the totals were counted
+			if (batch.length < requested) {
+				isExhausted = true;
+			}
+		}
+	};
+
+	const showPages = (): void => {
+		if (loading) {
+			return;
+		}
+		loading = loadPages(config.getVisibleCount())
+			.catch((error) => {
+				console.error('Failed to load annotated pages:', error);
+				isExhausted = true;
+			})
+			.then(() => {
+				loading = null;
+				renderVisibleItems();
+			});
+	};
+
 	const loadMore = (): void => {
-		const currentVisible = Math.min(config.getVisibleCount(), config.pages.length);
-		if (currentVisible >= config.pages.length) {
+		const currentVisible = Math.min(config.getVisibleCount(), config.totalPages);
+		if (currentVisible >= config.totalPages || loading) {
 			return;
 		}
 
-		config.setVisibleCount(Math.min(currentVisible + VISIBLE_BATCH_SIZE, config.pages.length));
-		renderVisibleItems();
+		config.setVisibleCount(Math.min(currentVisible + VISIBLE_BATCH_SIZE, config.totalPages));
+		showPages();
 	};
 
 	const renderVisibleItems = (): void => {
-		const visibleCount = Math.min(config.getVisibleCount(), config.pages.length);
+		const visibleCount = Math.min(config.getVisibleCount(), pages.length);
 		progress.textContent = getMessage('highlightsSummaryShownCount', [
 			formatCount(visibleCount),
-			formatCount(config.pages.length)
+			formatCount(config.totalPages)
 		]);
 
-		list.textContent = '';
-		for (let index = 0; index < visibleCount; index++) {
-			list.appendChild(createPageCard(config.pages[index]));
+		for (; renderedCount < visibleCount; renderedCount++) {
+			list.appendChild(createPageCard(pages[renderedCount]));
 		}
 
-		const hasMore = visibleCount < config.pages.length;
+		const hasMore = visibleCount < config.totalPages && !isExhausted;
 		controls.hidden = !hasMore;
 		sentinel.classList.toggle('is-hidden', !hasMore);
 		if (hasMore) {
@@ -222,7 +256,8 @@ function createSection(config: SectionConfig): HTMLElement {
 	controls.append(loadMoreButton, sentinel);
 	section.append(header, list, controls);
 
-	renderVisibleItems();
+	controls.hidden = true;
+	showPages();
 	return section;
 }
 
@@ -318,21 +353,23 @@ export function createAnnotationBrowserPanelController(): AnnotationBrowserPanel
 		panelContainer.appendChild(emptyState);
 	}
 
-	function renderSnapshot(snapshot: AnnotationBrowserSnapshot): void {
+	function renderSource(source: AnnotationBrowserSource): void {
 		clearObservedSentinels();
 		panelContainer.textContent = '';
 
-		if (snapshot.totalPages === 0) {
+		if (source.totalPages === 0) {
 			renderEmpty();
 			return;
 		}
 
-		panelContainer.appendChild(createStatsGrid(snapshot));
+		panelContainer.appendChild(createStatsGrid(source));
+		const loadPages = (order: HighlightPageOrder) => (offset: number, limit: number) => source.loadPages(order, offset, limit);
 
 		panelContainer.appendChild(createSection({
 			titleMessageKey: 'highlightsSummaryRecentHeading',
 			sortHintMessageKey: 'highlightsSummarySortRecent',
-			pages: snapshot.recentPages,
+			totalPages: source.totalPages,
+			loadPages: loadPages('recent'),
 			getVisibleCount: () => recentVisibleCount,
 			setVisibleCount: (value: number) => {
 				recentVisibleCount = value;
@@ -344,7 +381,8 @@ export function createAnnotationBrowserPanelController(): AnnotationBrowserPanel
 		panelContainer.appendChild(createSection({
 			titleMessageKey: 'highlightsSummaryMostHeading',
 			sortHintMessageKey: 'highlightsSummarySortMost',
-			pages: snapshot.mostAnnotatedPages,
+			totalPages: source.totalPages,
+			loadPages: loadPages('mostAnnotated'),
 			getVisibleCount: () => mostVisibleCount,
 			setVisibleCount: (value: number) => {
 				mostVisibleCount = value;
@@ -362,15 +400,14 @@ export function createAnnotationBrowserPanelController(): AnnotationBrowserPanel
 
 			const requestSequence = ++refreshSequence;
 			try {
-				const result = await browser.storage.local.get('highlights') as { highlights?: unknown };
+				const source = await loadAnnotationBrowserSource();
 				if (isDestroyed || requestSequence !== refreshSequence) {
 					return;
 				}
 
-				const snapshot = buildAnnotationBrowserSnapshot(result.highlights);
-				recentVisibleCount = clampVisibleCount(recentVisibleCount, snapshot.recentPages.length);
-				mostVisibleCount = clampVisibleCount(mostVisibleCount, snapshot.mostAnnotatedPages.length);
-				renderSnapshot(snapshot);
+				recentVisibleCount = clampVisibleCount(recentVisibleCount, source.totalPages);
+				mostVisibleCount = clampVisibleCount(mostVisibleCount, source.totalPages);
+				renderSource(source);
 			} catch (error) {
 				if (isDestroyed || requestSequence !== refreshSequence) {
 					return;
@@ -3,7 +3,7 @@ import { Template, Property, PromptVariable } from '../types/types';
 import { incrementStat, addHistoryEntry, getClipHistory } from '../utils/storage-utils';
 import { generateFrontmatter, saveToObsidian } from '../utils/obsidian-note-creator';
 import { extractPageContent, initializePageContent } from '../utils/content-extractor';
-import { compileTemplate } from '../utils/template-compiler';
+import { compileTemplate, createFieldCompiler, getTemplateDependencies, prefetchTemplateSelectors } from '../utils/template-compiler';
 import { initializeIcons, getPropertyTypeIcon } from '../icons/icons';
 import { findMatchingTemplate, initializeTriggers } from '../utils/triggers';
 import { getLocalStorage, setLocalStorage, loadSettings, generalSettings, Settings } from '../utils/storage-utils';
@@ -14,11 +14,14 @@ import { addBrowserClassToHtml, detectBrowser } from '../utils/browser-detection
 import { createElementWithClass } from '../utils/dom-utils';
 import { initializeInterpreter, handleInterpreterUI, collectPromptVariables } from '../utils/interpreter';
 import { adjustNoteNameHeight } from '../utils/ui-utils';
-import { debugLog } from '../utils/debug';
+import { debugLog, isDebugMode } from '../utils/debug';
 import { showVariables, initializeVariablesPanel, updateVariablesPanel } from '../managers/inspect-variables';
 import { isBlankPage, isValidUrl } from '../utils/active-tab-manager';
-import { memoizeWithExpiration } from '../utils/memoize';
+import { hashKey, memoizeAsync } from '../utils/cache';
 import { debounce } from '../utils/debounce';
+import { convertToMarkdown, isAbortError } from '../utils/markdown-service';
+import { ConversionProgress } from '../utils/markdown-converter';
+import { isLazyVariable } from '../utils/lazy-variables';
 import { sanitizeFileName } from '../utils/string-utils';
 import { saveFile } from '../utils/file-utils';
 import { translatePage, getMessage, setupLanguageAndDirection } from '../utils/i18n';
@@ -39,24 +42,15 @@ const isSidePanel = window.location.pathname.includes('side-panel.html');
 const urlParams = new URLSearchParams(window.location.search);
 const isIframe = urlParams.get('context') === 'iframe';
 
-// Memoize compileTemplate with a short expiration and URL-sensitive key
-const memoizedCompileTemplate = memoizeWithExpiration(
-	async (tabId: number, template: string, variables: { [key: string]: string }, currentUrl: string) => {
-		return compileTemplate(tabId, template, variables, currentUrl);
-	},
-	{
-		expirationMs: 5000,
-		keyFn: (tabId: number, template: string, variables: { [key: string]: string }, currentUrl: string) =>
-			`${tabId}-${template}-${currentUrl}`
-	}
-);
+// Compiles template fields, re-rendering only those whose inputs changed since the last refresh
+const compileField = createFieldCompiler();
 
 // Memoize generateFrontmatter with a longer expiration
-const memoizedGenerateFrontmatter = memoizeWithExpiration(
+const memoizedGenerateFrontmatter = memoizeAsync(
 	async (properties: Property[]) => {
 		return generateFrontmatter(properties);
 	},
-	{ expirationMs: 5000 }
+	{ name: 'frontmatter', maxEntries: 20, ttlMs: 5000 }
 );
 
 // Helper function to get tab info from background script
@@ -89,16 +83,19 @@ async function getCurrentTabInfo(): Promise<{ url: string; title?: string }> {
 }
 
 // Memoize extractPageContent with URL-sensitive key
-const memoizedExtractPageContent = memoizeWithExpiration(
+const memoizedExtractPageContent = memoizeAsync(
 	async (tabId: number) => {
 		await getTabInfo(tabId);
 		return extractPageContent(tabId);
 	},
 	{
-		expirationMs: 5000,
-		keyFn: async (tabId: number) => {
+		name: 'pageContent',
+		maxEntries: 4,
+		maxBytes: 64 * 1024 * 1024, // Page content includes the full HTML
+		ttlMs: 5000,
+		key: async (tabId: number) => {
 			const tab = await getTabInfo(tabId);
-			return `${tabId}-${tab.url}`;
+			return hashKey(tabId, tab.url);
 		}
 	}
 );
@@ -708,6 +705,74 @@ function populateTemplateDropdown() {
 	}
 }
 
+let contentConversion: AbortController | null = null;
+
+/**
+ * Convert {{content}} to markdown off the popup's thread if the templates use it,
+ * so that reading the variable while compiling doesn't block the UI.
+ * Returns false if a newer call superseded this one.
+ */
+async function prefetchContentMarkdown(templates: string[], variables: { [key: string]: any }, currentUrl: string): Promise<boolean> {
+	contentConversion?.abort();
+	contentConversion = null;
+
+	const usesContent = templates.some(text => text && getTemplateDependencies(text).variableKeys.includes('{{content}}'));
+	if (!usesContent || !isLazyVariable(variables, '{{content}}')) {
+		return true;
+	}
+
+	const controller = new AbortController();
+	contentConversion = controller;
+
+	// Large pages take a while, so show the progress and the start of the content
+	// meanwhile, in the placeholder so nothing is written into the note itself
+	const noteContentField = document.getElementById('note-content-field') as HTMLTextAreaElement | null;
+	let progressMessage = getMessage('convertingContent', '0');
+	let previewText = '';
+	const updatePlaceholder = () => {
+		if (noteContentField && contentConversion === controller) {
+			noteContentField.readOnly = true;
+			noteContentField.placeholder = previewText ? `${progressMessage}\n\n${previewText}` : progressMessage;
+		}
+	};
+	const showProgress = ({ converted, total }: ConversionProgress) => {
+		if (converted < total) {
+			progressMessage = getMessage('convertingContent', String(Math.round(converted / total * 100)));
+			updatePlaceholder();
+		}
+	};
+	const showPreview = (preview: string) => {
+		previewText = preview;
+		updatePlaceholder();
+	};
+
+	try {
+		const markdown = await convertToMarkdown(variables['{{contentHtml}}'], currentUrl, {
+			signal: controller.signal,
+			onProgress: showProgress,
+			onPreview: showPreview
+		});
+		variables['{{content}}'] = markdown.trim();
+		return true;
+	} catch (error) {
+		if (isAbortError(error)) {
+			return false;
+		}
+		// Leave the variable lazy, so it is converted here when read
+		console.error('Error converting content to markdown:', error);
+		return true;
+	} finally {
+		if (contentConversion === controller) {
+			contentConversion = null;
+		}
+		// Unless a newer conversion is showing its progress
+		if (contentConversion === null && noteContentField?.readOnly) {
+			noteContentField.readOnly = false;
+			noteContentField.placeholder = getMessage('notesAboutPage');
+		}
+	}
+}
+
 async function initializeTemplateFields(currentTabId: number, template: Template | null, variables: { [key: string]: string }, noteName?: string, schemaOrgData?: any) {
 	if (!template) {
 		logError('No template selected');
@@ -741,21 +806,43 @@ async function initializeTemplateFields(currentTabId: number, template: Template
 		return;
 	}
 
-	// Compile all templates in parallel for better performance
+	const templateSources = [
+		...template.properties.map(property => unescapeValue(property.value)),
+		template.noteNameFormat,
+		template.path,
+		template.noteContentFormat,
+		template.context || '',
+	];
+
+	// Fetch every selector the template uses in one round trip, and convert the page
+	// content off the popup's thread, before compiling
+	const [releaseSelectors, isCurrent] = await Promise.all([
+		prefetchTemplateSelectors(currentTabId!, templateSources),
+		prefetchContentMarkdown(templateSources, variables, currentUrl)
+	]);
+	if (!isCurrent) {
+		// A newer refresh has started
+		releaseSelectors();
+		newTemplateProperties.remove();
+		return;
+	}
+
+	// Compile all templates in parallel for better performance. Selectors read
+	// after this render, e.g. by the interpreter, go to the page again.
 	const [compiledPropertyValues, formattedNoteName, formattedPath, formattedContent] = await Promise.all([
 		// Compile all property values in parallel
 		Promise.all(template.properties.map(property =>
-			memoizedCompileTemplate(currentTabId!, unescapeValue(property.value), variables, currentUrl)
+			compileField(`property:${property.name}`, currentTabId!, unescapeValue(property.value), variables, currentUrl)
 		)),
 		// Compile note name
-		memoizedCompileTemplate(currentTabId!, template.noteNameFormat, variables, currentUrl),
+		compileField('noteName', currentTabId!, template.noteNameFormat, variables, currentUrl),
 		// Compile path
-		memoizedCompileTemplate(currentTabId!, template.path, variables, currentUrl),
+		compileField('path', currentTabId!, template.path, variables, currentUrl),
 		// Compile content
 		template.noteContentFormat
-			? memoizedCompileTemplate(currentTabId!, template.noteContentFormat, variables, currentUrl)
+			? compileField('content', currentTabId!, template.noteContentFormat, variables, currentUrl)
 			: Promise.resolve('')
-	]);
+	]).finally(releaseSelectors);
 
 	// Build DOM elements with pre-compiled values
 	for (let i = 0; i < template.properties.length; i++) {
@@ -916,8 +1003,11 @@ async function initializeTemplateFields(currentTabId: number, template: Template
 			}
 		}
 
-		const replacedTemplate = await getReplacedTemplate(template, variables, currentTabId!, currentUrl);
-		debugLog('Variables', 'Current template with replaced variables:', JSON.stringify(replacedTemplate, null, 2));
+		// Recompiles every field, so only do it when the result will be logged
+		if (isDebugMode()) {
+			const replacedTemplate = await getReplacedTemplate(template, variables, currentTabId!, currentUrl);
+			debugLog('Variables', 'Current template with replaced variables:', JSON.stringify(replacedTemplate, null, 2));
+		}
 	}
 }
 
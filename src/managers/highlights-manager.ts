@@ -1,28 +1,38 @@
-import browser from '../utils/browser-polyfill';
 import { detectBrowser } from '../utils/browser-detection';
 import { AnyHighlightData } from '../utils/highlighter';
+import { loadAllHighlights } from '../utils/highlight-storage';
 import dayjs from 'dayjs';
 import { getMessage } from '../utils/i18n';
 
+// Mirror template metadata shape so manual export matches clipping output.
+function toExportedHighlight(highlight: AnyHighlightData) {
+	return {
+		text: highlight.content,
+		// Timestamp comes from explicit persisted metadata (createdAt).
+		timestamp: (typeof highlight.createdAt === 'number' && Number.isFinite(highlight.createdAt) && highlight.createdAt > 0)
+			? dayjs(highlight.createdAt).toISOString()
+			: undefined,
+		color: highlight.color,
+		notes: highlight.notes,
+		comment: highlight.notes && highlight.notes.length > 0 ? highlight.notes[0] : undefined
+	};
+}
+
+type ExportedPage = { url: string; highlights: ReturnType<typeof toExportedHighlight>[] };
+
+// Export from the storage shards, which are the source of truth; the IndexedDB
+// index can lag behind them, e.g. while the background script was asleep
+async function collectExportData(): Promise<ExportedPage[]> {
+	const allHighlights = await loadAllHighlights();
+	return Object.entries(allHighlights).map(([url, data]) => ({
+		url,
+		highlights: (data.highlights as AnyHighlightData[]).map(toExportedHighlight)
+	}));
+}
+
 export async function exportHighlights(): Promise<void> {
 	try {
-		const result = await browser.storage.local.get('highlights');
-		const allHighlights = result.highlights || {};
-
-		const exportData = Object.entries(allHighlights).map(([url, data]) => ({
-			url,
-			// Mirror template metadata shape so manual export matches clipping output.
-			highlights: (data.highlights as AnyHighlightData[]).map(highlight => ({
-				text: highlight.content,
-				// Timestamp comes from explicit persisted metadata (createdAt).
-				timestamp: (typeof highlight.createdAt === 'number' && Number.isFinite(highlight.createdAt) && highlight.createdAt > 0)
-					? dayjs(highlight.createdAt).toISOString()
-					: undefined,
-				color: highlight.color,
-				notes: highlight.notes,
-				comment: highlight.notes && highlight.notes.length > 0 ? highlight.notes[0] : undefined
-			}))
-		}));
+		const exportData = await collectExportData();
 
 		const jsonContent = JSON.stringify(exportData, null, 2);
 		const blob = new Blob([jsonContent], { type: 'application/json' });
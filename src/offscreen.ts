@@ -0,0 +1,75 @@
+import browser from './utils/browser-polyfill';
+import { createMarkdownContentChunked } from './utils/markdown-converter';
+import { isAbortError, MarkdownConversionProgressMessage, MarkdownConversionRequest, MarkdownConversionResponse } from './utils/markdown-service';
+
+// Offscreen document that converts HTML to markdown for the popup and content
+// scripts (see utils/markdown-service.ts). It is created by the background
+// script, which forwards conversion requests here with target 'offscreen'.
+
+// Requests are converted one at a time; a conversion yields between time
+// slices, so cancel messages are handled while it runs
+let queue: Promise<void> = Promise.resolve();
+const conversions = new Map<string, AbortController>();
+
+// A cancel can arrive before the request it cancels, so those ids are kept for a while
+const cancelledIds = new Set<string>();
+const CANCELLED_ID_TTL_MS = 60000;
+
+function sendProgress(message: Omit<MarkdownConversionProgressMessage, 'action'>): void {
+	browser.runtime.sendMessage({ action: 'markdownConversionProgress', ...message }).catch(() => {});
+}
+
+function convertQueued(request: MarkdownConversionRequest): Promise<MarkdownConversionResponse> {
+	const { id, html, url, reportProgress, previewSize } = request;
+	const controller = new AbortController();
+	conversions.set(id, controller);
+	if (cancelledIds.delete(id)) {
+		controller.abort();
+	}
+
+	const result = queue.then(async (): Promise<MarkdownConversionResponse> => {
+		try {
+			const markdown = await createMarkdownContentChunked(html, url, {
+				signal: controller.signal,
+				previewSize,
+				onProgress: reportProgress ? progress => sendProgress({ id, progress }) : undefined,
+				onPreview: reportProgress ? preview => sendProgress({ id, preview }) : undefined,
+			});
+			return { success: true, markdown };
+		} catch (error) {
+			if (isAbortError(error)) {
+				return { success: false, cancelled: true };
+			}
+			return { success: false, error: error instanceof Error ? error.message : String(error) };
+		} finally {
+			conversions.delete(id);
+		}
+	});
+
+	queue = result.then(() => undefined);
+	return result;
+}
+
+browser.runtime.onMessage.addListener((request: any) => {
+	if (request.action === 'cancelMarkdownConversion' && request.id) {
+		// Sent straight from the caller, so it doesn't need to go through the background script
+		const controller = conversions.get(request.id);
+		if (controller) {
+			controller.abort();
+		} else {
+			cancelledIds.add(request.id);
+			setTimeout(() => cancelledIds.delete(request.id), CANCELLED_ID_TTL_MS);
+		}
+		return undefined;
+	}
+
+	if (request.target !== 'offscreen') {
+		return undefined;
+	}
+
+	if (request.action === 'convertMarkdown') {
+		return convertQueued(request as MarkdownConversionRequest);
+	}
+
+	return undefined;
+});
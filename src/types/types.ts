@@ -24,6 +24,11 @@ export interface ExtractedContent {
 
 export type FilterFunction = (value: string, param?: string) => string | any[];
 
+// Native value passed between filters in a chain; serialized only at the end of the chain
+export type FilterValue = string | any[] | { [key: string]: any };
+
+export type ValueFilterFunction = (value: FilterValue, param?: string) => FilterValue;
+
 export interface PromptVariable {
 	key: string;
 	prompt: string;
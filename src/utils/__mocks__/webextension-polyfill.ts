@@ -12,6 +12,7 @@ export const storage = {
 	local: {
 		get: async () => ({}),
 		set: async () => {},
+		remove: async () => {},
 	},
 	sync: {
 		get: async () => ({}),
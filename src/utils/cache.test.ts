@@ -0,0 +1,110 @@
+import { describe, test, expect, vi, afterEach } from 'vitest';
+import { BoundedCache, getCacheStats, hashKey, memoize, memoizeAsync } from './cache';
+
+describe('BoundedCache', () => {
+	afterEach(() => {
+		vi.useRealTimers();
+	});
+
+	test('evicts the least recently used entry', () => {
+		const cache = new BoundedCache<number>({ name: 'test-lru', maxEntries: 2 });
+		cache.set('a', 1);
+		cache.set('b', 2);
+		cache.get('a');
+		cache.set('c', 3);
+
+		expect(cache.get('a')).toBe(1);
+		expect(cache.get('b')).toBeUndefined();
+		expect(cache.get('c')).toBe(3);
+		expect(cache.stats()).toMatchObject({ evictions: 1, size: 2 });
+	});
+
+	test('evicts to stay within the byte budget', () => {
+		const cache = new BoundedCache<string>({ name: 'test-bytes', maxBytes: 100 });
+		cache.set('a', 'x'.repeat(30));
+		cache.set('b', 'x'.repeat(30));
+
+		expect(cache.get('a')).toBeUndefined();
+		// The value and the one-character key
+		expect(cache.stats()).toMatchObject({ size: 1, bytes: 62 });
+	});
+
+	test('expires entries after the TTL', () => {
+		vi.useFakeTimers();
+		const cache = new BoundedCache<number>({ name: 'test-ttl', ttlMs: 1000 });
+		cache.set('a', 1);
+
+		vi.advanceTimersByTime(999);
+		expect(cache.get('a')).toBe(1);
+		vi.advanceTimersByTime(1);
+		expect(cache.get('a')).toBeUndefined();
+		expect(cache.stats()).toMatchObject({ expirations: 1, size: 0 });
+	});
+
+	test('discards entries whose dependencies changed', () => {
+		const cache = new BoundedCache<number>({ name: 'test-deps' });
+		const schema = {};
+		cache.set('a', 1, [schema]);
+
+		expect(cache.get('a', [schema])).toBe(1);
+		expect(cache.get('a', [{}])).toBeUndefined();
+	});
+
+	test('reports stats by cache name', () => {
+		const cache = new BoundedCache<number>({ name: 'test-stats' });
+		cache.set('a', 1);
+		cache.get('a');
+		cache.get('b');
+		expect(getCacheStats()['test-stats']).toMatchObject({ hits: 1, misses: 1, size: 1 });
+	});
+});
+
+describe('hashKey', () => {
+	test('is stable and distinguishes part boundaries', () => {
+		expect(hashKey('ab', 'c')).toBe(hashKey('ab', 'c'));
+		expect(hashKey('ab', 'c')).not.toBe(hashKey('a', 'bc'));
+		expect(hashKey('https://example.com/a')).not.toBe(hashKey('https://example.com/b'));
+	});
+});
+
+describe('memoize', () => {
+	test('reuses results for the same key', () => {
+		const fn = vi.fn((x: number) => x * 2);
+		const memoized = memoize(fn, { name: 'test-memoize' });
+
+		expect(memoized(2)).toBe(4);
+		expect(memoized(2)).toBe(4);
+		expect(fn).toHaveBeenCalledTimes(1);
+	});
+
+	test('caches undefined results', async () => {
+		const fn = vi.fn((_url: string) => undefined);
+		const memoized = memoize(fn, { name: 'test-memoize-undefined' });
+		memoized('https://example.com/');
+		memoized('https://example.com/');
+		expect(fn).toHaveBeenCalledTimes(1);
+
+		const asyncFn = vi.fn(async (_url: string) => undefined);
+		const memoizedAsync = memoizeAsync(asyncFn, { name: 'test-memoize-async-undefined' });
+		await memoizedAsync('https://example.com/');
+		await memoizedAsync('https://example.com/');
+		expect(asyncFn).toHaveBeenCalledTimes(1);
+	});
+
+	test('shares pending async calls and does not cache failures', async () => {
+		let calls = 0;
+		const memoized = memoizeAsync(async (x: number) => {
+			calls++;
+			if (x < 0) throw new Error('negative');
+			return x * 2;
+		}, { name: 'test-memoize-async' });
+
+		const [a, b] = await Promise.all([memoized(2), memoized(2)]);
+		expect([a, b]).toEqual([4, 4]);
+		expect(calls).toBe(1);
+
+		await expect(memoized(-1)).rejects.toThrow('negative');
+		await expect(memoized(-1)).rejects.toThrow('negative');
+		expect(calls).toBe(3);
+	});
+});
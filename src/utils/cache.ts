@@ -0,0 +1,315 @@
+// Bounded caches and memoization
+//
+// Every cache has an entry limit, and optionally a byte budget and a TTL.
+// When a limit is exceeded the least recently used entries are evicted.
+// Keys are strings; long inputs such as template sources or URLs can be
+// reduced to short keys with hashKey. Entries can also record dependency
+// values, so a cached result is only reused while its dependencies are the
+// same objects it was computed from.
+
+export interface CacheOptions<V> {
+	/** Name used to report the cache in getCacheStats() */
+	name: string;
+	/** Maximum number of entries (default 100) */
+	maxEntries?: number;
+	/** Maximum estimated size of all keys and values, in bytes (default unlimited) */
+	maxBytes?: number;
+	/** Time after which an entry is discarded, in milliseconds (default never) */
+	ttlMs?: number;
+	/** Estimate the size of a value in bytes, used with maxBytes (default estimateSize) */
+	sizeOf?: (value: V) => number;
+}
+
+export interface CacheStats {
+	hits: number;
+	misses: number;
+	evictions: number;
+	expirations: number;
+	size: number;
+	bytes: number;
+}
+
+interface CacheEntry<V> {
+	value: V;
+	deps?: any[];
+	expiresAt: number;
+	bytes: number;
+}
+
+const DEFAULT_MAX_ENTRIES = 100;
+
+const caches = new Map<string, BoundedCache<any>>();
+
+export class BoundedCache<V> {
+	// Map iteration order is insertion order, so the first key is always the
+	// least recently used entry. Hits are moved to the end by re-inserting.
+	private entries = new Map<string, CacheEntry<V>>();
+	private bytes = 0;
+	private counters = { hits: 0, misses: 0, evictions: 0, expirations: 0 };
+
+	constructor(private options: CacheOptions<V>) {
+		caches.set(options.name, this);
+	}
+
+	/**
+	 * Get a cached value. Returns undefined if the key is missing, has expired,
+	 * or was stored with different dependencies (compared by identity).
+	 * Use lookup() when undefined can be a cached value.
+	 */
+	get(key: string, deps?: any[]): V | undefined {
+		return this.lookup(key, deps)?.value;
+	}
+
+	/**
+	 * Like get(), but wraps a hit in an object, so a cached undefined is
+	 * told apart from a miss.
+	 */
+	lookup(key: string, deps?: any[]): { value: V } | undefined {
+		const entry = this.entries.get(key);
+		if (!entry) {
+			this.counters.misses++;
+			return undefined;
+		}
+
+		if (entry.expiresAt <= Date.now()) {
+			this.remove(key, entry);
+			this.counters.expirations++;
+			this.counters.misses++;
+			return undefined;
+		}
+
+		if (!sameDeps(entry.deps, deps)) {
+			this.remove(key, entry);
+			this.counters.misses++;
+			return undefined;
+		}
+
+		this.counters.hits++;
+		this.entries.delete(key);
+		this.entries.set(key, entry);
+		return { value: entry.value };
+	}
+
+	set(key: string, value: V, deps?: any[]): void {
+		const existing = this.entries.get(key);
+		if (existing) {
+			this.remove(key, existing);
+		}
+
+		// Keys count towards the budget too, since some caches key by long inputs
+		const bytes = this.options.maxBytes !== undefined
+			? (this.options.sizeOf || estimateSize)(value) + key.length * 2
+			: 0;
+		const expiresAt = this.options.ttlMs !== undefined ? Date.now() + this.options.ttlMs : Infinity;
+
+		this.entries.set(key, { value, deps, expiresAt, bytes });
+		this.bytes += bytes;
+		this.evict();
+	}
+
+	delete(key: string): boolean {
+		const entry = this.entries.get(key);
+		if (!entry) {
+			return false;
+		}
+		this.remove(key, entry);
+		return true;
+	}
+
+	clear(): void {
+		this.entries.clear();
+		this.bytes = 0;
+	}
+
+	/**
+	 * Call fn for each entry, least recently used first. Doesn't count as a hit
+	 * or check expiry. Entries may be deleted from fn.
+	 */
+	forEach(fn: (value: V, key: string) => void): void {
+		Array.from(this.entries).forEach(([key, entry]) => fn(entry.value, key));
+	}
+
+	stats(): CacheStats {
+		return { ...this.counters, size: this.entries.size, bytes: this.bytes };
+	}
+
+	resetStats(): void {
+		this.counters = { hits: 0, misses: 0, evictions: 0, expirations: 0 };
+	}
+
+	private remove(key: string, entry: CacheEntry<V>): void {
+		this.entries.delete(key);
+		this.bytes -= entry.bytes;
+	}
+
+	private evict(): void {
+		const maxEntries = this.options.maxEntries ?? DEFAULT_MAX_ENTRIES;
+		const maxBytes = this.options.maxBytes ?? Infinity;
+
+		// Always keep the newest entry, even if it is over the byte budget on its own
+		while (this.entries.size > 1 && (this.entries.size > maxEntries || this.bytes > maxBytes)) {
+			const oldestKey = this.entries.keys().next().value as string;
+			this.remove(oldestKey, this.entries.get(oldestKey)!);
+			this.counters.evictions++;
+		}
+	}
+}
+
+function sameDeps(a: any[] | undefined, b: any[] | undefined): boolean {
+	if (a === b) {
+		return true;
+	}
+	if (!a || !b || a.length !== b.length) {
+		return false;
+	}
+	for (let i = 0; i < a.length; i++) {
+		if (a[i] !== b[i]) {
+			return false;
+		}
+	}
+	return true;
+}
+
+/**
+ * Get hit/miss counters for every cache, by name.
+ */
+export function getCacheStats(): { [name: string]: CacheStats } {
+	const result: { [name: string]: CacheStats } = {};
+	caches.forEach((cache, name) => {
+		result[name] = cache.stats();
+	});
+	return result;
+}
+
+/**
+ * Hash strings into a short cache key (53-bit hash plus total length).
+ * Non-string parts are converted with String().
+ */
+export function hashKey(...parts: any[]): string {
+	let h1 = 0xdeadbeef;
+	let h2 = 0x41c6ce57;
+	let length = 0;
+
+	for (let p = 0; p < parts.length; p++) {
+		const str = typeof parts[p] === 'string' ? parts[p] : String(parts[p]);
+		length += str.length + 1;
+		for (let i = 0; i < str.length; i++) {
+			const ch = str.charCodeAt(i);
+			h1 = Math.imul(h1 ^ ch, 2654435761);
+			h2 = Math.imul(h2 ^ ch, 1597334677);
+		}
+		// Separator, so ('ab', 'c') and ('a', 'bc') hash differently
+		h1 = Math.imul(h1 ^ 0xffff, 2654435761);
+		h2 = Math.imul(h2 ^ 0xffff, 1597334677);
+	}
+
+	h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+	h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+	const hash = 4294967296 * (2097151 & h2) + (h1 >>> 0);
+
+	return `${hash.toString(36)}:${length.toString(36)}`;
+}
+
+/**
+ * Roughly estimate the memory used by a value, in bytes.
+ */
+export function estimateSize(value: any): number {
+	const seen = new Set<any>();
+	const stack: any[] = [value];
+	let bytes = 0;
+
+	while (stack.length > 0) {
+		const current = stack.pop();
+		if (typeof current === 'string') {
+			bytes += current.length * 2;
+		} else if (typeof current === 'number' || typeof current === 'boolean') {
+			bytes += 8;
+		} else if (current && typeof current === 'object' && !seen.has(current)) {
+			seen.add(current);
+			for (const key of Object.keys(current)) {
+				bytes += key.length * 2;
+				stack.push(current[key]);
+			}
+		}
+	}
+
+	return bytes;
+}
+
+// ============================================================================
+// Memoization
+// ============================================================================
+
+export interface MemoizeOptions<T extends (...args: any[]) => any> extends CacheOptions<any> {
+	/** Build the cache key from the arguments (default: hashKey of the JSON arguments) */
+	key?: (...args: Parameters<T>) => string;
+	/** Values the result depends on besides the key, compared by identity */
+	deps?: (...args: Parameters<T>) => any[];
+}
+
+export interface AsyncMemoizeOptions<T extends (...args: any[]) => Promise<any>> extends Omit<MemoizeOptions<T>, 'key'> {
+	/** Build the cache key from the arguments, may be async (default: hashKey of the JSON arguments) */
+	key?: (...args: Parameters<T>) => string | Promise<string>;
+}
+
+function defaultKey(args: any[]): string {
+	return hashKey(JSON.stringify(args));
+}
+
+/**
+ * Memoize a synchronous function in a bounded cache.
+ */
+export function memoize<T extends (...args: any[]) => any>(fn: T, options: MemoizeOptions<T>): T {
+	const cache = new BoundedCache<ReturnType<T>>(options);
+
+	return ((...args: Parameters<T>): ReturnType<T> => {
+		const key = options.key ? options.key(...args) : defaultKey(args);
+		const deps = options.deps ? options.deps(...args) : undefined;
+
+		const cached = cache.lookup(key, deps);
+		if (cached) {
+			return cached.value;
+		}
+
+		const result = fn(...args);
+		cache.set(key, result, deps);
+		return result;
+	}) as T;
+}
+
+/**
+ * Memoize an async function in a bounded cache.
+ * Concurrent calls with the same key and dependencies share one pending call; failed calls are not cached.
+ */
+export function memoizeAsync<T extends (...args: any[]) => Promise<any>>(fn: T, options: AsyncMemoizeOptions<T>): T {
+	type Result = Awaited<ReturnType<T>>;
+	const cache = new BoundedCache<Result>(options);
+	const pending = new Map<string, { promise: Promise<Result>; deps?: any[] }>();
+
+	return (async (...args: Parameters<T>): Promise<Result> => {
+		const key = options.key ? await options.key(...args) : defaultKey(args);
+		const deps = options.deps ? options.deps(...args) : undefined;
+
+		const cached = cache.lookup(key, deps);
+		if (cached) {
+			return cached.value;
+		}
+
+		const inFlight = pending.get(key);
+		if (inFlight && sameDeps(inFlight.deps, deps)) {
+			return inFlight.promise;
+		}
+
+		const promise = fn(...args);
+		pending.set(key, { promise, deps });
+		try {
+			const result = await promise;
+			cache.set(key, result, deps);
+			return result;
+		} finally {
+			if (pending.get(key)?.promise === promise) {
+				pending.delete(key);
+			}
+		}
+	}) as T;
+}
@@ -1,13 +1,16 @@
 import { ExtractedContent } from '../types/types';
-import { createMarkdownContent } from './markdown-converter';
+import { createMarkdownContent, createMarkdownFromElement } from './markdown-converter';
 import { sanitizeFileName, getDomain } from './string-utils';
 import browser from './browser-polyfill';
 import { debugLog } from './debug';
 import dayjs from 'dayjs';
 import { AnyHighlightData, TextHighlightData, HighlightData } from './highlighter';
 import { generalSettings } from './storage-utils';
+import { defineLazyVariable, lazy } from './lazy-variables';
+import { getHighlightMarkdown } from './highlight-markdown';
 import { 
-	getElementByXPath,
+	resolveXPaths,
+	serializeChildren,
 	wrapElementWithMark,
 	wrapTextWithMark 
 } from './dom-utils';
@@ -117,23 +120,32 @@ export async function initializePageContent(
 	try {
 		currentUrl = currentUrl.replace(/#:~:text=[^&]+(&|$)/, '');
 
-		let selectedMarkdown = '';
 		if (selectedHtml) {
 			content = selectedHtml;
-			selectedMarkdown = createMarkdownContent(selectedHtml, currentUrl);
 		}
 
 		const noteName = sanitizeFileName(title);
 
-		// Process highlights after getting the base content
-		if (generalSettings.highlighterEnabled && generalSettings.highlightBehavior !== 'no-highlights' && highlights && highlights.length > 0) {
-			content = processHighlights(content, highlights);
-		}
-
-		const markdownBody = createMarkdownContent(content, currentUrl);
-
-		// Convert each highlight to markdown and include optional metadata for templates
-		const highlightsData = highlights.map(highlight => {
+		// Expensive variables are computed on first read, so only the ones a template uses are built
+		const shouldProcessHighlights = generalSettings.highlighterEnabled && generalSettings.highlightBehavior !== 'no-highlights' && highlights && highlights.length > 0;
+		const highlightBehavior = shouldProcessHighlights ? generalSettings.highlightBehavior : 'no-highlights';
+		const sourceHtml = highlightBehavior === 'replace-content'
+			? highlights.map(highlight => highlight.content).join('')
+			: content;
+
+		// Inline highlights are applied to the parsed content, which {{content}} converts
+		// without serializing it again. {{contentHtml}} serializes it only if it is used.
+		const getHighlightedBody = lazy(() => highlightContent(sourceHtml, highlights));
+		const getContentHtml = lazy(() => highlightBehavior === 'highlight-inline'
+			? serializeChildren(getHighlightedBody())
+			: sourceHtml);
+		const getContentMarkdown = () => highlightBehavior === 'highlight-inline'
+			// Converting makes URLs absolute in place, so work on a copy
+			? createMarkdownFromElement(getHighlightedBody().cloneNode(true) as HTMLElement, currentUrl)
+			: createMarkdownContent(sourceHtml, currentUrl);
+
+		// Use the markdown stored with each highlight (converting only stale ones) and include optional metadata for templates
+		const getHighlightsData = () => highlights.map(highlight => {
 			const highlightData: {
 				text: string;
 				timestamp?: string;
@@ -141,7 +153,7 @@ export async function initializePageContent(
 				notes?: string[];
 				comment?: string;
 			} = {
-				text: createMarkdownContent(highlight.content, currentUrl)
+				text: getHighlightMarkdown(highlight, currentUrl)
 			};
 
 			// Timestamp is sourced from explicit highlight metadata, never inferred from IDs.
@@ -163,17 +175,11 @@ export async function initializePageContent(
 
 		const currentVariables: { [key: string]: string } = {
 			'{{author}}': author.trim(),
-			'{{content}}': markdownBody.trim(),
-			'{{contentHtml}}': content.trim(),
-			'{{selection}}': selectedMarkdown.trim(),
-			'{{selectionHtml}}': selectedHtml.trim(),
 			'{{date}}': dayjs().format('YYYY-MM-DDTHH:mm:ssZ').trim(),
 			'{{time}}': dayjs().format('YYYY-MM-DDTHH:mm:ssZ').trim(),
 			'{{description}}': description.trim(),
 			'{{domain}}': getDomain(currentUrl),
 			'{{favicon}}': favicon,
-			'{{fullHtml}}': fullHtml.trim(),
-			'{{highlights}}': highlights.length > 0 ? JSON.stringify(highlightsData) : '',
 			'{{image}}': image,
 			'{{noteName}}': noteName.trim(),
 			'{{published}}': published.split(',')[0].trim(),
@@ -183,6 +189,13 @@ export async function initializePageContent(
 			'{{words}}': wordCount.toString(),
 		};
 
+		defineLazyVariable(currentVariables, '{{content}}', () => getContentMarkdown().trim());
+		defineLazyVariable(currentVariables, '{{contentHtml}}', () => getContentHtml().trim());
+		defineLazyVariable(currentVariables, '{{selection}}', () => selectedHtml ? createMarkdownContent(selectedHtml, currentUrl).trim() : '');
+		defineLazyVariable(currentVariables, '{{selectionHtml}}', () => selectedHtml.trim());
+		defineLazyVariable(currentVariables, '{{fullHtml}}', () => fullHtml.trim());
+		defineLazyVariable(currentVariables, '{{highlights}}', () => highlights.length > 0 ? JSON.stringify(getHighlightsData()) : '');
+
 		// Add extracted content to variables
 		Object.entries(extractedContent).forEach(([key, value]) => {
 			currentVariables[`{{${key}}}`] = value;
@@ -240,9 +253,9 @@ function addSchemaOrgDataToVariables(schemaData: any, variables: { [key: string]
 			}
 		});
 	} else if (typeof schemaData === 'object' && schemaData !== null) {
-		// Store the entire object as JSON
+		// Store the entire object as JSON, serialized only if a template reads it
 		const objectKey = `{{schema:${prefix.replace(/\.$/, '')}}}`;
-		variables[objectKey] = JSON.stringify(schemaData);
+		defineLazyVariable(variables, objectKey, () => JSON.stringify(schemaData));
 
 		// Process individual properties
 		Object.entries(schemaData).forEach(([key, value]) => {
@@ -252,7 +265,7 @@ function addSchemaOrgDataToVariables(schemaData: any, variables: { [key: string]
 			if (typeof value === 'string' || typeof value === 'number' || typeof value === 'boolean') {
 				variables[variableKey] = String(value);
 			} else if (Array.isArray(value)) {
-				variables[variableKey] = JSON.stringify(value);
+				defineLazyVariable(variables, variableKey, () => JSON.stringify(value));
 				value.forEach((item, index) => {
 					addSchemaOrgDataToVariables(item, variables, `${prefix}${key}[${index}].`);
 				});
@@ -263,69 +276,44 @@ function addSchemaOrgDataToVariables(schemaData: any, variables: { [key: string]
 	}
 }
 
-function processHighlights(content: string, highlights: AnyHighlightData[]): string {
-	// First check if highlighter is enabled and we have highlights
-	if (!generalSettings.highlighterEnabled || !highlights?.length) {
-		return content;
-	}
-
-	// Then check the behavior setting
-	if (generalSettings.highlightBehavior === 'no-highlights') {
-		return content;
-	}
-
-	if (generalSettings.highlightBehavior === 'replace-content') {
-		return highlights.map(highlight => highlight.content).join('');
-	}
-
-	if (generalSettings.highlightBehavior === 'highlight-inline') {
-		debugLog('Highlights', 'Using content length:', content.length);
+/**
+ * Parse the content and wrap the highlights in it with mark elements.
+ */
+function highlightContent(content: string, highlights: AnyHighlightData[]): HTMLElement {
+	debugLog('Highlights', 'Using content length:', content.length);
 
-		const parser = new DOMParser();
-		const doc = parser.parseFromString(content, 'text/html');
-		const tempDiv = doc.body;
+	const parser = new DOMParser();
+	const doc = parser.parseFromString(content, 'text/html');
+	const tempDiv = doc.body;
 
-		const textHighlights = filterAndSortHighlights(highlights);
-		debugLog('Highlights', 'Processing highlights:', textHighlights.length);
+	const textHighlights = filterAndSortHighlights(highlights);
+	debugLog('Highlights', 'Processing highlights:', textHighlights.length);
 
-		for (const highlight of textHighlights) {
-			processHighlight(highlight, tempDiv as HTMLDivElement);
-		}
-
-		// Serialize back to HTML
-		const serializer = new XMLSerializer();
-		let result = '';
-		Array.from(tempDiv.childNodes).forEach(node => {
-			if (node.nodeType === Node.ELEMENT_NODE) {
-				result += serializer.serializeToString(node);
-			} else if (node.nodeType === Node.TEXT_NODE) {
-				result += node.textContent;
-			}
-		});
-		
-		return result;
+	for (const highlight of textHighlights) {
+		processHighlight(highlight, tempDiv as HTMLDivElement);
 	}
 
-	// Default fallback
-	return content;
+	return tempDiv;
 }
 
 function filterAndSortHighlights(highlights: AnyHighlightData[]): (TextHighlightData | ElementHighlightData)[] {
+	const elements = resolveXPaths(highlights.filter(h => h.xpath).map(h => h.xpath));
+	const getElement = (xpath: string) => elements.get(xpath) ?? null;
 	return highlights
 		.filter((h): h is (TextHighlightData | ElementHighlightData) => {
 			if (h.type === 'text') {
 				return !!(h.xpath?.trim() || h.content?.trim());
 			}
 			if (h.type === 'element' && h.xpath?.trim()) {
-				const element = getElementByXPath(h.xpath);
+				const element = getElement(h.xpath);
 				return element ? canHighlightElement(element) : false;
 			}
 			return false;
 		})
 		.sort((a, b) => {
 			if (a.xpath && b.xpath) {
-				const elementA = getElementByXPath(a.xpath);
-				const elementB = getElementByXPath(b.xpath);
+				const elementA = getElement(a.xpath);
+				const elementB = getElement(b.xpath);
 				if (elementA === elementB && a.type === 'text' && b.type === 'text') {
 					return b.startOffset - a.startOffset;
 				}
@@ -0,0 +1,86 @@
+// @vitest-environment jsdom
+import { describe, test, expect, beforeEach } from 'vitest';
+import { getElementByXPath, getElementXPath, resolveXPaths } from './dom-utils';
+import { getCacheStats } from './cache';
+
+describe('XPath resolution cache', () => {
+	beforeEach(() => {
+		document.body.innerHTML = '<div id="a"><p id="p1">one</p><p id="p2">two</p></div><div id="b"><p id="p3">three</p></div>';
+	});
+
+	test('reuses resolved elements', () => {
+		const xpath = getElementXPath(document.getElementById('p2')!);
+		const hitsBefore = getCacheStats().xpath?.hits ?? 0;
+
+		expect(getElementByXPath(xpath)?.id).toBe('p2');
+		expect(getElementByXPath(xpath)?.id).toBe('p2');
+		expect(getCacheStats().xpath.hits).toBe(hitsBefore + 1);
+	});
+
+	test('drops entries shifted by an insertion before them', () => {
+		const xpath = getElementXPath(document.getElementById('p2')!);
+		expect(getElementByXPath(xpath)?.id).toBe('p2');
+
+		const inserted = document.createElement('p');
+		inserted.id = 'p0';
+		document.getElementById('a')!.prepend(inserted);
+
+		// Same task as the mutation: pending records are processed before the lookup
+		expect(getElementByXPath(xpath)?.id).toBe('p1');
+	});
+
+	test('keeps entries not affected by a change', () => {
+		const xpath = getElementXPath(document.getElementById('p3')!);
+		expect(getElementByXPath(xpath)?.id).toBe('p3');
+		const missesBefore = getCacheStats().xpath.misses;
+
+		document.getElementById('a')!.appendChild(document.createElement('p'));
+		document.body.appendChild(document.createElement('div'));
+
+		expect(getElementByXPath(xpath)?.id).toBe('p3');
+		expect(getCacheStats().xpath.misses).toBe(missesBefore);
+	});
+
+	test('drops removed elements and resolves added ones', () => {
+		const removedXPath = getElementXPath(document.getElementById('p3')!);
+		expect(getElementByXPath(removedXPath)?.id).toBe('p3');
+		const missingXPath = '/html[1]/body[1]/div[2]/span[1]';
+		expect(getElementByXPath(missingXPath)).toBeNull();
+
+		document.getElementById('p3')!.remove();
+		const span = document.createElement('span');
+		document.getElementById('b')!.appendChild(span);
+
+		expect(getElementByXPath(removedXPath)).toBeNull();
+		expect(getElementByXPath(missingXPath)).toBe(span);
+	});
+
+	test('drops elements moved to the end of another parent', () => {
+		const xpath = getElementXPath(document.getElementById('p2')!);
+		expect(getElementByXPath(xpath)?.id).toBe('p2');
+
+		document.getElementById('b')!.appendChild(document.getElementById('p2')!);
+
+		expect(getElementByXPath(xpath)).toBeNull();
+	});
+
+	test('drops elements whose ancestor was moved', () => {
+		const xpath = getElementXPath(document.getElementById('p3')!);
+		expect(getElementByXPath(xpath)?.id).toBe('p3');
+
+		// body then has a single div, so div[2]/p[1] matches nothing
+		document.getElementById('a')!.appendChild(document.getElementById('b')!);
+
+		expect(getElementByXPath(xpath)).toBeNull();
+	});
+
+	test('resolves many XPaths in one walk', () => {
+		const ids = ['p1', 'p2', 'p3', 'b'];
+		const xpaths = ids.map(id => getElementXPath(document.getElementById(id)!));
+		const results = resolveXPaths([...xpaths, '/html[1]/body[1]/div[9]', '//p[@id="p3"]']);
+
+		expect(xpaths.map(xpath => results.get(xpath)?.id)).toEqual(ids);
+		expect(results.get('/html[1]/body[1]/div[9]')).toBeNull();
+		expect(results.get('//p[@id="p3"]')?.id).toBe('p3');
+	});
+});
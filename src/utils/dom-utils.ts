@@ -1,3 +1,5 @@
+import { BoundedCache } from './cache';
+
 export function createElementWithClass(tagName: string, className: string): HTMLElement {
 	const element = document.createElement(tagName);
 	element.className = className;
@@ -77,7 +79,7 @@ function buildNamespaceAgnosticXPath(xpath: string): string {
 		.join('/');
 }
 
-export function getElementByXPath(xpath: string): Element | null {
+function evaluateXPath(xpath: string): Element | null {
 	const directMatch = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
 	if (directMatch instanceof Element) {
 		return directMatch;
@@ -99,6 +101,200 @@ export function getElementByXPath(xpath: string): Element | null {
 	return fallbackMatch instanceof Element ? fallbackMatch : null;
 }
 
+// ==== XPath resolution cache
+//
+// Highlights are anchored by XPaths of tag/index steps, resolved on every
+// repaint and sort. Resolved elements are cached, and a MutationObserver
+// drops only the entries a DOM change can affect: elements that were
+// detached, elements that were (re)inserted or are inside an inserted node,
+// which covers moves, and elements whose own index or an ancestor's index
+// shifted because a same-tag sibling was inserted or removed before it. Pending
+// mutation records are processed before every lookup, so a lookup right
+// after a DOM change in the same task is still correct.
+//
+// Entries hold elements strongly (WeakRef isn't available to this build's
+// targets), but detached elements are dropped with the next mutation batch.
+
+const xpathCache = new BoundedCache<Element | null>({ name: 'xpath', maxEntries: 5000 });
+let xpathCacheObserver: MutationObserver | null = null;
+
+function observeXPathCache(): void {
+	if (xpathCacheObserver || typeof MutationObserver === 'undefined') {
+		return;
+	}
+	xpathCacheObserver = new MutationObserver(invalidateXPathCache);
+	xpathCacheObserver.observe(document, { childList: true, subtree: true });
+}
+
+function getChangedElementTags(record: MutationRecord): Set<string> {
+	const tags = new Set<string>();
+	const collect = (nodes: NodeList) => {
+		for (let i = 0; i < nodes.length; i++) {
+			if (nodes[i].nodeType === Node.ELEMENT_NODE) {
+				tags.add((nodes[i] as Element).tagName);
+			}
+		}
+	};
+	collect(record.addedNodes);
+	collect(record.removedNodes);
+	return tags;
+}
+
+// Whether the change moved the element, or one of its ancestors, to a different index
+function isShiftedBy(element: Element, record: MutationRecord, changedTags: Set<string>): boolean {
+	const nextSibling = record.nextSibling;
+	if (!nextSibling || !record.target.contains(element)) {
+		return false;
+	}
+
+	let child: Element | null = element;
+	while (child && child.parentNode !== record.target) {
+		child = child.parentElement;
+	}
+	if (!child || !changedTags.has(child.tagName)) {
+		return false;
+	}
+
+	return child === nextSibling || !!(nextSibling.compareDocumentPosition(child) & Node.DOCUMENT_POSITION_FOLLOWING);
+}
+
+function invalidateXPathCache(records: MutationRecord[]): void {
+	const changes = records
+		.filter(record => record.type === 'childList')
+		.map(record => ({ record, tags: getChangedElementTags(record) }))
+		.filter(change => change.tags.size > 0);
+	if (changes.length === 0) {
+		return;
+	}
+	const addedNodes: Node[] = [];
+	changes.forEach(change => {
+		for (let i = 0; i < change.record.addedNodes.length; i++) {
+			addedNodes.push(change.record.addedNodes[i]);
+		}
+	});
+	const added = addedNodes.length > 0;
+	// Appends and removals at the end don't shift any remaining sibling
+	const shifts = changes.filter(change => change.record.nextSibling !== null);
+
+	xpathCache.forEach((element, xpath) => {
+		const isStale = element
+			? !element.isConnected ||
+				// A moved element (or ancestor) is removed and re-added; either record may be at the end
+				addedNodes.some(node => node.contains(element)) ||
+				shifts.some(change => isShiftedBy(element, change.record, change.tags))
+			// A missing element may have been added
+			: added;
+		if (isStale) {
+			xpathCache.delete(xpath);
+		}
+	});
+}
+
+function flushXPathCacheInvalidations(): void {
+	if (xpathCacheObserver) {
+		const records = xpathCacheObserver.takeRecords();
+		if (records.length > 0) {
+			invalidateXPathCache(records);
+		}
+	}
+}
+
+export function getElementByXPath(xpath: string): Element | null {
+	observeXPathCache();
+	flushXPathCacheInvalidations();
+
+	const cached = xpathCache.get(xpath);
+	if (cached !== undefined) {
+		return cached;
+	}
+
+	const element = evaluateXPath(xpath);
+	xpathCache.set(xpath, element);
+	return element;
+}
+
+interface XPathStepNode {
+	xpaths: string[];
+	children: Map<string, XPathStepNode>;
+}
+
+/**
+ * Resolve many XPaths at once, for example every highlight on the page.
+ * Tag/index XPaths such as those from getElementXPath share one walk down the
+ * tree, visiting each element's children once; others are evaluated separately.
+ */
+export function resolveXPaths(xpaths: string[]): Map<string, Element | null> {
+	observeXPathCache();
+	flushXPathCacheInvalidations();
+
+	const results = new Map<string, Element | null>();
+	const root: XPathStepNode = { xpaths: [], children: new Map() };
+	const unresolved = new Set<string>();
+
+	for (const xpath of xpaths) {
+		if (results.has(xpath)) {
+			continue;
+		}
+		const cached = xpathCache.get(xpath);
+		if (cached !== undefined) {
+			results.set(xpath, cached);
+			continue;
+		}
+
+		const steps = xpath.match(/^(\/[a-zA-Z_][\w.-]*\[\d+\])+$/) ? xpath.slice(1).split('/') : null;
+		if (!steps) {
+			unresolved.add(xpath);
+			continue;
+		}
+		let node = root;
+		for (const step of steps) {
+			// Steps are stored as tag[index], matched case-insensitively like getElementXPath's output
+			const key = step.toLowerCase();
+			let child = node.children.get(key);
+			if (!child) {
+				child = { xpaths: [], children: new Map() };
+				node.children.set(key, child);
+			}
+			node = child;
+		}
+		node.xpaths.push(xpath);
+		results.set(xpath, null);
+	}
+
+	const walk = (parent: ParentNode, node: XPathStepNode) => {
+		const counts = new Map<string, number>();
+		let remaining = node.children.size;
+		for (let i = 0; i < parent.children.length && remaining > 0; i++) {
+			const element = parent.children[i];
+			const tag = element.tagName.toLowerCase();
+			const count = (counts.get(tag) || 0) + 1;
+			counts.set(tag, count);
+
+			const child = node.children.get(`${tag}[${count}]`);
+			if (child) {
+				remaining--;
+				for (const xpath of child.xpaths) {
+					results.set(xpath, element);
+					xpathCache.set(xpath, element);
+				}
+				walk(element, child);
+			}
+		}
+	};
+	walk(document, root);
+
+	// XPaths the walk didn't find may still match namespaced elements
+	results.forEach((element, xpath) => {
+		if (element === null) {
+			unresolved.add(xpath);
+		}
+	});
+	unresolved.forEach((xpath) => {
+		results.set(xpath, getElementByXPath(xpath));
+	});
+	return results;
+}
+
 export function isDarkColor(color: string): boolean {
 	// Convert the color to RGB
 	const rgb = color.match(/\d+/g);
@@ -156,3 +352,19 @@ export function wrapTextWithMark(element: Element, highlight: { startOffset: num
 		range.surroundContents(mark);
 	}
 }
+
+/**
+ * Serialize the children of an element to an HTML string.
+ */
+export function serializeChildren(element: Element): string {
+	const serializer = new XMLSerializer();
+	let result = '';
+	Array.from(element.childNodes).forEach(node => {
+		if (node.nodeType === Node.ELEMENT_NODE) {
+			result += serializer.serializeToString(node);
+		} else if (node.nodeType === Node.TEXT_NODE) {
+			result += node.textContent;
+		}
+	});
+	return result;
+}
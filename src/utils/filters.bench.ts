@@ -0,0 +1,34 @@
+import { bench, describe } from 'vitest';
+import { applyFilters } from './filters';
+
+// Run with: npm run bench
+// Time per call should grow linearly with the size of the filter string.
+
+const filterPatterns = [
+	'replace:"/[aeiou]+|x\\d{2,}/g":"-"',
+	'replace:"foo":"bar"',
+	'replace:("a":"b","c|d":"e")',
+	'map:item => ({name: item.name})',
+	'join:" | "',
+];
+
+function buildFilterString(targetSize: number): string {
+	const parts: string[] = [];
+	let size = 0;
+	for (let i = 0; size < targetSize; i++) {
+		const part = filterPatterns[i % filterPatterns.length];
+		parts.push(part);
+		size += part.length + 3;
+	}
+	return parts.join(' | ');
+}
+
+const sizes = [100, 200, 400].map(kb => ({ kb, filterString: buildFilterString(kb * 1024) }));
+
+describe('applyFilters with long filter strings', () => {
+	for (const { kb, filterString } of sizes) {
+		bench(`${kb} KB filter string`, () => {
+			applyFilters('hello world', filterString);
+		});
+	}
+});
@@ -0,0 +1,54 @@
+import { describe, test, expect } from 'vitest';
+import { applyFilters, applyFilterValue, applyFilterDirect } from './filters';
+import { render } from './renderer';
+
+describe('Filter value pipeline', () => {
+	test('native filters pass arrays without serializing them', () => {
+		const result = applyFilterValue('b,a,b', 'split', ',');
+		expect(result).toEqual(['b', 'a', 'b']);
+		expect(applyFilterValue(result, 'unique', undefined)).toEqual(['b', 'a']);
+	});
+
+	test('string filters receive serialized input through the adapter', () => {
+		expect(applyFilterValue(['a', 'b'], 'upper', undefined)).toEqual(['A', 'B']);
+		expect(applyFilterDirect(['a', 'b'], 'upper', undefined)).toBe('["A","B"]');
+	});
+
+	test('applyFilters serializes only the end of the chain', () => {
+		expect(applyFilters('c,a,c,b', 'split:","|unique|reverse|join:"-"')).toBe('b-a-c');
+		expect(applyFilters('c,a,c', 'split:","|unique')).toBe('["c","a"]');
+	});
+
+	test('does not mutate array variables', async () => {
+		const items = ['a', 'b', 'c'];
+		const result = await render('{{items|reverse|join:","}}', { variables: { items }, currentUrl: '' });
+		expect(result.output).toBe('c,b,a');
+		expect(items).toEqual(['a', 'b', 'c']);
+	});
+
+	test('renderer filter chains match the string filters', async () => {
+		const variables = { '{{tags}}': 'x, y, x, z' };
+		const result = await render('{{tags|split:", "|unique|length}}', { variables, currentUrl: '' });
+		expect(result.output).toBe(applyFilters('x, y, x, z', 'split:", "|unique|length'));
+		expect(result.output).toBe('3');
+	});
+});
+
+describe('Filter string splitting', () => {
+	test('ignores spaces around pipes', () => {
+		expect(applyFilters('Hello', 'lower  |  upper | trim')).toBe('HELLO');
+	});
+
+	test('does not split on pipes inside quotes, regexes or parentheses', () => {
+		expect(applyFilters('a|b', 'replace:"|":"-"')).toBe('a-b');
+		expect(applyFilters('a b', 'replace:"/a | b/g":"x"')).toBe('a b');
+		expect(applyFilters('a | b', 'replace:"/a | b/g":"x"')).toBe('x');
+		expect(applyFilters('a|b', 'replace:("|":"-")|upper')).toBe('A-B');
+	});
+
+	test('splits long filter strings', () => {
+		const filterString = Array(20000).fill('replace:"a":"b"').join(' | ');
+		expect(applyFilters('aaa', filterString)).toBe('bbb');
+	});
+});
+
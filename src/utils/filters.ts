@@ -1,6 +1,6 @@
-import { FilterFunction } from '../types/types';
+import { FilterFunction, FilterValue, ValueFilterFunction } from '../types/types';
 import { debugLog } from './debug';
-import { createParserState, processCharacter } from './parser-utils';
+import { createParserState, processCharacter, takeCurrent } from './parser-utils';
 
 import { blockquote } from './filters/blockquote';
 import { calc, validateCalcParams } from './filters/calc';
@@ -10,26 +10,26 @@ import { capitalize } from './filters/capitalize';
 import { date } from './filters/date';
 import { date_modify, validateDateModifyParams } from './filters/date_modify';
 import { decode_uri } from './filters/decode_uri';
-import { first } from './filters/first';
+import { first, firstValue } from './filters/first';
 import { footnote } from './filters/footnote';
 import { fragment_link } from './filters/fragment_link';
 import { html_to_json } from './filters/html_to_json';
 import { image } from './filters/image';
-import { join } from './filters/join';
+import { join, joinValue } from './filters/join';
 import { kebab } from './filters/kebab';
-import { last } from './filters/last';
+import { last, lastValue } from './filters/last';
 import { list, validateListParams } from './filters/list';
 import { link } from './filters/link';
-import { length } from './filters/length';
+import { length, lengthValue } from './filters/length';
 import { lower } from './filters/lower';
-import { map, validateMapParams } from './filters/map';
+import { map, mapValue, validateMapParams } from './filters/map';
 import { markdown } from './filters/markdown';
 import { merge } from './filters/merge';
 import { nth, validateNthParams } from './filters/nth';
 import { number_format } from './filters/number_format';
 import { object, validateObjectParams } from './filters/object';
 import { pascal } from './filters/pascal';
-import { reverse } from './filters/reverse';
+import { reverse, reverseValue } from './filters/reverse';
 import { remove_attr } from './filters/remove_attr';
 import { remove_html } from './filters/remove_html';
 import { remove_tags } from './filters/remove_tags';
@@ -39,7 +39,7 @@ import { round, validateRoundParams } from './filters/round';
 import { safe_name, validateSafeNameParams } from './filters/safe_name';
 import { slice, validateSliceParams } from './filters/slice';
 import { snake } from './filters/snake';
-import { split } from './filters/split';
+import { split, splitValue } from './filters/split';
 import { strip_attr } from './filters/strip_attr';
 import { strip_md } from './filters/strip_md';
 import { strip_tags } from './filters/strip_tags';
@@ -49,7 +49,7 @@ import { title } from './filters/title';
 import { trim } from './filters/trim';
 import { uncamel } from './filters/uncamel';
 import { unescape } from './filters/unescape';
-import { unique } from './filters/unique';
+import { unique, uniqueValue } from './filters/unique';
 import { upper } from './filters/upper';
 import { wikilink } from './filters/wikilink';
 import { duration } from './filters/duration';
@@ -185,14 +185,67 @@ export const filters: { [key: string]: FilterFunction } = {
 	wikilink
 };
 
-// Split individual filters
+// Filters that work on native values, so a chain like split|map|unique|join passes
+// arrays between steps instead of serializing and re-parsing them at every step.
+// All other filters are string based and go through stringFilterAdapter.
+export const valueFilters: { [key: string]: ValueFilterFunction } = {
+	first: firstValue,
+	join: joinValue,
+	last: lastValue,
+	length: lengthValue,
+	map: mapValue,
+	reverse: reverseValue,
+	split: splitValue,
+	unique: uniqueValue,
+};
+
+// Run a string based filter on a native value
+function stringFilterAdapter(filter: FilterFunction): ValueFilterFunction {
+	return (value, param) => filter(typeof value === 'string' ? value : JSON.stringify(value), param);
+}
+
+const adaptedFilters: { [key: string]: ValueFilterFunction } = {};
+
+function getValueFilter(name: string): ValueFilterFunction | undefined {
+	if (valueFilters[name]) {
+		return valueFilters[name];
+	}
+	const filter = filters[name];
+	if (!filter) {
+		return undefined;
+	}
+	if (!adaptedFilters[name]) {
+		adaptedFilters[name] = stringFilterAdapter(filter);
+	}
+	return adaptedFilters[name];
+}
+
+/**
+ * Convert any value to a filter input. Arrays and objects are kept as is.
+ */
+export function toFilterValue(value: any): FilterValue {
+	if (value === undefined || value === null) {
+		return '';
+	}
+	if (typeof value === 'object') {
+		return value;
+	}
+	return String(value);
+}
+
+/**
+ * Serialize a filter value, at the end of a filter chain.
+ */
+export function stringifyFilterValue(value: FilterValue): string {
+	return typeof value === 'string' ? value : JSON.stringify(value);
+}
+
+// Split individual filters in a single pass over the string.
+// Spaces around the separating pipes are removed when each filter is trimmed.
 function splitFilterString(filterString: string): string[] {
 	const filters: string[] = [];
 	const state = createParserState();
 
-	// Remove all spaces before and after | that are not within quotes or parentheses
-	filterString = filterString.replace(/\s*\|\s*(?=(?:[^"'()]*["'][^"'()]*["'])*[^"'()]*$)/g, '|');
-
 	// Iterate through each character in the filterString
 	for (let i = 0; i < filterString.length; i++) {
 		const char = filterString[i];
@@ -200,8 +253,7 @@ function splitFilterString(filterString: string): string[] {
 		// Split filters on pipe character when not in quotes, regex, or parentheses
 		if (char === '|' && !state.inQuote && !state.inRegex && 
 			state.curlyDepth === 0 && state.parenDepth === 0) {
-			filters.push(state.current.trim());
-			state.current = '';
+			filters.push(takeCurrent(state));
 		} else {
 			// For any other character, add it to the current filter
 			processCharacter(char, state);
@@ -226,8 +278,7 @@ function parseFilterString(filterString: string): string[] {
 
 		if (char === ':' && !state.inQuote && !state.inRegex && 
 			state.parenDepth === 0 && parts.length === 0) {
-			parts.push(state.current.trim());
-			state.current = '';
+			parts.push(takeCurrent(state));
 		} else {
 			processCharacter(char, state);
 		}
@@ -241,34 +292,32 @@ function parseFilterString(filterString: string): string[] {
 }
 
 /**
- * Apply a single filter by name with a pre-formatted parameter string.
- * Use this when you already have the filter name and parameters separated.
- * For filter strings like "filter1:arg|filter2", use applyFilters() instead.
+ * Apply a single filter by name with a pre-formatted parameter string, keeping
+ * the result as a native value so it can be passed to the next filter in a chain.
+ * Serialize the end result of the chain with stringifyFilterValue.
  *
  * @param value - The input value to filter
  * @param filterName - The name of the filter to apply (e.g., "replace", "slice")
  * @param paramString - The parameter string without the filter name (e.g., "0,5" for slice:0,5)
  * @param currentUrl - Optional current URL for filters that need it
- * @returns The filtered value as a string
+ * @returns The filtered value
  */
-export function applyFilterDirect(
-	value: string | any[],
+export function applyFilterValue(
+	value: any,
 	filterName: string,
 	paramString: string | undefined,
 	currentUrl?: string
-): string {
-	debugLog('Filters', 'applyFilterDirect called with:', { value, filterName, paramString, currentUrl });
+): FilterValue {
+	debugLog('Filters', 'applyFilterValue called with:', { value, filterName, paramString, currentUrl });
 
-	const filter = filters[filterName];
+	const input = toFilterValue(value);
+	const filter = getValueFilter(filterName);
 	if (!filter) {
 		console.error(`Invalid filter: ${filterName}`);
 		debugLog('Filters', `Available filters:`, Object.keys(filters));
-		return typeof value === 'string' ? value : JSON.stringify(value);
+		return input;
 	}
 
-	// Convert the input to a string if it's not already
-	const stringInput = typeof value === 'string' ? value : JSON.stringify(value);
-
 	// Build params array for special case handling
 	let params = paramString ? [paramString] : [];
 
@@ -283,21 +332,40 @@ export function applyFilterDirect(
 	}
 
 	// Apply the filter
-	const output = filter(stringInput, params.join(':'));
+	const output = filter(input, params.join(':'));
 
 	debugLog('Filters', `Filter ${filterName} output:`, output);
 
 	// If the output is a string that looks like JSON, try to parse it
 	if (typeof output === 'string' && (output.startsWith('[') || output.startsWith('{'))) {
 		try {
-			const parsed = JSON.parse(output);
-			return JSON.stringify(parsed);
+			return JSON.parse(output);
 		} catch {
 			return output;
 		}
 	}
 
-	return typeof output === 'string' ? output : JSON.stringify(output);
+	return output;
+}
+
+/**
+ * Apply a single filter by name with a pre-formatted parameter string.
+ * Use this when you already have the filter name and parameters separated.
+ * For filter strings like "filter1:arg|filter2", use applyFilters() instead.
+ *
+ * @param value - The input value to filter
+ * @param filterName - The name of the filter to apply (e.g., "replace", "slice")
+ * @param paramString - The parameter string without the filter name (e.g., "0,5" for slice:0,5)
+ * @param currentUrl - Optional current URL for filters that need it
+ * @returns The filtered value as a string
+ */
+export function applyFilterDirect(
+	value: string | any[],
+	filterName: string,
+	paramString: string | undefined,
+	currentUrl?: string
+): string {
+	return stringifyFilterValue(applyFilterValue(value, filterName, paramString, currentUrl));
 }
 
 /**
@@ -313,56 +381,27 @@ export function applyFilters(value: string | any[], filterString: string, curren
 		return typeof value === 'string' ? value : JSON.stringify(value);
 	}
 
-	let processedValue = value;
-
 	// Split the filter string into individual filter names, accounting for escaped pipes and quotes
 	const filterNames = splitFilterString(filterString);
 	debugLog('Filters', 'Split filter string:', filterNames);
 
-	// Reduce through all filter names, applying each filter sequentially
-	const result = filterNames.reduce((result, filterName) => {
-			// Parse the filter string into name and parameters
-			const [name, ...params] = parseFilterString(filterName);
-			debugLog('Filters', `Parsed filter: ${name}, Params:`, params);
-
-			// Get the filter function from the filters object
-			const filter = filters[name];
-			if (filter) {
-				// Convert the input to a string if it's not already
-				const stringInput = typeof result === 'string' ? result : JSON.stringify(result);
-
-				// Special case for markdown filter: use currentUrl if no params provided
-				if (name === 'markdown' && params.length === 0 && currentUrl) {
-					params.push(currentUrl);
-				}
-
-				// Special case for fragment filter: use currentUrl if no params provided
-				if (name === 'fragment_link' && currentUrl) {
-					params.push(currentUrl);
-				}
-
-				// Apply the filter and get the output
-				const output = filter(stringInput, params.join(':'));
-
-				debugLog('Filters', `Filter ${name} output:`, output);
-
-				// If the output is a string that looks like JSON, try to parse it
-				if (typeof output === 'string' && (output.startsWith('[') || output.startsWith('{'))) {
-					try {
-						return JSON.parse(output);
-					} catch {
-						return output;
-					}
-				}
-				return output;
-			} else {
-				// If the filter doesn't exist, log an error and return the unmodified result
-				console.error(`Invalid filter: ${name}`);
-				debugLog('Filters', `Available filters:`, Object.keys(filters));
-				return result;
-			}
-		}, processedValue);
+	// Apply each filter sequentially, passing native values between them
+	let result: FilterValue = toFilterValue(value);
+	for (const filterName of filterNames) {
+		// Parse the filter string into name and parameters
+		const [name, ...params] = parseFilterString(filterName);
+		debugLog('Filters', `Parsed filter: ${name}, Params:`, params);
+
+		if (!getValueFilter(name)) {
+			// If the filter doesn't exist, log an error and keep the unmodified result
+			console.error(`Invalid filter: ${name}`);
+			debugLog('Filters', `Available filters:`, Object.keys(filters));
+			continue;
+		}
+
+		result = applyFilterValue(result, name, params.length > 0 ? params.join(':') : undefined, currentUrl);
+	}
 
 	// Ensure the final result is a string
-	return typeof result === 'string' ? result : JSON.stringify(result);
+	return stringifyFilterValue(result);
 }
@@ -1,19 +1,27 @@
-export const join = (str: string, param?: string): string => {
-	// Return early if input is empty or invalid
-	if (!str || str === 'undefined' || str === 'null') {
-		return '';
-	}
+import type { FilterValue } from '../../types/types';
 
+export const joinValue = (value: FilterValue, param?: string): string => {
 	let array;
-	try {
-		array = JSON.parse(str);
-	} catch (error) {
-		console.error('Error parsing JSON in join filter:', error);
-		return str;
-	}
+	if (typeof value === 'string') {
+		// Return early if input is empty or invalid
+		if (!value || value === 'undefined' || value === 'null') {
+			return '';
+		}
 
-	if (!Array.isArray(array)) {
-		return str;
+		try {
+			array = JSON.parse(value);
+		} catch (error) {
+			console.error('Error parsing JSON in join filter:', error);
+			return value;
+		}
+
+		if (!Array.isArray(array)) {
+			return value;
+		}
+	} else if (Array.isArray(value)) {
+		array = value;
+	} else {
+		return JSON.stringify(value);
 	}
 
 	let separator = ',';
@@ -25,4 +33,8 @@ export const join = (str: string, param?: string): string => {
 	}
 
 	return array.join(separator);
-};
\ No newline at end of file
+};
+
+export const join = (str: string, param?: string): string => {
+	return joinValue(str, param);
+};
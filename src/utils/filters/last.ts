@@ -1,16 +1,23 @@
-export const last = (str: string): string => {
+import type { FilterValue } from '../../types/types';
+
+export const lastValue = (value: FilterValue): FilterValue => {
 	// Return empty string as-is without attempting to parse
-	if (str === '') {
-		return str;
+	if (value === '') {
+		return value;
 	}
 
 	try {
-		const array = JSON.parse(str);
+		const array = typeof value === 'string' ? JSON.parse(value) : value;
 		if (Array.isArray(array) && array.length > 0) {
 			return array[array.length - 1].toString();
 		}
 	} catch (error) {
 		console.error('Error parsing JSON in last filter:', error);
 	}
-	return str;
-};
\ No newline at end of file
+	return value;
+};
+
+export const last = (str: string): string => {
+	const result = lastValue(str);
+	return typeof result === 'string' ? result : JSON.stringify(result);
+};
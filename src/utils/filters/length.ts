@@ -1,20 +1,33 @@
-export const length = (str: string): string => {
+import type { FilterValue } from '../../types/types';
+
+export const lengthValue = (value: FilterValue): string => {
+	if (Array.isArray(value)) {
+		// For arrays, return the number of items
+		return value.length.toString();
+	}
+	if (typeof value !== 'string') {
+		// For objects, return the number of keys
+		return Object.keys(value).length.toString();
+	}
+
 	try {
 		// Try to parse as JSON first
-		const parsed = JSON.parse(str);
+		const parsed = JSON.parse(value);
 		
 		if (Array.isArray(parsed)) {
-			// For arrays, return the number of items
 			return parsed.length.toString();
 		} else if (typeof parsed === 'object' && parsed !== null) {
-			// For objects, return the number of keys
 			return Object.keys(parsed).length.toString();
 		}
 		// If parsing succeeds but it's not an array or object, 
 		// treat it as a string
-		return str.length.toString();
+		return value.length.toString();
 	} catch (error) {
 		// If parsing fails, treat as a string and return its length
-		return str.length.toString();
+		return value.length.toString();
 	}
-}; 
\ No newline at end of file
+};
+
+export const length = (str: string): string => {
+	return lengthValue(str);
+};
@@ -1,5 +1,6 @@
 import { debugLog } from '../debug';
 import type { ParamValidationResult } from '../filters';
+import type { FilterValue } from '../../types/types';
 
 export const validateMapParams = (param: string | undefined): ParamValidationResult => {
 	if (!param) {
@@ -14,17 +15,21 @@ export const validateMapParams = (param: string | undefined): ParamValidationRes
 	return { valid: true };
 };
 
-export const map = (str: string, param?: string): string => {
+export const mapValue = (str: FilterValue, param?: string): FilterValue => {
 	debugLog('Map', 'map input:', str);
 	debugLog('Map', 'map param:', param);
 
 	let array;
-	try {
-		array = JSON.parse(str);
-		debugLog('Map', 'Parsed array:', JSON.stringify(array, null, 2));
-	} catch (error) {
-		debugLog('Map', 'Parsing failed, using input as single item');
-		array = [str];
+	if (typeof str !== 'string') {
+		array = str;
+	} else {
+		try {
+			array = JSON.parse(str);
+			debugLog('Map', 'Parsed array:', JSON.stringify(array, null, 2));
+		} catch (error) {
+			debugLog('Map', 'Parsing failed, using input as single item');
+			array = [str];
+		}
 	}
 
 	if (Array.isArray(array) && param) {
@@ -82,12 +87,17 @@ export const map = (str: string, param?: string): string => {
 			});
 
 		debugLog('Map', 'Mapped array:', JSON.stringify(mappedArray, null, 2));
-		return JSON.stringify(mappedArray);
+		return mappedArray;
 	}
 	debugLog('Map', 'map output (unchanged):', str);
 	return str;
 };
 
+export const map = (str: string, param?: string): string => {
+	const result = mapValue(str, param);
+	return typeof result === 'string' ? result : JSON.stringify(result);
+};
+
 function evaluateExpression(expression: string, item: any, argName: string): any {
 	if (typeof item === 'string') {
 		// For simple string arrays, return the item directly
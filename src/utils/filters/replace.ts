@@ -1,4 +1,4 @@
-import { createParserState, processCharacter, parseRegexPattern } from '../parser-utils';
+import { createParserState, processCharacter, parseRegexPattern, takeCurrent } from '../parser-utils';
 import type { ParamValidationResult } from '../filters';
 
 export const validateReplaceParams = (param: string | undefined): ParamValidationResult => {
@@ -42,8 +42,7 @@ export const replace = (str: string, param?: string): string => {
 
 		if (char === ',' && !state.inQuote && !state.inRegex &&
 			state.curlyDepth === 0 && state.parenDepth === 0) {
-			replacements.push(state.current.trim());
-			state.current = '';
+			replacements.push(takeCurrent(state));
 		} else {
 			processCharacter(char, state);
 		}
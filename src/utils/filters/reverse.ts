@@ -1,25 +1,40 @@
-export const reverse = (str: string): string => {
+import type { FilterValue } from '../../types/types';
+
+function reverseParsed(value: any): FilterValue | undefined {
+	if (Array.isArray(value)) {
+		// Handle arrays, without mutating the input
+		return value.slice().reverse();
+	} else if (typeof value === 'object' && value !== null) {
+		// Handle objects by reversing key-value pairs
+		const entries = Object.entries(value);
+		const reversedEntries = entries.reverse();
+		return Object.fromEntries(reversedEntries);
+	}
+	return undefined;
+}
+
+export const reverseValue = (value: FilterValue): FilterValue => {
+	if (typeof value !== 'string') {
+		return reverseParsed(value) ?? value;
+	}
+
 	// Return early if input is empty or invalid
-	if (!str || str === 'undefined' || str === 'null') {
+	if (!value || value === 'undefined' || value === 'null') {
 		return '';
 	}
 
+	let parsed;
 	try {
-		const value = JSON.parse(str);
-		if (Array.isArray(value)) {
-			// Handle arrays
-			return JSON.stringify(value.reverse());
-		} else if (typeof value === 'object' && value !== null) {
-			// Handle objects by reversing key-value pairs
-			const entries = Object.entries(value);
-			const reversedEntries = entries.reverse();
-			const reversedObject = Object.fromEntries(reversedEntries);
-			return JSON.stringify(reversedObject);
-		}
+		parsed = JSON.parse(value);
 	} catch (error) {
 		// If not valid JSON, treat as string
-		return str.split('').reverse().join('');
+		return value.split('').reverse().join('');
 	}
 
-	return str;
-}; 
\ No newline at end of file
+	return reverseParsed(parsed) ?? value;
+};
+
+export const reverse = (str: string): string => {
+	const result = reverseValue(str);
+	return typeof result === 'string' ? result : JSON.stringify(result);
+};
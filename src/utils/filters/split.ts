@@ -1,7 +1,11 @@
-export const split = (str: string, param?: string): string => {
+import type { FilterValue } from '../../types/types';
+
+export const splitValue = (value: FilterValue, param?: string): string[] => {
+	const str = typeof value === 'string' ? value : JSON.stringify(value);
+
 	// If no param is provided or param is empty string, split every character
 	if (!param || param === '') {
-		return JSON.stringify(str.split(''));
+		return str.split('');
 	}
 
 	// Remove outer parentheses if present
@@ -13,7 +17,9 @@ export const split = (str: string, param?: string): string => {
 	const separator = param.length === 1 ? param : new RegExp(param);
 
 	// Split operation
-	const result = str.split(separator);
+	return str.split(separator);
+};
 
-	return JSON.stringify(result);
-};
\ No newline at end of file
+export const split = (str: string, param?: string): string => {
+	return JSON.stringify(splitValue(str, param));
+};
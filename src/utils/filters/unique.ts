@@ -1,11 +1,13 @@
-export const unique = (input: string): string => {
+import type { FilterValue } from '../../types/types';
+
+export const uniqueValue = (input: FilterValue): FilterValue => {
 	try {
-		const parsed = JSON.parse(input);
+		const parsed = typeof input === 'string' ? JSON.parse(input) : input;
 
 		if (Array.isArray(parsed)) {
 			// For arrays of primitives, use Set
 			if (parsed.every(item => typeof item !== 'object')) {
-				return JSON.stringify([...new Set(parsed)]);
+				return [...new Set(parsed)];
 			}
 
 			// For arrays of objects, compare stringified versions
@@ -19,7 +21,7 @@ export const unique = (input: string): string => {
 				return true;
 			});
 
-			return JSON.stringify(uniqueArray);
+			return uniqueArray;
 		}
 
 		// For objects, remove duplicate values while keeping the last occurrence's key
@@ -35,7 +37,7 @@ export const unique = (input: string): string => {
 				return true;
 			}).reverse();
 
-			return JSON.stringify(Object.fromEntries(uniqueEntries));
+			return Object.fromEntries(uniqueEntries);
 		}
 
 		// If not an array or object, return unchanged
@@ -44,4 +46,9 @@ export const unique = (input: string): string => {
 		// If parsing fails, return unchanged
 		return input;
 	}
-}; 
\ No newline at end of file
+};
+
+export const unique = (input: string): string => {
+	const result = uniqueValue(input);
+	return typeof result === 'string' ? result : JSON.stringify(result);
+};
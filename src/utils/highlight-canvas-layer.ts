@@ -0,0 +1,347 @@
+// Canvas renderer for highlight overlays
+//
+// Every overlay is normally its own absolutely positioned element. On pages
+// with many highlights that adds thousands of nodes to the page, and every
+// style recalculation has to visit them. The canvas renderer keeps the overlay
+// elements out of the document: they are still created and indexed, so
+// selection, the widget and hit-testing work as before, but only the overlays
+// in the viewport are painted, into fixed viewport-sized canvases.
+//
+// Overlays on light and dark backgrounds blend differently (multiply and
+// screen), so each blend mode gets its own canvas. Pointer events still reach
+// the page; clicks and hovers on painted overlays are hit-tested in JS and
+// re-dispatched to the detached overlay elements.
+
+import type { OverlayRenderer } from './highlight-overlay-index';
+import {
+	areOverlaysShown,
+	findOverlaysAtPoint,
+	findOverlaysInRect,
+	getOverlayBox,
+	onOverlayIndexChange,
+	setOverlayRenderer
+} from './highlight-overlay-index';
+
+// Below this many highlights the DOM overlays are cheap enough, and stay pixel-exact
+export const CANVAS_RENDERER_MIN_HIGHLIGHTS = 200;
+
+const CANVAS_LAYER_CLASS = 'obsidian-highlight-canvas';
+const CANVAS_LAYER_DARK_CLASS = 'obsidian-highlight-canvas-dark';
+const DARK_OVERLAY_CLASS = 'obsidian-highlight-overlay-dark';
+const SELECTED_OVERLAY_CLASS = 'is-selected';
+const HOVERING_OVERLAY_CLASS = 'is-hovering';
+const BADGE_SELECTOR = '.obsidian-highlight-widget-badge';
+const HIGHLIGHTER_UI_SELECTOR = '.obsidian-highlighter-menu, .obsidian-highlight-widget, .obsidian-highlight-offset-handle';
+const OFFSET_HANDLE_DRAGGING_CLASS = 'obsidian-offset-handle-dragging';
+const DEFAULT_OVERLAY_FILL = 'rgba(255, 235, 0, 0.35)';
+const OVERLAY_RADIUS_PX = 4;
+const BADGE_OFFSET_PX = 11;
+const BADGE_RADIUS_PX = 9;
+// Selection rings and comment badges extend past the overlay box
+const PAINT_MARGIN_PX = BADGE_OFFSET_PX + 2;
+
+interface CanvasLayer {
+	canvas: HTMLCanvasElement;
+	context: CanvasRenderingContext2D;
+}
+
+let canvasSupported: boolean | null = null;
+let lightLayer: CanvasLayer | null = null;
+let darkLayer: CanvasLayer | null = null;
+let paintFrame: number | null = null;
+let hoveredOverlay: HTMLElement | null = null;
+let removeIndexListener: (() => void) | null = null;
+let bodyClassObserver: MutationObserver | null = null;
+
+function isCanvasSupported(): boolean {
+	if (canvasSupported === null) {
+		try {
+			canvasSupported = document.createElement('canvas').getContext('2d') !== null;
+		} catch {
+			canvasSupported = false;
+		}
+	}
+	return canvasSupported;
+}
+
+/**
+ * Picks the renderer for the next set of overlays, and adds or removes the
+ * canvas layer to match. Call before planning overlays.
+ */
+export function selectHighlightRenderer(highlightCount: number): OverlayRenderer {
+	const renderer: OverlayRenderer = highlightCount >= CANVAS_RENDERER_MIN_HIGHLIGHTS && isCanvasSupported()
+		? 'canvas'
+		: 'dom';
+	setOverlayRenderer(renderer);
+	if (renderer === 'canvas') {
+		attachCanvasLayer();
+	} else {
+		detachCanvasLayer();
+	}
+	return renderer;
+}
+
+/**
+ * Repaints the canvas layer on the next frame, e.g. after an overlay's
+ * selected or hover state changed.
+ */
+export function scheduleHighlightCanvasPaint(): void {
+	if (!lightLayer || paintFrame !== null) {
+		return;
+	}
+	paintFrame = window.requestAnimationFrame(paintCanvasLayer);
+}
+
+/**
+ * Finds the topmost painted overlay that would receive pointer events at
+ * viewport coordinates, as its element would with the DOM renderer. Returns
+ * null with the DOM renderer.
+ */
+export function findPaintedOverlayAtPoint(clientX: number, clientY: number): HTMLElement | null {
+	if (!lightLayer) {
+		return null;
+	}
+	const classList = document.body.classList;
+	// Overlays ignore pointer events in highlighter mode and while an offset handle is dragged
+	if (
+		classList.contains('obsidian-highlighter-active') ||
+		document.documentElement.classList.contains(OFFSET_HANDLE_DRAGGING_CLASS)
+	) {
+		return null;
+	}
+	const alwaysShow = classList.contains('obsidian-highlighter-always-show');
+	const matches = findOverlaysAtPoint(clientX, clientY);
+	for (let i = matches.length - 1; i >= 0; i--) {
+		const overlay = matches[i];
+		if (
+			alwaysShow ||
+			overlay.classList.contains(SELECTED_OVERLAY_CLASS) ||
+			overlay.classList.contains(HOVERING_OVERLAY_CLASS)
+		) {
+			return overlay;
+		}
+	}
+	return null;
+}
+
+// ==== Layer
+
+function createCanvasLayer(className: string): CanvasLayer | null {
+	const canvas = document.createElement('canvas');
+	canvas.className = className;
+	canvas.setAttribute('aria-hidden', 'true');
+	const context = canvas.getContext('2d');
+	if (!context) {
+		return null;
+	}
+	document.body.appendChild(canvas);
+	return { canvas, context };
+}
+
+function attachCanvasLayer(): void {
+	if (lightLayer) {
+		scheduleHighlightCanvasPaint();
+		return;
+	}
+
+	lightLayer = createCanvasLayer(CANVAS_LAYER_CLASS);
+	darkLayer = createCanvasLayer(`${CANVAS_LAYER_CLASS} ${CANVAS_LAYER_DARK_CLASS}`);
+	if (!lightLayer || !darkLayer) {
+		detachCanvasLayer();
+		setOverlayRenderer('dom');
+		return;
+	}
+
+	removeIndexListener = onOverlayIndexChange(scheduleHighlightCanvasPaint);
+	// Showing and hiding highlights is a class change on the body
+	bodyClassObserver = new MutationObserver(scheduleHighlightCanvasPaint);
+	bodyClassObserver.observe(document.body, { attributes: true, attributeFilter: ['class'] });
+	window.addEventListener('scroll', scheduleHighlightCanvasPaint, { passive: true });
+	window.addEventListener('resize', scheduleHighlightCanvasPaint);
+	document.addEventListener('click', handlePaintedOverlayPointer, true);
+	document.addEventListener('touchend', handlePaintedOverlayPointer, true);
+	document.addEventListener('mousemove', handlePaintedOverlayHover, true);
+	scheduleHighlightCanvasPaint();
+}
+
+function detachCanvasLayer(): void {
+	if (!lightLayer && !darkLayer) {
+		return;
+	}
+	[lightLayer, darkLayer].forEach(layer => layer?.canvas.remove());
+	lightLayer = null;
+	darkLayer = null;
+	if (paintFrame !== null) {
+		window.cancelAnimationFrame(paintFrame);
+		paintFrame = null;
+	}
+	removeIndexListener?.();
+	removeIndexListener = null;
+	bodyClassObserver?.disconnect();
+	bodyClassObserver = null;
+	window.removeEventListener('scroll', scheduleHighlightCanvasPaint);
+	window.removeEventListener('resize', scheduleHighlightCanvasPaint);
+	document.removeEventListener('click', handlePaintedOverlayPointer, true);
+	document.removeEventListener('touchend', handlePaintedOverlayPointer, true);
+	document.removeEventListener('mousemove', handlePaintedOverlayHover, true);
+	hoveredOverlay = null;
+}
+
+// ==== Painting
+
+function resizeCanvasLayer(layer: CanvasLayer, width: number, height: number, pixelRatio: number): void {
+	const { canvas, context } = layer;
+	const pixelWidth = Math.round(width * pixelRatio);
+	const pixelHeight = Math.round(height * pixelRatio);
+	if (canvas.width !== pixelWidth || canvas.height !== pixelHeight) {
+		canvas.width = pixelWidth;
+		canvas.height = pixelHeight;
+		canvas.style.width = `${width}px`;
+		canvas.style.height = `${height}px`;
+	}
+	context.setTransform(pixelRatio, 0, 0, pixelRatio, 0, 0);
+	context.clearRect(0, 0, width, height);
+}
+
+function paintCanvasLayer(): void {
+	paintFrame = null;
+	if (!lightLayer || !darkLayer) {
+		return;
+	}
+
+	const width = document.documentElement.clientWidth || window.innerWidth;
+	const height = document.documentElement.clientHeight || window.innerHeight;
+	const pixelRatio = window.devicePixelRatio || 1;
+	resizeCanvasLayer(lightLayer, width, height, pixelRatio);
+	resizeCanvasLayer(darkLayer, width, height, pixelRatio);
+
+	const scrollX = window.scrollX;
+	const scrollY = window.scrollY;
+	const showAll = areOverlaysShown();
+	const overlays = findOverlaysInRect({
+		left: scrollX - PAINT_MARGIN_PX,
+		top: scrollY - PAINT_MARGIN_PX,
+		right: scrollX + width + PAINT_MARGIN_PX,
+		bottom: scrollY + height + PAINT_MARGIN_PX
+	});
+
+	overlays.forEach((overlay) => {
+		// Selected overlays stay visible while other highlights are hidden
+		if (!showAll && !overlay.classList.contains(SELECTED_OVERLAY_CLASS)) {
+			return;
+		}
+		const box = getOverlayBox(overlay);
+		if (!box) {
+			return;
+		}
+		const isDark = overlay.classList.contains(DARK_OVERLAY_CLASS);
+		paintOverlay(
+			(isDark ? darkLayer! : lightLayer!).context,
+			overlay,
+			box.left - scrollX,
+			box.top - scrollY,
+			box.right - box.left,
+			box.bottom - box.top,
+			isDark
+		);
+	});
+}
+
+function traceRoundedRect(context: CanvasRenderingContext2D, x: number, y: number, width: number, height: number, radius: number): void {
+	const r = Math.max(0, Math.min(radius, width / 2, height / 2));
+	context.beginPath();
+	context.moveTo(x + r, y);
+	context.arcTo(x + width, y, x + width, y + height, r);
+	context.arcTo(x + width, y + height, x, y + height, r);
+	context.arcTo(x, y + height, x, y, r);
+	context.arcTo(x, y, x + width, y, r);
+	context.closePath();
+}
+
+// Mirrors the overlay styles in highlighter.scss
+function paintOverlay(
+	context: CanvasRenderingContext2D,
+	overlay: HTMLElement,
+	x: number,
+	y: number,
+	width: number,
+	height: number,
+	isDark: boolean
+): void {
+	traceRoundedRect(context, x, y, width, height, OVERLAY_RADIUS_PX);
+	context.fillStyle = overlay.style.backgroundColor || DEFAULT_OVERLAY_FILL;
+	context.fill();
+
+	context.lineWidth = 2;
+	if (overlay.classList.contains(SELECTED_OVERLAY_CLASS)) {
+		traceRoundedRect(context, x - 1, y - 1, width + 2, height + 2, OVERLAY_RADIUS_PX + 1);
+		context.strokeStyle = isDark ? 'rgba(255, 235, 0, 0.7)' : 'rgba(255, 235, 0, 0.95)';
+		context.stroke();
+		traceRoundedRect(context, x + 1, y + 1, width - 2, height - 2, OVERLAY_RADIUS_PX - 1);
+		context.strokeStyle = isDark ? 'rgba(255, 255, 255, 0.9)' : 'rgba(255, 255, 255, 0.95)';
+		context.stroke();
+	} else if (overlay.classList.contains(HOVERING_OVERLAY_CLASS)) {
+		traceRoundedRect(context, x + 1, y + 1, width - 2, height - 2, OVERLAY_RADIUS_PX - 1);
+		context.setLineDash([4, 3]);
+		context.strokeStyle = isDark ? 'rgba(255, 235, 0, 0.5)' : 'rgb(255, 235, 0)';
+		context.stroke();
+		context.setLineDash([]);
+	}
+
+	// The comment badge, without its icon
+	if (overlay.querySelector(BADGE_SELECTOR)) {
+		const centerX = x - BADGE_OFFSET_PX + BADGE_RADIUS_PX;
+		const centerY = y - BADGE_OFFSET_PX + BADGE_RADIUS_PX;
+		context.beginPath();
+		context.arc(centerX, centerY, BADGE_RADIUS_PX, 0, Math.PI * 2);
+		context.fillStyle = isDark ? 'rgba(29, 29, 34, 0.95)' : 'rgba(255, 255, 255, 0.95)';
+		context.fill();
+		context.lineWidth = 1;
+		context.strokeStyle = isDark ? 'rgba(255, 255, 255, 0.2)' : 'rgba(245, 140, 42, 0.55)';
+		context.stroke();
+		context.beginPath();
+		context.arc(centerX, centerY, 3, 0, Math.PI * 2);
+		context.fillStyle = isDark ? '#ffb15a' : '#f58c2a';
+		context.fill();
+	}
+}
+
+// ==== Pointer events
+
+function isHighlighterUiEvent(event: Event): boolean {
+	return event.target instanceof Element && event.target.closest(HIGHLIGHTER_UI_SELECTOR) !== null;
+}
+
+// Clicks on a painted overlay go to its element instead of the page
+function handlePaintedOverlayPointer(event: MouseEvent | TouchEvent): void {
+	if (isHighlighterUiEvent(event)) {
+		return;
+	}
+	const point = event instanceof MouseEvent ? event : event.changedTouches[0];
+	if (!point) {
+		return;
+	}
+	const overlay = findPaintedOverlayAtPoint(point.clientX, point.clientY);
+	if (!overlay) {
+		return;
+	}
+
+	event.stopPropagation();
+	event.preventDefault();
+	overlay.dispatchEvent(new MouseEvent('click', {
+		clientX: point.clientX,
+		clientY: point.clientY
+	}));
+}
+
+// Hover tooltips are mouseenter/mouseleave listeners on the overlay elements
+function handlePaintedOverlayHover(event: MouseEvent): void {
+	const overlay = isHighlighterUiEvent(event) ? null : findPaintedOverlayAtPoint(event.clientX, event.clientY);
+	if (overlay === hoveredOverlay) {
+		return;
+	}
+	const eventInit = { clientX: event.clientX, clientY: event.clientY };
+	hoveredOverlay?.dispatchEvent(new MouseEvent('mouseleave', eventInit));
+	hoveredOverlay = overlay;
+	overlay?.dispatchEvent(new MouseEvent('mouseenter', eventInit));
+}
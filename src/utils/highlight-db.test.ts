@@ -0,0 +1,139 @@
+import 'fake-indexeddb/auto';
+import { IDBFactory } from 'fake-indexeddb';
+import { describe, test, expect, vi, beforeEach, afterEach } from 'vitest';
+import type { TextHighlightData } from './highlighter';
+import type { HighlightsStorage } from './highlight-storage';
+
+function createHighlight(id: string, createdAt: number, color?: string): TextHighlightData {
+	return { id, type: 'text', xpath: '/p[1]', content: id, startOffset: 0, endOffset: 1, createdAt, color };
+}
+
+// A page with the given number of highlights, the last created at lastCreatedAt
+function createPage(url: string, count: number, lastCreatedAt: number): HighlightsStorage {
+	const highlights = Array.from({ length: count }, (_, i) => createHighlight(`${url}#${i}`, lastCreatedAt - count + 1 + i));
+	return { [url]: { url, highlights } };
+}
+
+describe('IndexedDB highlight index', () => {
+	// Imported per test, since the database connection is kept per module instance
+	let highlightDb: typeof import('./highlight-db');
+	// storage.local contents
+	let stored: Record<string, any>;
+
+	beforeEach(async () => {
+		vi.resetModules();
+		// A new, empty database for each test
+		vi.stubGlobal('indexedDB', new IDBFactory());
+		highlightDb = await import('./highlight-db');
+
+		stored = {};
+		const { storage } = await import('./__mocks__/webextension-polyfill');
+		vi.spyOn(storage.local, 'get').mockImplementation((async (keys: string | string[] | null) => {
+			const result: Record<string, any> = {};
+			for (const key of keys === null ? Object.keys(stored) : Array.isArray(keys) ? keys : [keys]) {
+				if (key in stored) result[key] = structuredClone(stored[key]);
+			}
+			return result;
+		}) as any);
+		vi.spyOn(storage.local, 'set').mockImplementation((async (items: Record<string, any>) => {
+			Object.assign(stored, structuredClone(items));
+		}) as any);
+	});
+
+	afterEach(() => {
+		vi.restoreAllMocks();
+		vi.unstubAllGlobals();
+	});
+
+	test('creates one record per highlight, in page order', () => {
+		const { page, highlights } = highlightDb.createHighlightRecords('https://example.com/a?ref=x', [
+			createHighlight('h1', 2000, 'yellow'),
+			null,
+			createHighlight('h2', 1000)
+		]);
+
+		expect(highlights.map(record => [record.id, record.position, record.createdAt, record.color])).toEqual([
+			['h1', 0, 2000, 'yellow'],
+			['h2', 2, 1000, undefined]
+		]);
+		expect(highlights[0]).toMatchObject({ url: 'https://example.com/a?ref=x', canonicalUrl: 'https://example.com/a', host: 'example.com' });
+		expect(page).toEqual({
+			url: 'https://example.com/a?ref=x',
+			canonicalUrl: 'https://example.com/a',
+			host: 'example.com',
+			annotationsCount: 2,
+			firstCreatedAt: 1000,
+			lastCreatedAt: 2000
+		});
+	});
+
+	test('creates no page record without highlights or a valid URL', () => {
+		expect(highlightDb.createHighlightRecords('https://example.com/a', []).page).toBeNull();
+		expect(highlightDb.createHighlightRecords('https://example.com/a', 'not a list').highlights).toEqual([]);
+
+		const invalid = highlightDb.createHighlightRecords('not a url', [createHighlight('h1', 1000)]);
+		expect(invalid.page).toBeNull();
+		expect(invalid.highlights).toHaveLength(1);
+	});
+
+	test('pages through the page list with offset and limit', async () => {
+		const db = await highlightDb.openHighlightDb();
+		await highlightDb.rebuildHighlightDb(db, {
+			...createPage('https://example.com/1', 1, 1000),
+			...createPage('https://example.com/2', 4, 2000),
+			...createPage('https://example.com/3', 2, 3000),
+			...createPage('https://example.com/4', 5, 4000),
+			...createPage('https://example.com/5', 3, 5000)
+		});
+
+		const urls = (pages: { url: string }[]) => pages.map(page => page.url.slice(-1));
+		expect(urls(await highlightDb.queryHighlightPages('recent', 0, 2))).toEqual(['5', '4']);
+		expect(urls(await highlightDb.queryHighlightPages('recent', 2, 2))).toEqual(['3', '2']);
+		expect(urls(await highlightDb.queryHighlightPages('recent', 4, 2))).toEqual(['1']);
+		expect(await highlightDb.queryHighlightPages('recent', 5, 2)).toEqual([]);
+		expect(await highlightDb.queryHighlightPages('recent', 0, 0)).toEqual([]);
+		expect(urls(await highlightDb.queryHighlightPages('mostAnnotated', 1, 3))).toEqual(['2', '5', '3']);
+		expect(await highlightDb.countHighlightPages()).toBe(5);
+		expect(await highlightDb.countHighlights()).toBe(15);
+	});
+
+	test('drops URLs removed from a shard', async () => {
+		const shard = {
+			...createPage('https://example.com/a', 2, 1000),
+			...createPage('https://example.com/a#section', 1, 2000)
+		};
+		await highlightDb.indexHighlightShard(shard, undefined);
+		expect(await highlightDb.countHighlightPages()).toBe(2);
+		expect(await highlightDb.countHighlights()).toBe(3);
+
+		const { ['https://example.com/a']: _removed, ...remaining } = shard;
+		await highlightDb.indexHighlightShard(remaining, shard);
+
+		const urls: string[] = [];
+		await highlightDb.iterateHighlights((record) => {
+			urls.push(record.url);
+		});
+		expect(urls).toEqual(['https://example.com/a#section']);
+		expect((await highlightDb.queryHighlightPages('recent', 0, 10)).map(page => page.url)).toEqual(['https://example.com/a#section']);
+
+		await highlightDb.indexHighlightShard(undefined, remaining);
+		expect(await highlightDb.countHighlightPages()).toBe(0);
+		expect(await highlightDb.countHighlights()).toBe(0);
+	});
+
+	test('rebuilds when the index has fallen behind the shards', async () => {
+		stored['highlights:https://example.com/a'] = createPage('https://example.com/a', 2, 1000);
+		// Opening the new database builds the index from the shards
+		expect(await highlightDb.reconcileHighlightDb()).toBe(false);
+		expect(await highlightDb.countHighlights()).toBe(2);
+
+		// Changes the background script didn't see
+		stored['highlights:https://example.com/a'] = createPage('https://example.com/a', 3, 1000);
+		stored['highlights:https://example.com/b'] = createPage('https://example.com/b', 1, 2000);
+
+		expect(await highlightDb.reconcileHighlightDb()).toBe(true);
+		expect(await highlightDb.countHighlightPages()).toBe(2);
+		expect(await highlightDb.countHighlights()).toBe(4);
+		expect(await highlightDb.reconcileHighlightDb()).toBe(false);
+	});
+});
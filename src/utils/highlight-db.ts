@@ -0,0 +1,305 @@
+import type { AnyHighlightData } from './highlighter';
+import { getCanonicalHighlightUrl, HighlightsStorage, loadAllHighlights } from './highlight-storage';
+import { normalizeHighlightCreatedAt } from './highlight-timestamp-utils';
+
+// IndexedDB index of stored highlights
+//
+// The per-page shards in storage.local (see highlight-storage.ts) stay the
+// source of truth: content scripts write them, and a content script's
+// IndexedDB belongs to the page, not the extension. The background script
+// mirrors every shard change into this database, which has the indexes that
+// storage.local lacks, so extension pages can list pages by recency or count,
+// or highlights by page, host, date or color, with cursors instead of reading
+// every shard.
+
+const DB_NAME = 'highlights';
+const DB_VERSION = 1;
+const PAGES_STORE = 'pages';
+const HIGHLIGHTS_STORE = 'highlights';
+
+// One record per stored URL, as in the shards
+export interface HighlightPageRecord {
+	url: string;
+	canonicalUrl: string;
+	host: string;
+	// Pages without highlights aren't stored
+	annotationsCount: number;
+	firstCreatedAt: number;
+	lastCreatedAt: number;
+}
+
+export interface HighlightRecord {
+	url: string;
+	// Index in the page's highlight list, which keeps records in page order
+	position: number;
+	canonicalUrl: string;
+	host: string;
+	id: string;
+	createdAt: number;
+	color?: string;
+	highlight: AnyHighlightData;
+}
+
+export type HighlightPageOrder = 'recent' | 'mostAnnotated';
+
+export type HighlightQueryIndex = 'canonicalUrl' | 'host' | 'createdAt' | 'color';
+
+let dbPromise: Promise<IDBDatabase> | null = null;
+
+function requestToPromise<T>(request: IDBRequest<T>): Promise<T> {
+	return new Promise((resolve, reject) => {
+		request.onsuccess = () => resolve(request.result);
+		request.onerror = () => reject(request.error);
+	});
+}
+
+function transactionDone(transaction: IDBTransaction): Promise<void> {
+	return new Promise((resolve, reject) => {
+		transaction.oncomplete = () => resolve();
+		transaction.onerror = () => reject(transaction.error);
+		transaction.onabort = () => reject(transaction.error || new Error('Transaction aborted'));
+	});
+}
+
+function parseUrl(url: string): URL | null {
+	try {
+		return new URL(url);
+	} catch (_error) {
+		return null;
+	}
+}
+
+/**
+ * Open the database, creating it and indexing the stored highlights the first time.
+ * Rejects where IndexedDB isn't available, e.g. some private windows.
+ */
+export function openHighlightDb(): Promise<IDBDatabase> {
+	if (!dbPromise) {
+		dbPromise = openDatabase().catch((error) => {
+			dbPromise = null;
+			throw error;
+		});
+	}
+	return dbPromise;
+}
+
+async function openDatabase(): Promise<IDBDatabase> {
+	if (typeof indexedDB === 'undefined') {
+		throw new Error('IndexedDB is not available');
+	}
+
+	let created = false;
+	const request = indexedDB.open(DB_NAME, DB_VERSION);
+	request.onupgradeneeded = (event) => {
+		const db = request.result;
+		if (event.oldVersion < 1) {
+			created = true;
+			const pages = db.createObjectStore(PAGES_STORE, { keyPath: 'url' });
+			pages.createIndex('canonicalUrl', 'canonicalUrl');
+			pages.createIndex('host', 'host');
+			pages.createIndex('recent', ['lastCreatedAt', 'annotationsCount']);
+			pages.createIndex('mostAnnotated', ['annotationsCount', 'lastCreatedAt']);
+
+			const highlights = db.createObjectStore(HIGHLIGHTS_STORE, { keyPath: ['url', 'position'] });
+			highlights.createIndex('canonicalUrl', 'canonicalUrl');
+			highlights.createIndex('host', 'host');
+			highlights.createIndex('createdAt', 'createdAt');
+			highlights.createIndex('color', 'color');
+		}
+	};
+	const db = await requestToPromise(request);
+
+	// Another context may upgrade the database; let it
+	db.onversionchange = () => {
+		db.close();
+		dbPromise = null;
+	};
+
+	if (created) {
+		await rebuildHighlightDb(db, await loadAllHighlights());
+	}
+	return db;
+}
+
+/**
+ * Build the page record and highlight records stored for one URL.
+ */
+export function createHighlightRecords(url: string, highlights: unknown): { page: HighlightPageRecord | null; highlights: HighlightRecord[] } {
+	const parsedUrl = parseUrl(url);
+	const canonicalUrl = getCanonicalHighlightUrl(url);
+	const host = parsedUrl ? parsedUrl.hostname : '';
+	const records: HighlightRecord[] = [];
+	let firstCreatedAt = Infinity;
+	let lastCreatedAt = -Infinity;
+	let annotationsCount = 0;
+
+	const list = Array.isArray(highlights) ? highlights : [];
+	list.forEach((highlight: AnyHighlightData, position) => {
+		if (!highlight || typeof highlight !== 'object') {
+			return;
+		}
+		const createdAt = normalizeHighlightCreatedAt(highlight.createdAt, highlight.id);
+		const record: HighlightRecord = { url, position, canonicalUrl, host, id: highlight.id, createdAt, highlight };
+		annotationsCount++;
+		firstCreatedAt = Math.min(firstCreatedAt, createdAt);
+		lastCreatedAt = Math.max(lastCreatedAt, createdAt);
+		if (typeof highlight.color === 'string') {
+			record.color = highlight.color;
+		}
+		records.push(record);
+	});
+
+	// The annotation browser can't list pages without a valid URL, but export still includes their highlights
+	const page = parsedUrl && annotationsCount > 0
+		? { url, canonicalUrl, host, annotationsCount, firstCreatedAt, lastCreatedAt }
+		: null;
+	return { page, highlights: records };
+}
+
+function writePage(transaction: IDBTransaction, url: string, highlights: unknown): void {
+	const pages = transaction.objectStore(PAGES_STORE);
+	const highlightStore = transaction.objectStore(HIGHLIGHTS_STORE);
+	const records = createHighlightRecords(url, highlights);
+
+	// Upper bound sorts after any [url, position]
+	highlightStore.delete(IDBKeyRange.bound([url], [url, []]));
+	for (const record of records.highlights) {
+		highlightStore.put(record);
+	}
+	if (records.page) {
+		pages.put(records.page);
+	} else {
+		pages.delete(url);
+	}
+}
+
+/**
+ * Replace the database contents with the given stored highlights.
+ */
+export async function rebuildHighlightDb(db: IDBDatabase, allHighlights: HighlightsStorage): Promise<void> {
+	const transaction = db.transaction([PAGES_STORE, HIGHLIGHTS_STORE], 'readwrite');
+	transaction.objectStore(PAGES_STORE).clear();
+	transaction.objectStore(HIGHLIGHTS_STORE).clear();
+	for (const [url, storedData] of Object.entries(allHighlights)) {
+		writePage(transaction, url, storedData?.highlights);
+	}
+	await transactionDone(transaction);
+}
+
+/**
+ * Mirror a change to one storage shard: index the URLs in the new value and
+ * drop those only in the old one.
+ */
+export async function indexHighlightShard(newShard: HighlightsStorage | undefined, oldShard: HighlightsStorage | undefined): Promise<void> {
+	const db = await openHighlightDb();
+	const transaction = db.transaction([PAGES_STORE, HIGHLIGHTS_STORE], 'readwrite');
+	const next = newShard || {};
+	for (const url of Object.keys(oldShard || {})) {
+		if (!(url in next)) {
+			writePage(transaction, url, []);
+		}
+	}
+	for (const [url, storedData] of Object.entries(next)) {
+		writePage(transaction, url, storedData?.highlights);
+	}
+	await transactionDone(transaction);
+}
+
+/**
+ * Rebuild the database if it doesn't match the storage shards, e.g. after the
+ * background script missed a storage change. Only the page and highlight
+ * counts are compared, which catches added and removed highlights.
+ * Returns whether the database was rebuilt.
+ */
+export async function reconcileHighlightDb(): Promise<boolean> {
+	const db = await openHighlightDb();
+	const allHighlights = await loadAllHighlights();
+	let pageCount = 0;
+	let highlightCount = 0;
+	for (const [url, storedData] of Object.entries(allHighlights)) {
+		const records = createHighlightRecords(url, storedData?.highlights);
+		if (records.page) {
+			pageCount++;
+		}
+		highlightCount += records.highlights.length;
+	}
+
+	const [indexedPages, indexedHighlights] = await Promise.all([countHighlightPages(), countHighlights()]);
+	if (indexedPages === pageCount && indexedHighlights === highlightCount) {
+		return false;
+	}
+	console.log(`Rebuilding highlight index: ${indexedPages} pages indexed, ${pageCount} stored`);
+	await rebuildHighlightDb(db, allHighlights);
+	return true;
+}
+
+export async function countHighlightPages(): Promise<number> {
+	const db = await openHighlightDb();
+	return requestToPromise(db.transaction(PAGES_STORE).objectStore(PAGES_STORE).count());
+}
+
+export async function countHighlights(): Promise<number> {
+	const db = await openHighlightDb();
+	return requestToPromise(db.transaction(HIGHLIGHTS_STORE).objectStore(HIGHLIGHTS_STORE).count());
+}
+
+/**
+ * Read one page of the page list, most recent or most annotated first.
+ */
+export async function queryHighlightPages(order: HighlightPageOrder, offset: number, limit: number): Promise<HighlightPageRecord[]> {
+	const db = await openHighlightDb();
+	const index = db.transaction(PAGES_STORE).objectStore(PAGES_STORE).index(order);
+	const pages: HighlightPageRecord[] = [];
+	if (limit <= 0) {
+		return pages;
+	}
+
+	return new Promise((resolve, reject) => {
+		const request = index.openCursor(null, 'prev');
+		let skipped = offset <= 0;
+		request.onerror = () => reject(request.error);
+		request.onsuccess = () => {
+			const cursor = request.result;
+			if (!cursor) {
+				resolve(pages);
+				return;
+			}
+			if (!skipped) {
+				skipped = true;
+				cursor.advance(offset);
+				return;
+			}
+			pages.push(cursor.value);
+			if (pages.length >= limit) {
+				resolve(pages);
+				return;
+			}
+			cursor.continue();
+		};
+	});
+}
+
+/**
+ * Visit highlight records in page order, grouped by URL, or only those
+ * matching a value of one of the indexes. Return false from the callback to stop.
+ */
+export async function iterateHighlights(
+	callback: (record: HighlightRecord) => boolean | void,
+	query?: { index: HighlightQueryIndex; value: IDBValidKey | IDBKeyRange }
+): Promise<void> {
+	const db = await openHighlightDb();
+	const store = db.transaction(HIGHLIGHTS_STORE).objectStore(HIGHLIGHTS_STORE);
+	const request = query ? store.index(query.index).openCursor(query.value) : store.openCursor();
+
+	return new Promise((resolve, reject) => {
+		request.onerror = () => reject(request.error);
+		request.onsuccess = () => {
+			const cursor = request.result;
+			if (!cursor || callback(cursor.value) === false) {
+				resolve();
+				return;
+			}
+			cursor.continue();
+		};
+	});
+}
@@ -0,0 +1,41 @@
+import { describe, expect, test } from 'vitest';
+import type { TextHighlightData } from './highlighter';
+import { getHighlightMarkdown, getHighlightMarkdownStamp, withHighlightMarkdown } from './highlight-markdown';
+
+const url = 'https://example.com/article';
+
+function textHighlight(content: string): TextHighlightData {
+	return {
+		id: '1700000000000',
+		type: 'text',
+		xpath: '/html/body/p[1]',
+		content,
+		startOffset: 0,
+		endOffset: content.length
+	};
+}
+
+describe('Highlight markdown stamps', () => {
+	test('change with the content and the page', () => {
+		const stamp = getHighlightMarkdownStamp(textHighlight('<p>a</p>'), url);
+		expect(getHighlightMarkdownStamp(textHighlight('<p>a</p>'), url)).toBe(stamp);
+		expect(getHighlightMarkdownStamp(textHighlight('<p>b</p>'), url)).not.toBe(stamp);
+		expect(getHighlightMarkdownStamp(textHighlight('<p>a</p>'), 'https://example.com/other')).not.toBe(stamp);
+		expect(getHighlightMarkdownStamp(textHighlight('<p>a</p>'), 'https://example.org/article')).not.toBe(stamp);
+	});
+
+	test('ignore the hash of the page URL but not the query', () => {
+		const stamp = getHighlightMarkdownStamp(textHighlight('<p>a</p>'), url);
+		expect(getHighlightMarkdownStamp(textHighlight('<p>a</p>'), `${url}#comments`)).toBe(stamp);
+		// Links like '?page=2' resolve differently
+		expect(getHighlightMarkdownStamp(textHighlight('<p>a</p>'), `${url}?page=1`)).not.toBe(stamp);
+	});
+
+	test('stored markdown is used while the stamp matches', () => {
+		const highlight = textHighlight('<p><strong>a</strong></p>');
+		const stored = { ...highlight, markdown: '**a**', markdownStamp: getHighlightMarkdownStamp(highlight, url) };
+
+		expect(getHighlightMarkdown(stored, url)).toBe('**a**');
+		expect(withHighlightMarkdown(stored, url)).toBe(stored);
+	});
+});
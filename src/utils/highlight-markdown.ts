@@ -0,0 +1,55 @@
+import type { AnyHighlightData } from './highlighter';
+import { createMarkdownContent, MARKDOWN_CONVERTER_VERSION } from './markdown-converter';
+import { hashKey } from './cache';
+
+// Highlights store a markdown rendition of their content, made when the
+// highlight is created or edited, so the popup doesn't convert every highlight
+// each time it opens. The stamp records the converter version and what the
+// markdown was made from; a highlight with a different stamp is stale.
+// The URL is stamped without its hash, which is the part relative links
+// (including '?page=2' and '#ref') resolve against, so visits that only
+// differ in the hash reuse it.
+
+function getUrlBase(url: string): string {
+	try {
+		const parsedUrl = new URL(url);
+		parsedUrl.hash = '';
+		return parsedUrl.href;
+	} catch (_error) {
+		return url;
+	}
+}
+
+/**
+ * Stamp for markdown converted from this highlight's content on the given page.
+ */
+export function getHighlightMarkdownStamp(highlight: AnyHighlightData, url: string): string {
+	return `${MARKDOWN_CONVERTER_VERSION}:${hashKey(getUrlBase(url), highlight.content)}`;
+}
+
+/**
+ * Get the highlight's markdown, converting only if the stored rendition is missing or stale.
+ */
+export function getHighlightMarkdown(highlight: AnyHighlightData, url: string): string {
+	if (typeof highlight.markdown === 'string' && highlight.markdownStamp === getHighlightMarkdownStamp(highlight, url)) {
+		return highlight.markdown;
+	}
+	return createMarkdownContent(highlight.content, url);
+}
+
+/**
+ * Return the highlight with an up-to-date markdown rendition.
+ * Highlights that already have one are returned unchanged.
+ */
+export function withHighlightMarkdown<T extends AnyHighlightData>(highlight: T, url: string): T {
+	const markdownStamp = getHighlightMarkdownStamp(highlight, url);
+	if (typeof highlight.markdown === 'string' && highlight.markdownStamp === markdownStamp) {
+		return highlight;
+	}
+	try {
+		return { ...highlight, markdown: createMarkdownContent(highlight.content, url), markdownStamp };
+	} catch (error) {
+		console.error('Failed to convert highlight to markdown:', error);
+		return highlight;
+	}
+}
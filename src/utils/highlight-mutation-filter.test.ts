@@ -0,0 +1,79 @@
+// @vitest-environment jsdom
+import { describe, test, expect, beforeEach, afterEach } from 'vitest';
+import { HighlightAncestryIndex } from './highlight-mutation-filter';
+
+describe('HighlightAncestryIndex', () => {
+	let observer: MutationObserver;
+	let index: HighlightAncestryIndex;
+
+	// Mutation records for changes made by the callback
+	function recordsFor(change: () => void): MutationRecord[] {
+		observer.takeRecords();
+		change();
+		return observer.takeRecords();
+	}
+
+	function byId(id: string): HTMLElement {
+		return document.getElementById(id)!;
+	}
+
+	beforeEach(() => {
+		document.body.innerHTML = [
+			'<header id="header"><span id="logo"></span></header>',
+			'<main id="main"><article id="article"><p id="highlighted">text <em id="inner">here</em></p><p id="plain"><span id="note"></span></p></article></main>',
+			'<aside id="sidebar"><div id="widget"></div></aside>'
+		].join('');
+		observer = new MutationObserver(() => {});
+		observer.observe(document.body, { childList: true, subtree: true, attributes: true, attributeFilter: ['style', 'class'] });
+		index = new HighlightAncestryIndex();
+		index.rebuild([byId('highlighted')]);
+	});
+
+	afterEach(() => {
+		observer.disconnect();
+		document.body.removeAttribute('style');
+	});
+
+	test('keeps mutations in and above highlighted elements', () => {
+		const records = [
+			...recordsFor(() => byId('inner').appendChild(document.createElement('strong'))),
+			...recordsFor(() => byId('main').classList.add('wide')),
+			...recordsFor(() => byId('article').appendChild(document.createElement('p')))
+		];
+		expect(records.map(record => index.isRelevantMutation(record))).toEqual([true, true, true]);
+	});
+
+	test('keeps changes inside siblings of the highlighted path only before the last highlight', () => {
+		const before = [
+			...recordsFor(() => byId('logo').appendChild(document.createElement('img'))),
+			...recordsFor(() => { byId('logo').style.height = '120px'; })
+		];
+		const after = [
+			...recordsFor(() => byId('widget').appendChild(document.createElement('div'))),
+			...recordsFor(() => { byId('note').className = 'fading'; }),
+			...recordsFor(() => { byId('widget').style.transform = 'scale(1.1)'; })
+		];
+
+		expect(before.map(record => index.isRelevantMutation(record))).toEqual([true, true]);
+		expect(after.some(record => index.isRelevantMutation(record))).toBe(false);
+	});
+
+	test('keeps changes to siblings of the highlighted path after the last highlight', () => {
+		// In a flex row, collapsing the sidebar widens the article and re-wraps its lines
+		document.body.style.display = 'flex';
+		const records = [
+			...recordsFor(() => byId('sidebar').classList.add('collapsed')),
+			...recordsFor(() => { byId('sidebar').style.width = '0'; }),
+			...recordsFor(() => byId('sidebar').appendChild(document.createElement('div'))),
+			...recordsFor(() => { byId('plain').className = 'expanded'; })
+		];
+
+		expect(records.map(record => index.isRelevantMutation(record))).toEqual([true, true, true, true]);
+	});
+
+	test('drops everything without highlights', () => {
+		index.rebuild([]);
+		const records = recordsFor(() => byId('inner').appendChild(document.createElement('strong')));
+		expect(index.isRelevantMutation(records[0])).toBe(false);
+	});
+});
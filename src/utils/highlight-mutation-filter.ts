@@ -0,0 +1,93 @@
+// Which DOM mutations can move highlights
+//
+// Highlight overlays are positioned from their target elements, so they only
+// need to be updated when a mutation can change where a target is laid out.
+// Rather than inspecting every mutation on busy pages, relevance is decided
+// against an index of the highlight targets and their ancestors:
+//
+// - Mutations on a target, inside one, or on one of its ancestors are kept.
+// - Mutations on a sibling of the highlighted path, i.e. a direct child of an
+//   ancestor, are kept wherever the sibling is. In a flex or grid row, a
+//   sidebar after the article can still change the article's width, for
+//   example when it is collapsed.
+// - Mutations further inside those siblings are kept only if they come before
+//   a highlight in the document, since in normal flow only those can push it
+//   down. Animations and hover states inside sidebars, footers and feeds below
+//   the last highlight are dropped.
+
+export interface HighlightMutationStats {
+	/** Mutation records delivered to the observer */
+	seen: number;
+	/** Records that could move a highlight */
+	kept: number;
+	/** Overlay updates run because of kept records */
+	repaints: number;
+}
+
+export class HighlightAncestryIndex {
+	private targets = new Set<Element>();
+	// Strict ancestors of the targets, up to the document element
+	private ancestors = new Set<Element>();
+	// The target that comes last in the document
+	private lastTarget: Element | null = null;
+
+	get size(): number {
+		return this.targets.size;
+	}
+
+	rebuild(targets: Iterable<Element>): void {
+		this.targets.clear();
+		this.ancestors.clear();
+		this.lastTarget = null;
+
+		for (const target of targets) {
+			if (!target.isConnected) {
+				continue;
+			}
+			this.targets.add(target);
+			if (
+				!this.lastTarget ||
+				this.lastTarget.compareDocumentPosition(target) & Node.DOCUMENT_POSITION_FOLLOWING
+			) {
+				this.lastTarget = target;
+			}
+
+			let ancestor = target.parentElement;
+			// Stop at an ancestor already added by another target; its own ancestors are in the set too
+			while (ancestor && !this.ancestors.has(ancestor)) {
+				this.ancestors.add(ancestor);
+				ancestor = ancestor.parentElement;
+			}
+		}
+	}
+
+	/**
+	 * True when the mutation can change the layout of a highlight target.
+	 */
+	isRelevantMutation(mutation: MutationRecord): boolean {
+		const target = mutation.target;
+		if (this.targets.size === 0 || !(target instanceof Element)) {
+			return false;
+		}
+
+		// Walk up to where the mutation joins the highlighted part of the tree
+		let node: Element | null = target;
+		while (node && !this.targets.has(node) && !this.ancestors.has(node)) {
+			node = node.parentElement;
+		}
+		if (!node) {
+			// Outside the document, or in a subtree that was just removed
+			return false;
+		}
+		if (node === target || this.targets.has(node) || target.parentElement === node) {
+			return true;
+		}
+
+		return this.precedesLastTarget(target);
+	}
+
+	private precedesLastTarget(element: Element): boolean {
+		return this.lastTarget !== null &&
+			(element.compareDocumentPosition(this.lastTarget) & Node.DOCUMENT_POSITION_FOLLOWING) !== 0;
+	}
+}
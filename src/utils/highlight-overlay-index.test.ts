@@ -0,0 +1,104 @@
+// @vitest-environment jsdom
+import { describe, test, expect, afterEach } from 'vitest';
+import {
+	SpatialGrid,
+	clearOverlayIndex,
+	findOverlaysAtPoint,
+	getIndexedOverlays,
+	getOverlaysForHighlight,
+	indexOverlay,
+	setOverlayRenderer
+} from './highlight-overlay-index';
+import { selectHighlightRenderer } from './highlight-canvas-layer';
+
+function box(left: number, top: number, width: number, height: number) {
+	return { left, top, right: left + width, bottom: top + height };
+}
+
+describe('SpatialGrid', () => {
+	test('finds items containing a point, in insertion order', () => {
+		const grid = new SpatialGrid<string>(100);
+		grid.set('wide', box(0, 0, 500, 20));
+		grid.set('word', box(120, 5, 40, 10));
+		grid.set('below', box(0, 400, 100, 20));
+
+		expect(grid.queryPoint(130, 10)).toEqual(['wide', 'word']);
+		expect(grid.queryPoint(450, 10)).toEqual(['wide']);
+		expect(grid.queryPoint(50, 200)).toEqual([]);
+	});
+
+	test('moves and removes items', () => {
+		const grid = new SpatialGrid<string>(100);
+		grid.set('a', box(0, 0, 50, 50));
+		grid.set('b', box(10, 10, 10, 10));
+		grid.set('a', box(300, 300, 50, 50));
+
+		expect(grid.queryPoint(15, 15)).toEqual(['b']);
+		expect(grid.queryPoint(320, 320)).toEqual(['a']);
+		// Moving keeps the original order
+		grid.set('b', box(310, 310, 10, 10));
+		expect(grid.queryPoint(315, 315)).toEqual(['a', 'b']);
+
+		expect(grid.delete('a')).toBe(true);
+		expect(grid.queryPoint(320, 320)).toEqual([]);
+		expect(grid.size).toBe(1);
+	});
+
+	test('finds items intersecting a rect once', () => {
+		const grid = new SpatialGrid<string>(50);
+		grid.set('spans cells', box(0, 0, 200, 200));
+		grid.set('inside', box(60, 60, 10, 10));
+		grid.set('outside', box(500, 500, 10, 10));
+
+		expect(grid.queryRect(box(40, 40, 100, 100))).toEqual(['spans cells', 'inside']);
+	});
+});
+
+describe('overlay registry', () => {
+	function createOverlay(index: number, id?: string): HTMLElement {
+		const overlay = document.createElement('div');
+		overlay.dataset.highlightIndex = String(index);
+		if (id) {
+			overlay.dataset.highlightId = id;
+		}
+		return overlay;
+	}
+
+	afterEach(() => {
+		clearOverlayIndex();
+		setOverlayRenderer('dom');
+		document.body.innerHTML = '';
+	});
+
+	test('finds overlays by highlight id, falling back to the index', () => {
+		const first = createOverlay(0, 'a');
+		const second = createOverlay(0, 'a');
+		const other = createOverlay(1);
+		[first, second, other].forEach((overlay, i) => {
+			document.body.appendChild(overlay);
+			indexOverlay(overlay, box(0, i * 20, 100, 16));
+		});
+
+		expect(getOverlaysForHighlight('a', null)).toEqual([first, second]);
+		expect(getOverlaysForHighlight('missing', 1)).toEqual([other]);
+		expect(getOverlaysForHighlight(null, '0')).toEqual([first, second]);
+	});
+
+	test('only counts detached overlays with the canvas renderer', () => {
+		const overlay = createOverlay(0);
+		indexOverlay(overlay, box(10, 10, 50, 20));
+
+		expect(getIndexedOverlays()).toEqual([]);
+		expect(findOverlaysAtPoint(20, 20)).toEqual([]);
+
+		setOverlayRenderer('canvas');
+		expect(getIndexedOverlays()).toEqual([overlay]);
+		expect(findOverlaysAtPoint(20, 20)).toEqual([overlay]);
+	});
+
+	test('falls back to DOM overlays without canvas support', () => {
+		// jsdom has no 2D canvas context
+		expect(selectHighlightRenderer(10000)).toBe('dom');
+		expect(document.querySelector('canvas')).toBeNull();
+	});
+});
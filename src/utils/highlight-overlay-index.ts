@@ -0,0 +1,311 @@
+// Spatial index of highlight overlays
+//
+// Hover and click handling need the overlay under the pointer. Rather than
+// measuring every overlay on every event, each overlay's box is recorded in
+// document coordinates when it is planned or moved, in a uniform grid. A
+// point query then only looks at the overlays in one cell.
+//
+// The index is also the registry of overlays: with the canvas renderer the
+// overlay elements are never added to the document, so lookups by highlight go
+// through here rather than through DOM queries.
+
+export interface OverlayBox {
+	left: number;
+	top: number;
+	right: number;
+	bottom: number;
+}
+
+interface GridEntry {
+	box: OverlayBox;
+	cells: string[];
+	// Insertion order, so the most recently added of several matches can be picked
+	order: number;
+}
+
+const DEFAULT_CELL_SIZE = 128;
+
+export class SpatialGrid<T> {
+	private cells = new Map<string, Set<T>>();
+	private entries = new Map<T, GridEntry>();
+	private nextOrder = 0;
+
+	constructor(private cellSize: number = DEFAULT_CELL_SIZE) {}
+
+	get size(): number {
+		return this.entries.size;
+	}
+
+	/** Add an item, or move it if it's already indexed */
+	set(item: T, box: OverlayBox): void {
+		const existing = this.entries.get(item);
+		if (existing) {
+			this.removeFromCells(item, existing);
+		}
+
+		const cells = this.getCellKeys(box);
+		for (const key of cells) {
+			let cell = this.cells.get(key);
+			if (!cell) {
+				cell = new Set();
+				this.cells.set(key, cell);
+			}
+			cell.add(item);
+		}
+		this.entries.set(item, { box, cells, order: existing ? existing.order : this.nextOrder++ });
+	}
+
+	delete(item: T): boolean {
+		const entry = this.entries.get(item);
+		if (!entry) {
+			return false;
+		}
+		this.removeFromCells(item, entry);
+		this.entries.delete(item);
+		return true;
+	}
+
+	clear(): void {
+		this.cells.clear();
+		this.entries.clear();
+	}
+
+	getBox(item: T): OverlayBox | undefined {
+		return this.entries.get(item)?.box;
+	}
+
+	/** All items, in insertion order */
+	values(): T[] {
+		return Array.from(this.entries.keys());
+	}
+
+	/** Items whose box contains the point, in insertion order */
+	queryPoint(x: number, y: number): T[] {
+		const cell = this.cells.get(this.getCellKey(x, y));
+		if (!cell) {
+			return [];
+		}
+		const matches: T[] = [];
+		cell.forEach((item) => {
+			const box = this.entries.get(item)!.box;
+			if (x >= box.left && x <= box.right && y >= box.top && y <= box.bottom) {
+				matches.push(item);
+			}
+		});
+		return this.sortByOrder(matches);
+	}
+
+	/** Items whose box intersects the rect, in insertion order */
+	queryRect(rect: OverlayBox): T[] {
+		const matches = new Set<T>();
+		for (const key of this.getCellKeys(rect)) {
+			this.cells.get(key)?.forEach((item) => {
+				const box = this.entries.get(item)!.box;
+				if (box.left <= rect.right && box.right >= rect.left && box.top <= rect.bottom && box.bottom >= rect.top) {
+					matches.add(item);
+				}
+			});
+		}
+		return this.sortByOrder(Array.from(matches));
+	}
+
+	private sortByOrder(items: T[]): T[] {
+		return items.sort((a, b) => this.entries.get(a)!.order - this.entries.get(b)!.order);
+	}
+
+	private getCellKey(x: number, y: number): string {
+		return `${Math.floor(x / this.cellSize)},${Math.floor(y / this.cellSize)}`;
+	}
+
+	private getCellKeys(box: OverlayBox): string[] {
+		const keys: string[] = [];
+		const minX = Math.floor(box.left / this.cellSize);
+		const maxX = Math.floor(box.right / this.cellSize);
+		const minY = Math.floor(box.top / this.cellSize);
+		const maxY = Math.floor(box.bottom / this.cellSize);
+		for (let x = minX; x <= maxX; x++) {
+			for (let y = minY; y <= maxY; y++) {
+				keys.push(`${x},${y}`);
+			}
+		}
+		return keys;
+	}
+
+	private removeFromCells(item: T, entry: GridEntry): void {
+		for (const key of entry.cells) {
+			const cell = this.cells.get(key);
+			if (cell) {
+				cell.delete(item);
+				if (cell.size === 0) {
+					this.cells.delete(key);
+				}
+			}
+		}
+	}
+}
+
+// ==== Highlight overlays
+
+/**
+ * How overlays are drawn: as elements in the document, or painted into a canvas
+ * layer while the elements stay detached.
+ */
+export type OverlayRenderer = 'dom' | 'canvas';
+
+const overlayGrid = new SpatialGrid<HTMLElement>();
+// Overlays by highlight index and by highlight id, in the order they were created
+const overlaysByIndex = new Map<string, Set<HTMLElement>>();
+const overlaysById = new Map<string, Set<HTMLElement>>();
+const changeListeners = new Set<() => void>();
+let overlayRenderer: OverlayRenderer = 'dom';
+
+function addToGroup(groups: Map<string, Set<HTMLElement>>, key: string | undefined, overlay: HTMLElement): void {
+	if (!key) {
+		return;
+	}
+	let group = groups.get(key);
+	if (!group) {
+		group = new Set();
+		groups.set(key, group);
+	}
+	group.add(overlay);
+}
+
+function removeFromGroup(groups: Map<string, Set<HTMLElement>>, key: string | undefined, overlay: HTMLElement): void {
+	if (!key) {
+		return;
+	}
+	const group = groups.get(key);
+	if (group) {
+		group.delete(overlay);
+		if (group.size === 0) {
+			groups.delete(key);
+		}
+	}
+}
+
+function notifyOverlayIndexChange(): void {
+	changeListeners.forEach(listener => listener());
+}
+
+// Detached overlays only count while they are painted by the canvas renderer
+function isOverlayDrawn(overlay: HTMLElement): boolean {
+	return overlayRenderer === 'canvas' || overlay.isConnected;
+}
+
+// Overlays are display: none unless highlights are shown
+export function areOverlaysShown(): boolean {
+	const classList = document.body.classList;
+	return classList.contains('obsidian-highlighter-active') || classList.contains('obsidian-highlighter-always-show');
+}
+
+export function getOverlayRenderer(): OverlayRenderer {
+	return overlayRenderer;
+}
+
+export function setOverlayRenderer(renderer: OverlayRenderer): void {
+	overlayRenderer = renderer;
+}
+
+/**
+ * Calls the listener after overlays are indexed, moved or removed. Returns a function that removes it.
+ */
+export function onOverlayIndexChange(listener: () => void): () => void {
+	changeListeners.add(listener);
+	return () => {
+		changeListeners.delete(listener);
+	};
+}
+
+/**
+ * Record where an overlay is drawn, in document coordinates.
+ */
+export function indexOverlay(overlay: HTMLElement, box: OverlayBox): void {
+	overlayGrid.set(overlay, box);
+	addToGroup(overlaysByIndex, overlay.dataset.highlightIndex, overlay);
+	addToGroup(overlaysById, overlay.dataset.highlightId, overlay);
+	notifyOverlayIndexChange();
+}
+
+export function unindexOverlay(overlay: HTMLElement): void {
+	if (overlayGrid.delete(overlay)) {
+		removeFromGroup(overlaysByIndex, overlay.dataset.highlightIndex, overlay);
+		removeFromGroup(overlaysById, overlay.dataset.highlightId, overlay);
+		notifyOverlayIndexChange();
+	}
+}
+
+export function clearOverlayIndex(): void {
+	overlayGrid.clear();
+	overlaysByIndex.clear();
+	overlaysById.clear();
+	notifyOverlayIndexChange();
+}
+
+export function getOverlayBox(overlay: HTMLElement): OverlayBox | undefined {
+	return overlayGrid.getBox(overlay);
+}
+
+/**
+ * The overlay's rect in viewport coordinates. Detached overlays are measured
+ * from their indexed box.
+ */
+export function getOverlayClientRect(overlay: HTMLElement): DOMRect {
+	if (!overlay.isConnected) {
+		const box = overlayGrid.getBox(overlay);
+		if (box) {
+			return new DOMRect(box.left - window.scrollX, box.top - window.scrollY, box.right - box.left, box.bottom - box.top);
+		}
+	}
+	return overlay.getBoundingClientRect();
+}
+
+/**
+ * All drawn overlays, in the order they were created.
+ */
+export function getIndexedOverlays(): HTMLElement[] {
+	return overlayGrid.values().filter(isOverlayDrawn);
+}
+
+/**
+ * Drawn overlays of a highlight, in the order they were created. Matches by id
+ * when given, falling back to the index.
+ */
+export function getOverlaysForHighlight(highlightId: string | null, highlightIndex: string | number | null): HTMLElement[] {
+	if (highlightId) {
+		const matches = Array.from(overlaysById.get(highlightId) || []).filter(isOverlayDrawn);
+		if (matches.length > 0) {
+			return matches;
+		}
+	}
+	if (highlightIndex === null) {
+		return [];
+	}
+	return Array.from(overlaysByIndex.get(String(highlightIndex)) || []).filter(isOverlayDrawn);
+}
+
+/**
+ * Drawn overlays at viewport coordinates, shown or not, in the order they were drawn.
+ */
+export function findOverlaysAtPoint(clientX: number, clientY: number): HTMLElement[] {
+	return overlayGrid.queryPoint(clientX + window.scrollX, clientY + window.scrollY).filter(isOverlayDrawn);
+}
+
+/**
+ * Finds the topmost shown overlay at viewport coordinates.
+ */
+export function findOverlayAtPoint(clientX: number, clientY: number): HTMLElement | null {
+	if (!areOverlaysShown()) {
+		return null;
+	}
+	const matches = findOverlaysAtPoint(clientX, clientY);
+	// Later overlays are drawn on top
+	return matches.length > 0 ? matches[matches.length - 1] : null;
+}
+
+/**
+ * Finds overlays intersecting a rect in document coordinates, in the order they were drawn.
+ */
+export function findOverlaysInRect(rect: OverlayBox): HTMLElement[] {
+	return overlayGrid.queryRect(rect).filter(isOverlayDrawn);
+}
@@ -0,0 +1,106 @@
+import { describe, test, expect, vi, beforeEach, afterEach } from 'vitest';
+import type { TextHighlightData } from './highlighter';
+
+function createHighlight(id: string): TextHighlightData {
+	return { id, type: 'text', xpath: '/p[1]', content: id, startOffset: 0, endOffset: 1 };
+}
+
+describe('Sharded highlight storage', () => {
+	let stored: Record<string, any>;
+	// Imported per test, since migration runs once per module instance
+	let highlightStorage: typeof import('./highlight-storage');
+	let storage: typeof import('./__mocks__/webextension-polyfill').storage;
+
+	beforeEach(async () => {
+		vi.resetModules();
+		highlightStorage = await import('./highlight-storage');
+		({ storage } = await import('./__mocks__/webextension-polyfill'));
+		stored = {
+			highlights: {
+				'https://example.com/a': { url: 'https://example.com/a', highlights: [createHighlight('a1')] },
+				'https://example.com/a#section': { url: 'https://example.com/a#section', highlights: [createHighlight('a2')] },
+				'https://example.com/b': { url: 'https://example.com/b', highlights: [createHighlight('b1')] },
+			}
+		};
+		vi.spyOn(storage.local, 'get').mockImplementation((async (keys: string | string[] | null) => {
+			const result: Record<string, any> = {};
+			for (const key of keys === null ? Object.keys(stored) : Array.isArray(keys) ? keys : [keys]) {
+				if (key in stored) result[key] = structuredClone(stored[key]);
+			}
+			return result;
+		}) as any);
+		vi.spyOn(storage.local, 'set').mockImplementation((async (items: Record<string, any>) => {
+			Object.assign(stored, structuredClone(items));
+		}) as any);
+		vi.spyOn(storage.local, 'remove').mockImplementation((async (key: string) => {
+			delete stored[key];
+		}) as any);
+	});
+
+	afterEach(() => {
+		vi.restoreAllMocks();
+	});
+
+	test('canonical URLs drop the query and hash', () => {
+		expect(highlightStorage.getCanonicalHighlightUrl('https://example.com/a?ref=x#section')).toBe('https://example.com/a');
+		expect(highlightStorage.getCanonicalHighlightUrl('not a url')).toBe('not a url');
+	});
+
+	test('migrates the legacy key into one shard per page', async () => {
+		const page = await highlightStorage.loadPageHighlights('https://example.com/a?utm=1');
+
+		expect(Object.keys(page).sort()).toEqual(['https://example.com/a', 'https://example.com/a#section']);
+		expect(stored.highlights).toBeUndefined();
+		expect(Object.keys(stored).filter(highlightStorage.isHighlightShardKey).sort()).toEqual(['highlights:https://example.com/a', 'highlights:https://example.com/b']);
+		expect(Object.keys(await highlightStorage.loadAllHighlights()).length).toBe(3);
+	});
+
+	test('saving writes only the page shard', async () => {
+		await highlightStorage.loadPageHighlights('https://example.com/a');
+		const set = vi.mocked(storage.local.set);
+		set.mockClear();
+
+		await highlightStorage.savePageHighlights('https://example.com/b', [createHighlight('b1'), createHighlight('b2')]);
+
+		expect(set).toHaveBeenCalledTimes(1);
+		expect(Object.keys(set.mock.calls[0][0] as object)).toEqual(['highlights:https://example.com/b']);
+		expect(stored['highlights:https://example.com/b']['https://example.com/b'].highlights).toHaveLength(2);
+	});
+
+	test('removing the last highlights of a page drops its shard', async () => {
+		await highlightStorage.savePageHighlights('https://example.com/b', []);
+
+		expect(stored['highlights:https://example.com/b']).toBeUndefined();
+		expect(Object.keys(await highlightStorage.loadAllHighlights())).not.toContain('https://example.com/b');
+	});
+
+	test('lists pages first saved at the same time from different tabs', async () => {
+		await Promise.all([
+			highlightStorage.savePageHighlights('https://example.com/c', [createHighlight('c1')]),
+			highlightStorage.savePageHighlights('https://example.com/d', [createHighlight('d1')]),
+			highlightStorage.savePageHighlights('https://example.com/b', [])
+		]);
+
+		expect(Object.keys(await highlightStorage.loadAllHighlights()).sort()).toEqual([
+			'https://example.com/a',
+			'https://example.com/a#section',
+			'https://example.com/c',
+			'https://example.com/d'
+		]);
+	});
+
+	test('reads only the shards when the storage lists its keys', async () => {
+		await highlightStorage.loadPageHighlights('https://example.com/a');
+		stored.settings = { theme: 'dark' };
+		(storage.local as any).getKeys = async () => Object.keys(stored);
+		const get = vi.mocked(storage.local.get);
+		get.mockClear();
+
+		try {
+			expect(Object.keys(await highlightStorage.loadAllHighlights())).toHaveLength(3);
+			expect(get).toHaveBeenCalledWith(['highlights:https://example.com/a', 'highlights:https://example.com/b']);
+		} finally {
+			delete (storage.local as any).getKeys;
+		}
+	});
+});
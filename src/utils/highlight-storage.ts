@@ -0,0 +1,154 @@
+import browser from './browser-polyfill';
+import type { AnyHighlightData, StoredData } from './highlighter';
+
+// Highlight storage, sharded by page
+//
+// Highlights used to be stored under a single 'highlights' key holding every
+// annotated page, so each load and save read and wrote the whole library.
+// Now each page has its own key. The annotated pages are found from the key
+// prefix rather than a shared index, so saves from different tabs never
+// overwrite each other's changes.
+//
+// A shard holds the records for every URL of one canonical page (the URL
+// without query or hash), because highlights saved under decorated URLs are
+// shown together on the page. Records are still keyed by the exact URL they
+// were saved under.
+
+export type HighlightsStorage = Record<string, StoredData>;
+
+const LEGACY_STORAGE_KEY = 'highlights';
+const VERSION_STORAGE_KEY = 'highlightsStorageVersion';
+const SHARD_KEY_PREFIX = 'highlights:';
+const STORAGE_VERSION = 2;
+
+let migration: Promise<void> | null = null;
+
+/**
+ * The page a URL belongs to for highlights: the URL without query or hash.
+ */
+export function getCanonicalHighlightUrl(url: string): string {
+	try {
+		const parsedUrl = new URL(url);
+		parsedUrl.search = '';
+		parsedUrl.hash = '';
+		return parsedUrl.href;
+	} catch (_error) {
+		return url;
+	}
+}
+
+function getShardKey(canonicalUrl: string): string {
+	return SHARD_KEY_PREFIX + canonicalUrl;
+}
+
+export function isHighlightShardKey(key: string): boolean {
+	return key.startsWith(SHARD_KEY_PREFIX);
+}
+
+/**
+ * Move highlights from the single legacy key into per-page shards.
+ * Runs once per extension context; later calls wait for the first.
+ */
+export function migrateHighlightStorage(): Promise<void> {
+	if (!migration) {
+		migration = runMigration().catch((error) => {
+			migration = null;
+			throw error;
+		});
+	}
+	return migration;
+}
+
+async function runMigration(): Promise<void> {
+	const versionResult = await browser.storage.local.get(VERSION_STORAGE_KEY) as { [VERSION_STORAGE_KEY]?: number };
+	if ((versionResult[VERSION_STORAGE_KEY] ?? 0) >= STORAGE_VERSION) {
+		return;
+	}
+
+	const legacyResult = await browser.storage.local.get(LEGACY_STORAGE_KEY) as { [LEGACY_STORAGE_KEY]?: HighlightsStorage };
+	const legacyHighlights = legacyResult[LEGACY_STORAGE_KEY] || {};
+
+	const shards: { [shardKey: string]: HighlightsStorage } = {};
+	for (const [url, storedData] of Object.entries(legacyHighlights)) {
+		if (!storedData || !Array.isArray(storedData.highlights) || storedData.highlights.length === 0) {
+			continue;
+		}
+		const shardKey = getShardKey(getCanonicalHighlightUrl(url));
+		shards[shardKey] = shards[shardKey] || {};
+		shards[shardKey][url] = storedData;
+	}
+
+	// Merge with shards written by a context that already migrated
+	const existingShards = await browser.storage.local.get(Object.keys(shards)) as { [shardKey: string]: HighlightsStorage };
+	for (const shardKey of Object.keys(shards)) {
+		shards[shardKey] = { ...shards[shardKey], ...existingShards[shardKey] };
+	}
+
+	await browser.storage.local.set({
+		...shards,
+		[VERSION_STORAGE_KEY]: STORAGE_VERSION
+	});
+	await browser.storage.local.remove(LEGACY_STORAGE_KEY);
+	console.log(`Migrated highlights for ${Object.keys(legacyHighlights).length} pages to per-page storage`);
+}
+
+/**
+ * Load the stored records for every URL of the page the given URL belongs to.
+ */
+export async function loadPageHighlights(url: string): Promise<HighlightsStorage> {
+	await migrateHighlightStorage();
+	const shardKey = getShardKey(getCanonicalHighlightUrl(url));
+	const result = await browser.storage.local.get(shardKey) as { [shardKey: string]: HighlightsStorage };
+	return result[shardKey] || {};
+}
+
+/**
+ * Save the highlights for a URL, replacing its record. An empty list removes the record.
+ */
+export async function savePageHighlights(url: string, highlights: AnyHighlightData[]): Promise<void> {
+	await migrateHighlightStorage();
+	const shardKey = getShardKey(getCanonicalHighlightUrl(url));
+	const result = await browser.storage.local.get(shardKey) as { [shardKey: string]: HighlightsStorage };
+	const shard = result[shardKey] || {};
+
+	if (highlights.length > 0) {
+		shard[url] = { highlights, url };
+	} else {
+		delete shard[url];
+	}
+
+	if (Object.keys(shard).length === 0) {
+		await browser.storage.local.remove(shardKey);
+	} else {
+		await browser.storage.local.set({ [shardKey]: shard });
+	}
+}
+
+/**
+ * Load the records for every annotated page, e.g. for export.
+ */
+export async function loadAllHighlights(): Promise<HighlightsStorage> {
+	await migrateHighlightStorage();
+	const local = browser.storage.local as typeof browser.storage.local & { getKeys?: () => Promise<string[]> };
+
+	// Read only the shards where storage.local.getKeys is available (Chrome 130+),
+	// and everything otherwise
+	let shards: { [key: string]: unknown };
+	if (typeof local.getKeys === 'function') {
+		const shardKeys = (await local.getKeys()).filter(isHighlightShardKey);
+		if (shardKeys.length === 0) {
+			return {};
+		}
+		shards = await local.get(shardKeys);
+	} else {
+		shards = await local.get(null);
+	}
+
+	const allHighlights: HighlightsStorage = {};
+	for (const [key, shard] of Object.entries(shards)) {
+		if (isHighlightShardKey(key)) {
+			Object.assign(allHighlights, shard as HighlightsStorage);
+		}
+	}
+	return allHighlights;
+}
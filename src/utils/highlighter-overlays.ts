@@ -14,6 +14,19 @@ import {
 } from './highlighter';
 import browser from './browser-polyfill';
 import { throttle } from './throttle';
+import {
+	clearOverlayIndex,
+	findOverlayAtPoint,
+	getIndexedOverlays,
+	getOverlayBox,
+	getOverlayClientRect,
+	getOverlayRenderer,
+	getOverlaysForHighlight,
+	indexOverlay,
+	unindexOverlay
+} from './highlight-overlay-index';
+import { scheduleHighlightCanvasPaint } from './highlight-canvas-layer';
+import { HighlightAncestryIndex, HighlightMutationStats } from './highlight-mutation-filter';
 import { getElementByXPath, isDarkColor } from './dom-utils';
 import {
 	initializeHighlightWidget,
@@ -34,7 +47,6 @@ let lastHoverTarget: Element | null = null;
 
 const LINE_BY_LINE_OVERLAY_TAGS = ['P'];
 const SELECTED_OVERLAY_CLASS = 'is-selected';
-const OVERLAY_SELECTOR = '.obsidian-highlight-overlay';
 const HIGHLIGHT_SELECTION_MESSAGE = 'highlightSelectedInPage';
 const OFFSET_HANDLE_CLASS = 'obsidian-highlight-offset-handle';
 const OFFSET_HANDLE_SIZE_PX = 12;
@@ -173,6 +185,7 @@ function isHighlighterManagedElement(element: Element): boolean {
 	return (
 		element.id.startsWith('obsidian-highlight') ||
 		element.classList.contains('obsidian-highlight-overlay') ||
+		element.classList.contains('obsidian-highlight-canvas') ||
 		element.classList.contains(OFFSET_HANDLE_CLASS) ||
 		isHighlightWidgetElement(element) ||
 		element.classList.contains('obsidian-highlighter-menu') ||
@@ -207,20 +220,6 @@ function getEventPoint(event: MouseEvent | TouchEvent | Event): { clientX: numbe
 	return null;
 }
 
-// Finds the topmost highlight overlay at viewport coordinates.
-// Why: fallback path when event.target is not the overlay root (e.g. nested badge/icon).
-function findOverlayAtPoint(clientX: number, clientY: number): HTMLElement | null {
-	const overlays = Array.from(document.querySelectorAll('.obsidian-highlight-overlay')) as HTMLElement[];
-	for (let i = overlays.length - 1; i >= 0; i--) {
-		const overlay = overlays[i];
-		const rect = overlay.getBoundingClientRect();
-		if (clientX >= rect.left && clientX <= rect.right && clientY >= rect.top && clientY <= rect.bottom) {
-			return overlay;
-		}
-	}
-	return null;
-}
-
 // Resolves an overlay from event target first, then coordinate hit-test fallback.
 // Why: used by click/touch handlers and mouseup flow so widget open works reliably across DOM variations.
 function findOverlayFromEvent(event: MouseEvent | TouchEvent | Event): HTMLElement | null {
@@ -251,36 +250,18 @@ function notifyPanelSelection(highlightId: string): void {
 	});
 }
 
-function getMatchingOverlays(highlightId: string | null, highlightIndex: string | null): HTMLElement[] {
-	const overlays = Array.from(document.querySelectorAll(OVERLAY_SELECTOR)) as HTMLElement[];
-	let matches: HTMLElement[] = [];
-
-	if (highlightId) {
-		matches = overlays.filter((overlay) => overlay.dataset.highlightId === highlightId);
-		if (matches.length > 0) {
-			return matches.sort((a, b) => {
-				const aRect = a.getBoundingClientRect();
-				const bRect = b.getBoundingClientRect();
-				if (Math.abs(aRect.top - bRect.top) > 1) {
-					return aRect.top - bRect.top;
-				}
-				return aRect.left - bRect.left;
-			});
-		}
-	}
-
-	if (highlightIndex) {
-		matches = overlays.filter((overlay) => overlay.dataset.highlightIndex === highlightIndex);
+// Orders overlays in reading order, using the boxes recorded when they were drawn
+function compareOverlayPositions(a: HTMLElement, b: HTMLElement): number {
+	const aRect = getOverlayBox(a) || a.getBoundingClientRect();
+	const bRect = getOverlayBox(b) || b.getBoundingClientRect();
+	if (Math.abs(aRect.top - bRect.top) > 1) {
+		return aRect.top - bRect.top;
 	}
+	return aRect.left - bRect.left;
+}
 
-	return matches.sort((a, b) => {
-		const aRect = a.getBoundingClientRect();
-		const bRect = b.getBoundingClientRect();
-		if (Math.abs(aRect.top - bRect.top) > 1) {
-			return aRect.top - bRect.top;
-		}
-		return aRect.left - bRect.left;
-	});
+function getMatchingOverlays(highlightId: string | null, highlightIndex: string | null): HTMLElement[] {
+	return getOverlaysForHighlight(highlightId, highlightIndex || null).sort(compareOverlayPositions);
 }
 
 function resolveSelectedTextHighlight(): { highlight: TextHighlightData; target: Element } | null {
@@ -444,8 +425,8 @@ function updateOffsetHandles(): void {
 		return;
 	}
 
-	positionOffsetHandle(startHandle, startOverlay.getBoundingClientRect(), OFFSET_HANDLE_EDGE_START);
-	positionOffsetHandle(endHandle, endOverlay.getBoundingClientRect(), OFFSET_HANDLE_EDGE_END);
+	positionOffsetHandle(startHandle, getOverlayClientRect(startOverlay), OFFSET_HANDLE_EDGE_START);
+	positionOffsetHandle(endHandle, getOverlayClientRect(endOverlay), OFFSET_HANDLE_EDGE_END);
 }
 
 function applyNativeSelection(anchor: { node: Node; offset: number }, focus: { node: Node; offset: number }): void {
@@ -809,9 +790,7 @@ function beginOffsetHandleDrag(
 
 	// Disable pointer events on all overlays during drag so overlapping highlights
 	// cannot block caret hit-testing while resizing the selected highlight.
-	const overlaysForDrag = Array.from(
-		document.querySelectorAll(OVERLAY_SELECTOR)
-	) as HTMLElement[];
+	const overlaysForDrag = getIndexedOverlays();
 	const disabledOverlayPointerEvents = overlaysForDrag.map((overlay) => {
 		const value = overlay.style.pointerEvents;
 		overlay.style.pointerEvents = 'none';
@@ -914,10 +893,22 @@ function handleOffsetHandleMouseDown(event: MouseEvent): void {
 	beginOffsetHandleDrag(handle, edge, event.clientX, event.clientY, 'mouse', null);
 }
 
-function clearSelectedOverlays(): void {
-	document.querySelectorAll(`${OVERLAY_SELECTOR}.${SELECTED_OVERLAY_CLASS}`).forEach((overlay) => {
-		overlay.classList.remove(SELECTED_OVERLAY_CLASS);
+// Only touches overlays that have the class, as removing it still rewrites the attribute
+function removeClassFromOverlays(className: string): void {
+	let changed = false;
+	getIndexedOverlays().forEach((overlay) => {
+		if (overlay.classList.contains(className)) {
+			overlay.classList.remove(className);
+			changed = true;
+		}
 	});
+	if (changed) {
+		scheduleHighlightCanvasPaint();
+	}
+}
+
+function clearSelectedOverlays(): void {
+	removeClassFromOverlays(SELECTED_OVERLAY_CLASS);
 }
 
 function applySelectedOverlayState(): HTMLElement | null {
@@ -932,6 +923,7 @@ function applySelectedOverlayState(): HTMLElement | null {
 	matches.forEach((overlay) => {
 		overlay.classList.add(SELECTED_OVERLAY_CLASS);
 	});
+	scheduleHighlightCanvasPaint();
 
 	updateOffsetHandles();
 	return matches[0];
@@ -953,11 +945,7 @@ function selectOverlay(
 	}
 
 	if (options.scrollIntoView) {
-		primaryOverlay.scrollIntoView({
-			block: 'center',
-			inline: 'nearest',
-			behavior: 'auto'
-		});
+		scrollOverlayIntoView(primaryOverlay);
 	}
 
 	if (options.openWidget !== false) {
@@ -971,8 +959,30 @@ function selectOverlay(
 	return true;
 }
 
+// Painted overlays aren't in the document, so they're scrolled to by their box
+function scrollOverlayIntoView(overlay: HTMLElement): void {
+	if (overlay.isConnected) {
+		overlay.scrollIntoView({
+			block: 'center',
+			inline: 'nearest',
+			behavior: 'auto'
+		});
+		return;
+	}
+
+	const rect = getOverlayClientRect(overlay);
+	const left = rect.left < 0 || rect.right > window.innerWidth
+		? window.scrollX + rect.left
+		: window.scrollX;
+	window.scrollTo({
+		left,
+		top: window.scrollY + rect.top + rect.height / 2 - window.innerHeight / 2,
+		behavior: 'auto'
+	});
+}
+
 function ensureHighlightOverlaysPresent(): void {
-	if (document.querySelector(OVERLAY_SELECTOR) || highlights.length === 0) {
+	if (getIndexedOverlays().length > 0 || highlights.length === 0) {
 		return;
 	}
 
@@ -1106,7 +1116,7 @@ export function handleTouchMove(event: TouchEvent) {
 
 // Update event listeners for highlight overlays
 export function updateHighlightListeners() {
-	document.querySelectorAll('.obsidian-highlight-overlay').forEach(highlight => {
+	getIndexedOverlays().forEach(highlight => {
 		highlight.removeEventListener('click', handleHighlightClick);
 		highlight.removeEventListener('touchend', handleHighlightClick);
 		highlight.addEventListener('click', handleHighlightClick);
@@ -1156,61 +1166,51 @@ function calculateAverageLineHeight(rects: DOMRectList): number {
 	return sum / heights.length;
 }
 
-function processRangeForOverlayRects(
-	range: Range,
-	content: string,
-	existingOverlays: Element[],
-	index: number,
-	notes: string[] | undefined,
-	color: string | undefined,
-	highlightId: string,
-	createdAt: number | undefined,
-	targetElementForFallback: Element
-): void {
+// Rects for a range, split into text lines and taller boxes, each group merged separately
+function getRangeOverlayRectGroups(range: Range, targetElementForFallback: Element): DOMRect[][] {
 	const rects = range.getClientRects();
 
 	if (rects.length === 0) {
-		const rect = targetElementForFallback.getBoundingClientRect();
-		mergeHighlightOverlayRects([rect], content, existingOverlays, index, notes, color, highlightId, createdAt);
-		return;
+		return [[targetElementForFallback.getBoundingClientRect()]];
 	}
 
 	const averageLineHeight = calculateAverageLineHeight(rects);
 	const textRects = Array.from(rects).filter(rect => rect.height <= averageLineHeight * 1.5);
 	const complexRects = Array.from(rects).filter(rect => rect.height > averageLineHeight * 1.5);
 
+	const groups: DOMRect[][] = [];
 	if (textRects.length > 0) {
-		mergeHighlightOverlayRects(textRects, content, existingOverlays, index, notes, color, highlightId, createdAt);
+		groups.push(mergeOverlayRects(textRects));
 	}
 	if (complexRects.length > 0) {
-		mergeHighlightOverlayRects(complexRects, content, existingOverlays, index, notes, color, highlightId, createdAt);
+		groups.push(mergeOverlayRects(complexRects));
 	}
+	return groups;
 }
 
-// Plan out the overlay rectangles depending on the type of highlight
-export function planHighlightOverlayRects(target: Element, highlight: AnyHighlightData, index: number) {
-	const existingOverlays = Array.from(document.querySelectorAll(`.obsidian-highlight-overlay[data-highlight-index="${index}"]`));
+// Measure the overlay rectangles depending on the type of highlight, in viewport coordinates
+function getHighlightOverlayRectGroups(target: Element, highlight: AnyHighlightData): DOMRect[][] {
 	const tagName = target.tagName.toUpperCase(); // Get tagName early for P check
+	const getTargetRects = () => [[target.getBoundingClientRect()]];
 
 	if (highlight.type === 'complex' || highlight.type === 'element') {
 		if (LINE_BY_LINE_OVERLAY_TAGS.includes(tagName)) { // LINE_BY_LINE_OVERLAY_TAGS is now just ['P']
 			const range = document.createRange();
 			try {
 				range.selectNodeContents(target);
-				processRangeForOverlayRects(range, highlight.content, existingOverlays, index, highlight.notes, highlight.color, highlight.id, highlight.createdAt, target);
+				return getRangeOverlayRectGroups(range, target);
 			} catch (error) {
 				console.error('Error creating line-by-line highlight for element:', target, error);
-				const rect = target.getBoundingClientRect();
-				mergeHighlightOverlayRects([rect], highlight.content, existingOverlays, index, highlight.notes, highlight.color, highlight.id, highlight.createdAt);
+				return getTargetRects();
 			} finally {
 				range.detach();
 			}
-		} else {
-			// Original logic for other element/complex types (single box)
-			const rect = target.getBoundingClientRect();
-			mergeHighlightOverlayRects([rect], highlight.content, existingOverlays, index, highlight.notes, highlight.color, highlight.id, highlight.createdAt);
 		}
-	} else if (highlight.type === 'text') {
+		// Original logic for other element/complex types (single box)
+		return getTargetRects();
+	}
+
+	if (highlight.type === 'text') {
 		const range = document.createRange();
 		try {
 			const useCanonicalOffsets = shouldUseCanonicalOffsetDecoding(target, highlight.startOffset, highlight.endOffset);
@@ -1235,49 +1235,38 @@ export function planHighlightOverlayRects(target: Element, highlight: AnyHighlig
 						range.setEnd(endNodeResult.node, endNodeResult.node.textContent?.length || 0);
 					}
 
-					processRangeForOverlayRects(
-						range,
-						highlight.content,
-						existingOverlays,
-						index,
-						highlight.notes,
-						highlight.color,
-						highlight.id,
-						highlight.createdAt,
-						target
-					);
+					return getRangeOverlayRectGroups(range, target);
 				} catch (error) { // Catch errors from setStart/setEnd or processRange itself
 					console.warn('Error setting range or processing rects for text highlight:', error);
-					const rect = target.getBoundingClientRect();
-					mergeHighlightOverlayRects([rect], highlight.content, existingOverlays, index, highlight.notes, highlight.color, highlight.id, highlight.createdAt);
+					return getTargetRects();
 				}
-			} else {
-				// Fallback to element highlight if start/end nodes not found
-				console.warn('Could not find start/end node for text highlight, falling back to element bounds.');
-				const rect = target.getBoundingClientRect();
-				mergeHighlightOverlayRects([rect], highlight.content, existingOverlays, index, highlight.notes, highlight.color, highlight.id, highlight.createdAt);
 			}
+			// Fallback to element highlight if start/end nodes not found
+			console.warn('Could not find start/end node for text highlight, falling back to element bounds.');
+			return getTargetRects();
 		} catch (error) { // Outer catch for findTextNodeAtOffset or other unexpected issues
 			console.error('Error creating text highlight:', error);
-			const rect = target.getBoundingClientRect();
-			mergeHighlightOverlayRects([rect], highlight.content, existingOverlays, index, highlight.notes, highlight.color, highlight.id, highlight.createdAt);
+			return getTargetRects();
 		} finally {
 			range.detach();
 		}
 	}
+
+	return [];
+}
+
+// Plan out the overlay rectangles depending on the type of highlight
+export function planHighlightOverlayRects(target: Element, highlight: AnyHighlightData, index: number) {
+	const existingOverlays = getHighlightOverlayElements(index);
+	const groups = getHighlightOverlayRectGroups(target, highlight);
+	groups.forEach((rects) => {
+		createHighlightOverlayElements(rects, highlight, existingOverlays, index);
+	});
+	trackHighlightTarget(target, index);
 }
 
 // Merge a set of rectangles, to avoid adjacent and overlapping highlights where possible
-function mergeHighlightOverlayRects(
-	rects: DOMRect[],
-	content: string,
-	existingOverlays: Element[],
-	index: number,
-	notes?: string[],
-	color?: string,
-	highlightId?: string,
-	createdAt?: number
-) {
+function mergeOverlayRects(rects: DOMRect[]): DOMRect[] {
 	let mergedRects: DOMRect[] = [];
 	let currentRect: DOMRect | null = null;
 
@@ -1296,10 +1285,19 @@ function mergeHighlightOverlayRects(
 	if (currentRect) {
 		mergedRects.push(currentRect);
 	}
+	return mergedRects;
+}
 
-	mergedRects.forEach((rect, rectIndex) => {
+function createHighlightOverlayElements(
+	rects: DOMRect[],
+	highlight: AnyHighlightData,
+	existingOverlays: Element[],
+	index: number
+) {
+	const { content, notes, color, id: highlightId, createdAt } = highlight;
+	rects.forEach((rect, rectIndex) => {
 		const isDuplicate = existingOverlays.some(overlay => {
-			const overlayRect = overlay.getBoundingClientRect();
+			const overlayRect = getOverlayClientRect(overlay as HTMLElement);
 			return (
 				Math.abs(rect.left - overlayRect.left) < 1 &&
 				Math.abs(rect.top - overlayRect.top) < 1 &&
@@ -1341,8 +1339,16 @@ function createHighlightOverlayElement(
 	
 	overlay.style.position = 'absolute';
 
-	overlay.style.left = `${rect.left + window.scrollX - 2}px`;
-	overlay.style.top = `${rect.top + window.scrollY - 2}px`;
+	const origin = { left: rect.left + window.scrollX - 2, top: rect.top + window.scrollY - 2 };
+	overlayOrigins.set(overlay, origin);
+	indexOverlay(overlay, {
+		left: origin.left,
+		top: origin.top,
+		right: origin.left + rect.width + 4,
+		bottom: origin.top + rect.height + 4
+	});
+	overlay.style.left = `${origin.left}px`;
+	overlay.style.top = `${origin.top}px`;
 	overlay.style.width = `${rect.width + 4}px`;
 	overlay.style.height = `${rect.height + 4}px`;
 	
@@ -1371,7 +1377,10 @@ function createHighlightOverlayElement(
 	
 	overlay.addEventListener('click', handleHighlightClick);
 	overlay.addEventListener('touchend', handleHighlightClick);
-	document.body.appendChild(overlay);
+	// The canvas renderer paints overlays from the index instead
+	if (getOverlayRenderer() === 'dom') {
+		document.body.appendChild(overlay);
+	}
 }
 
 // Helper function to get the effective background color
@@ -1389,16 +1398,171 @@ function getEffectiveBackgroundColor(element: HTMLElement): string {
 	return 'rgb(255, 255, 255)';
 }
 
-// Update positions of all highlight overlays
+// ==== Viewport tracking
+//
+// Overlays are positioned in document coordinates, so they only need to move
+// when the layout changes. Highlight targets are tracked with an
+// IntersectionObserver: updates only measure highlights near the viewport,
+// and mark the rest stale to be measured when they scroll into view. Existing
+// overlays are moved with a transform rather than rebuilt, unless the number
+// of lines changed.
+
+const VIEWPORT_MARGIN_PX = 200;
+
+// Highlight indexes by target element, and the element each index is drawn on
+const highlightIndexesByTarget = new Map<Element, Set<number>>();
+const highlightTargetsByIndex = new Map<number, Element>();
+const visibleHighlightTargets = new Set<Element>();
+// Highlights whose layout may have changed while out of view
+const staleHighlightIndexes = new Set<number>();
+// Where each overlay was created, in document coordinates
+const overlayOrigins = new WeakMap<HTMLElement, { left: number; top: number }>();
+let viewportObserver: IntersectionObserver | null = null;
+// Highlight targets and their ancestors, for filtering mutations; rebuilt when targets change
+const highlightAncestry = new HighlightAncestryIndex();
+let highlightAncestryStale = true;
+
+function getViewportObserver(): IntersectionObserver | null {
+	if (!viewportObserver && typeof IntersectionObserver !== 'undefined') {
+		viewportObserver = new IntersectionObserver(handleViewportChanges, {
+			rootMargin: `${VIEWPORT_MARGIN_PX}px 0px`
+		});
+	}
+	return viewportObserver;
+}
+
+function handleViewportChanges(entries: IntersectionObserverEntry[]) {
+	let repositioned = false;
+	for (const entry of entries) {
+		if (!entry.isIntersecting) {
+			visibleHighlightTargets.delete(entry.target);
+			continue;
+		}
+		visibleHighlightTargets.add(entry.target);
+		for (const index of highlightIndexesByTarget.get(entry.target) || []) {
+			if (staleHighlightIndexes.delete(index)) {
+				repositionHighlightOverlays(index);
+				repositioned = true;
+			}
+		}
+	}
+	if (repositioned) {
+		applySelectedOverlayState();
+		syncHighlightWidgetPosition();
+	}
+}
+
+function trackHighlightTarget(target: Element, index: number) {
+	const previousTarget = highlightTargetsByIndex.get(index);
+	if (previousTarget === target) {
+		return;
+	}
+	if (previousTarget) {
+		untrackHighlightTarget(previousTarget, index);
+	}
+
+	highlightTargetsByIndex.set(index, target);
+	let indexes = highlightIndexesByTarget.get(target);
+	if (!indexes) {
+		indexes = new Set();
+		highlightIndexesByTarget.set(target, indexes);
+		const observer = getViewportObserver();
+		if (observer) {
+			observer.observe(target);
+		} else {
+			// Without IntersectionObserver every highlight counts as visible
+			visibleHighlightTargets.add(target);
+		}
+	}
+	indexes.add(index);
+	highlightAncestryStale = true;
+}
+
+function untrackHighlightTarget(target: Element, index: number) {
+	const indexes = highlightIndexesByTarget.get(target);
+	if (!indexes) {
+		return;
+	}
+	indexes.delete(index);
+	if (indexes.size === 0) {
+		highlightIndexesByTarget.delete(target);
+		visibleHighlightTargets.delete(target);
+		viewportObserver?.unobserve(target);
+		highlightAncestryStale = true;
+	}
+}
+
+function resetHighlightTracking() {
+	viewportObserver?.disconnect();
+	highlightIndexesByTarget.clear();
+	highlightTargetsByIndex.clear();
+	visibleHighlightTargets.clear();
+	staleHighlightIndexes.clear();
+	highlightAncestryStale = true;
+}
+
+function getHighlightOverlayElements(index: number): HTMLElement[] {
+	return getOverlaysForHighlight(null, index);
+}
+
+// Move a highlight's overlays to its current layout, rebuilding them only if the line count changed
+function repositionHighlightOverlays(index: number) {
+	const highlight = highlights[index];
+	const target = highlight ? highlightTargetsByIndex.get(index) : undefined;
+	if (!highlight || !target) {
+		return;
+	}
+
+	const groups = getHighlightOverlayRectGroups(target, highlight);
+	const rects = ([] as DOMRect[]).concat(...groups);
+	const overlays = getHighlightOverlayElements(index);
+	const origins = overlays.map(overlay => overlayOrigins.get(overlay));
+	if (overlays.length !== rects.length || origins.some(origin => !origin)) {
+		removeExistingHighlightOverlays(index);
+		groups.forEach((groupRects) => {
+			createHighlightOverlayElements(groupRects, highlight, [], index);
+		});
+		return;
+	}
+
+	rects.forEach((rect, rectIndex) => {
+		const overlay = overlays[rectIndex];
+		const origin = origins[rectIndex]!;
+		const left = rect.left + window.scrollX - 2;
+		const top = rect.top + window.scrollY - 2;
+		overlay.style.transform = (left === origin.left && top === origin.top)
+			? ''
+			: `translate(${left - origin.left}px, ${top - origin.top}px)`;
+		overlay.style.width = `${rect.width + 4}px`;
+		overlay.style.height = `${rect.height + 4}px`;
+		indexOverlay(overlay, { left, top, right: left + rect.width + 4, bottom: top + rect.height + 4 });
+	});
+}
+
+// Update positions of highlight overlays near the viewport, and mark the rest stale
 function updateHighlightOverlayPositions() {
 	highlights.forEach((highlight, index) => {
-		const target = getElementByXPath(highlight.xpath);
-		if (target) {
-			const existingOverlays = document.querySelectorAll(`.obsidian-highlight-overlay[data-highlight-index="${index}"]`);
-			if (existingOverlays.length > 0) {
-				removeExistingHighlightOverlays(index);
+		let target = highlightTargetsByIndex.get(index);
+		if (!target || !target.isConnected) {
+			// The page replaced the element; draw the highlight on its replacement
+			const newTarget = getElementByXPath(highlight.xpath);
+			if (!newTarget) {
+				return;
 			}
-			planHighlightOverlayRects(target, highlight, index);
+			if (target) {
+				untrackHighlightTarget(target, index);
+				highlightTargetsByIndex.delete(index);
+			}
+			removeExistingHighlightOverlays(index);
+			planHighlightOverlayRects(newTarget, highlight, index);
+			target = newTarget;
+		}
+
+		if (visibleHighlightTargets.has(target)) {
+			staleHighlightIndexes.delete(index);
+			repositionHighlightOverlays(index);
+		} else {
+			staleHighlightIndexes.add(index);
 		}
 	});
 	applySelectedOverlayState();
@@ -1410,11 +1574,18 @@ function removeExistingHighlightOverlays(index: number) {
 	// Intentionally does not close the action menu.
 	// Mutation-driven reflows (notably on GitHub) would otherwise dismiss the editor while typing.
 	// The menu is re-anchored in `syncHighlightWidgetPosition()` after repaint.
-	document.querySelectorAll(`.obsidian-highlight-overlay[data-highlight-index="${index}"]`).forEach(el => el.remove());
+	getHighlightOverlayElements(index).forEach((el) => {
+		unindexOverlay(el);
+		el.remove();
+	});
 }
 
 const throttledUpdateHighlights = throttle(() => {
 	if (!isApplyingHighlights) {
+		if (isMutationUpdatePending) {
+			isMutationUpdatePending = false;
+			mutationStats.repaints++;
+		}
 		updateHighlightOverlayPositions();
 	}
 }, 100);
@@ -1423,30 +1594,103 @@ window.addEventListener('resize', throttledUpdateHighlights);
 window.addEventListener('scroll', throttledUpdateHighlights);
 // Keep the action menu stable during viewport/system transitions (e.g. screenshot shortcut overlays).
 
-const observer = new MutationObserver((mutations) => {
-	if (!isApplyingHighlights) {
-		const shouldUpdate = mutations.some(mutation =>
-			(mutation.type === 'childList' && (() => {
-				if (!(mutation.target instanceof Element)) {
-					return false;
-				}
+// ==== Mutation filtering
+//
+// Mutation records are queued and checked when the page is idle, against the
+// highlight targets rather than the whole page (see highlight-mutation-filter.ts).
 
-				// Avoid repaint loops from our own overlays/menu being inserted/updated.
-				if (isChildListMutationOnlyHighlighterManaged(mutation)) {
-					return false;
-				}
+const MUTATION_IDLE_TIMEOUT_MS = 100;
+const MUTATION_FALLBACK_DELAY_MS = 16;
+
+const mutationStats: HighlightMutationStats = { seen: 0, kept: 0, repaints: 0 };
+let pendingMutations: MutationRecord[] = [];
+let isMutationCheckScheduled = false;
+// Set when kept mutations asked for an update that hasn't run yet
+let isMutationUpdatePending = false;
+
+function getHighlightAncestry(): HighlightAncestryIndex {
+	if (highlightAncestryStale) {
+		highlightAncestry.rebuild(highlightIndexesByTarget.keys());
+		highlightAncestryStale = false;
+	}
+	return highlightAncestry;
+}
+
+function isRelevantHighlightMutation(mutation: MutationRecord, isWaitingForTargets: boolean): boolean {
+	if (mutation.type === 'childList') {
+		if (!(mutation.target instanceof Element)) {
+			return false;
+		}
+		// Highlights whose target isn't in the page yet may be drawn once elements are added
+		if (!isWaitingForTargets && !getHighlightAncestry().isRelevantMutation(mutation)) {
+			return false;
+		}
+		// Avoid repaint loops from our own overlays/menu being inserted/updated.
+		return !isChildListMutationOnlyHighlighterManaged(mutation) && !isHighlighterManagedElement(mutation.target);
+	}
+
+	return mutation.target instanceof Element &&
+		getHighlightAncestry().isRelevantMutation(mutation) &&
+		!isHighlighterManagedElement(mutation.target);
+}
+
+function checkPendingMutations() {
+	isMutationCheckScheduled = false;
+	const mutations = pendingMutations;
+	pendingMutations = [];
+	if (isApplyingHighlights || highlights.length === 0) {
+		return;
+	}
 
-				return !isHighlighterManagedElement(mutation.target);
-			})()) ||
-			(mutation.type === 'attributes' &&
-				(mutation.attributeName === 'style' || mutation.attributeName === 'class') &&
-				(mutation.target instanceof Element) &&
-				!isHighlighterManagedElement(mutation.target))
-		);
-		if (shouldUpdate) {
-			throttledUpdateHighlights();
+	const isWaitingForTargets = highlightTargetsByIndex.size < highlights.length;
+	let kept = 0;
+	for (const mutation of mutations) {
+		if (isRelevantHighlightMutation(mutation, isWaitingForTargets)) {
+			kept++;
 		}
 	}
+	if (kept > 0) {
+		mutationStats.kept += kept;
+		isMutationUpdatePending = true;
+		throttledUpdateHighlights();
+	}
+}
+
+function scheduleMutationCheck() {
+	if (isMutationCheckScheduled) {
+		return;
+	}
+	isMutationCheckScheduled = true;
+	if (typeof window.requestIdleCallback === 'function') {
+		window.requestIdleCallback(checkPendingMutations, { timeout: MUTATION_IDLE_TIMEOUT_MS });
+	} else {
+		// Safari has no requestIdleCallback
+		setTimeout(checkPendingMutations, MUTATION_FALLBACK_DELAY_MS);
+	}
+}
+
+/**
+ * Counters for the highlight mutation observer.
+ */
+export function getHighlightMutationStats(): HighlightMutationStats {
+	return { ...mutationStats };
+}
+
+export function resetHighlightMutationStats(): void {
+	mutationStats.seen = 0;
+	mutationStats.kept = 0;
+	mutationStats.repaints = 0;
+}
+
+const observer = new MutationObserver((mutations) => {
+	mutationStats.seen += mutations.length;
+	if (isApplyingHighlights || highlights.length === 0) {
+		return;
+	}
+	for (const mutation of mutations) {
+		pendingMutations.push(mutation);
+	}
+	scheduleMutationCheck();
 });
 
 observer.observe(document.body, { 
@@ -1509,9 +1753,7 @@ function createOrUpdateHoverOverlay(target: Element) {
 	hoverOverlay.style.display = 'block';
 
 	// Remove 'is-hovering' class from all highlight overlays
-	document.querySelectorAll('.obsidian-highlight-overlay.is-hovering').forEach(el => {
-		el.classList.remove('is-hovering');
-	});
+	removeClassFromOverlays('is-hovering');
 
 	// Remove 'on-highlight' class from hover overlay
 	hoverOverlay.classList.remove('on-highlight');
@@ -1521,9 +1763,10 @@ function createOrUpdateHoverOverlay(target: Element) {
 		const index = target.getAttribute('data-highlight-index');
 		if (index) {
 			// Add 'is-hovering' class to all highlight overlays with the same index
-			document.querySelectorAll(`.obsidian-highlight-overlay[data-highlight-index="${index}"]`).forEach(el => {
+			getOverlaysForHighlight(null, index).forEach(el => {
 				el.classList.add('is-hovering');
 			});
+			scheduleHighlightCanvasPaint();
 			// Add 'on-highlight' class to hover overlay
 			hoverOverlay.classList.add('on-highlight');
 		}
@@ -1538,9 +1781,7 @@ export function removeHoverOverlay() {
 	lastHoverTarget = null;
 
 	// Remove 'is-hovering' class from all highlight overlays
-	document.querySelectorAll('.obsidian-highlight-overlay.is-hovering').forEach(el => {
-		el.classList.remove('is-hovering');
-	});
+	removeClassFromOverlays('is-hovering');
 }
 
 function handleHighlightClick(event: Event) {
@@ -1567,6 +1808,8 @@ export function removeExistingHighlights() {
 	if (existingHighlights.length > 0) {
 		existingHighlights.forEach(el => el.remove());
 	}
+	clearOverlayIndex();
+	resetHighlightTracking();
 	selectedHighlightId = null;
 	selectedHighlightIndex = null;
 	hideOffsetHandles();
@@ -3,6 +3,8 @@ import { convertDate } from './date-utils';
 import { createElement as createLucideElement, MessageSquare, Trash2, Check, X } from 'lucide';
 import type { IconNode } from 'lucide';
 import type { AnyHighlightData } from './highlighter';
+import { findOverlayAtPoint, getOverlayClientRect, getOverlaysForHighlight } from './highlight-overlay-index';
+import { findPaintedOverlayAtPoint } from './highlight-canvas-layer';
 
 const OVERLAY_SELECTOR = '.obsidian-highlight-overlay';
 const HIGHLIGHT_WIDGET_ROOT_CLASS = 'obsidian-highlight-widget';
@@ -88,7 +90,7 @@ export function initializeHighlightWidget(nextBindings: HighlightWidgetBindings)
 		if (target.closest(HIGHLIGHT_WIDGET_ROOT_SELECTOR)) {
 			return;
 		}
-		if (target.classList.contains('obsidian-highlight-overlay')) {
+		if (target.classList.contains('obsidian-highlight-overlay') || findPaintedOverlayAtPoint(event.clientX, event.clientY)) {
 			return;
 		}
 		if (isHighlightWidgetEditorActive()) {
@@ -105,7 +107,11 @@ export function initializeHighlightWidget(nextBindings: HighlightWidgetBindings)
 		if (target.closest(HIGHLIGHT_WIDGET_ROOT_SELECTOR)) {
 			return;
 		}
-		if (target.classList.contains('obsidian-highlight-overlay')) {
+		const touch = event.touches[0];
+		if (
+			target.classList.contains('obsidian-highlight-overlay') ||
+			(touch && findPaintedOverlayAtPoint(touch.clientX, touch.clientY))
+		) {
 			return;
 		}
 		if (isHighlightWidgetEditorActive()) {
@@ -131,7 +137,7 @@ export function initializeHighlightWidget(nextBindings: HighlightWidgetBindings)
 			// Continue: widget auto-dismiss also runs on mouse move.
 		} else {
 			const target = event.target instanceof Element ? event.target : null;
-			if (!target?.closest(OVERLAY_SELECTOR)) {
+			if (!target?.closest(OVERLAY_SELECTOR) && !findPaintedOverlayAtPoint(event.clientX, event.clientY)) {
 				hideHighlightWidgetTooltip();
 			}
 		}
@@ -597,7 +603,7 @@ function positionHighlightWidgetTooltip(anchorElement: HTMLElement): void {
 		return;
 	}
 
-	const anchorRect = anchorElement.getBoundingClientRect();
+	const anchorRect = getOverlayClientRect(anchorElement);
 	const tooltipRect = highlightCommentTooltip.getBoundingClientRect();
 	const gap = 8;
 	const viewportPadding = 8;
@@ -697,11 +703,7 @@ function findCurrentWidgetHighlightOverlays(): HTMLElement[] {
 	const highlightId = highlightActionMenu.dataset.highlightId || '';
 	const rawIndex = Number.parseInt(highlightActionMenu.dataset.highlightIndex || '', 10);
 	const highlightIndex = Number.isInteger(rawIndex) ? rawIndex : -1;
-	const overlays = Array.from(document.querySelectorAll(OVERLAY_SELECTOR)) as HTMLElement[];
-	if (highlightId) {
-		return overlays.filter((overlay) => overlay.dataset.highlightId === highlightId);
-	}
-	return overlays.filter((overlay) => overlay.dataset.highlightIndex === String(highlightIndex));
+	return getOverlaysForHighlight(highlightId || null, highlightId ? null : highlightIndex);
 }
 
 // Proximity guard used by mousemove auto-dismiss of the floating widget.
@@ -718,7 +720,7 @@ function isPointWithinWidgetDismissArea(point: Point): boolean {
 	}
 
 	const overlays = findCurrentWidgetHighlightOverlays();
-	return overlays.some((overlay) => isPointNearRect(point, overlay.getBoundingClientRect(), margin));
+	return overlays.some((overlay) => isPointNearRect(point, getOverlayClientRect(overlay), margin));
 }
 
 function clampToViewport(value: number, min: number, max: number): number {
@@ -748,7 +750,7 @@ function positionHighlightWidget(anchorElement: HTMLElement, preferredPoint: Poi
 		resolvedAnchor = currentAnchor;
 	}
 
-	const rect = resolvedAnchor.getBoundingClientRect();
+	const rect = getOverlayClientRect(resolvedAnchor);
 	if (rect.width <= 0 && rect.height <= 0) {
 		return;
 	}
@@ -822,25 +824,8 @@ function removeHighlightAtIndex(highlightIndex: number): void {
 	bindings.persistHighlights(nextHighlights);
 }
 
-function findOverlayAtPoint(clientX: number, clientY: number): HTMLElement | null {
-	const overlays = Array.from(document.querySelectorAll(OVERLAY_SELECTOR)) as HTMLElement[];
-	for (let i = overlays.length - 1; i >= 0; i--) {
-		const overlay = overlays[i];
-		const rect = overlay.getBoundingClientRect();
-		if (clientX >= rect.left && clientX <= rect.right && clientY >= rect.top && clientY <= rect.bottom) {
-			return overlay;
-		}
-	}
-	return null;
-}
-
 function findOverlayByHighlightRef(highlightId: string, highlightIndex: number): HTMLElement | undefined {
-	const overlays = Array.from(document.querySelectorAll(OVERLAY_SELECTOR)) as HTMLElement[];
-	return overlays.find((item) => (
-		highlightId
-			? item.dataset.highlightId === highlightId
-			: item.dataset.highlightIndex === String(highlightIndex)
-	));
+	return getOverlaysForHighlight(highlightId || null, highlightId ? null : highlightIndex)[0];
 }
 
 function normalizeHexColor(color: string | undefined): string {
@@ -1,5 +1,5 @@
 import browser from './browser-polyfill';
-import { getElementXPath, getElementByXPath } from './dom-utils';
+import { getElementXPath, getElementByXPath, resolveXPaths } from './dom-utils';
 import { createElement as createLucideElement, PanelRightOpen } from 'lucide';
 import {
 	handleMouseUp,
@@ -16,6 +16,11 @@ import { detectBrowser, addBrowserClassToHtml } from './browser-detection';
 import { generalSettings, loadSettings, DEFAULT_HIGHLIGHT_COLOR } from './storage-utils';
 import { normalizeHighlightCreatedAt, resolveHighlightCreatedAt } from './highlight-timestamp-utils';
 import { shouldAutoMergeHighlights } from './highlight-merge-policy';
+import { withHighlightMarkdown } from './highlight-markdown';
+import { HighlightsStorage, loadPageHighlights, savePageHighlights } from './highlight-storage';
+import { WriteBehindQueue } from './write-behind-queue';
+import { getIndexedOverlays } from './highlight-overlay-index';
+import { selectHighlightRenderer } from './highlight-canvas-layer';
 
 /**
  * Helper function to create SVG elements
@@ -116,6 +121,9 @@ export interface HighlightData {
 	createdAt?: number;
 	color?: string;
 	notes?: string[]; // Annotations
+	// Markdown rendition of content, made when the highlight is created or edited (see highlight-markdown.ts)
+	markdown?: string;
+	markdownStamp?: string;
 }
 
 export interface TextHighlightData extends HighlightData {
@@ -143,39 +151,13 @@ interface HighlightSelectionOptions {
 	notifyPanel?: boolean;
 }
 
-type HighlightsStorage = Record<string, StoredData>;
-
-/**
- * Finds all storage keys that map to the current logical page URL.
- * Intended use: read-path only fallback for query/hash URL decorations.
- */
-function getMatchingHighlightStorageKeys(allHighlights: HighlightsStorage, currentUrl: string): string[] {
-	// Keep URL canonicalization local to read-time matching so persisted href values remain untouched.
-	const toMatchKey = (url: string): string => {
-		try {
-			const parsedUrl = new URL(url);
-			parsedUrl.search = '';
-			parsedUrl.hash = '';
-			return parsedUrl.href;
-		} catch (_error) {
-			return url;
-		}
-	};
-
-	const currentUrlKey = toMatchKey(currentUrl);
-	return Object.keys(allHighlights).filter((storedUrl) => toMatchKey(storedUrl) === currentUrlKey);
-}
-
 /**
- * Reads and merges highlights for every matching URL key.
- * Intended use: preserve compatibility with legacy datasets split across base/hash/query keys.
+ * Reads and merges highlights for every URL stored for the current page.
+ * Intended use: preserve compatibility with datasets split across base/hash/query keys,
+ * which share a storage shard (see highlight-storage.ts).
  */
-function collectHighlightsForCurrentPage(allHighlights: HighlightsStorage, currentUrl: string): AnyHighlightData[] {
-	const matchingKeys = getMatchingHighlightStorageKeys(allHighlights, currentUrl);
-
-	return matchingKeys
-		// Resolve matching URL keys to storage records.
-		.map((storageKey) => allHighlights[storageKey])
+function collectHighlightsForCurrentPage(pageHighlights: HighlightsStorage): AnyHighlightData[] {
+	return Object.values(pageHighlights)
 		// Merge every record's highlight array into one read dataset.
 		.flatMap((storedData) => (Array.isArray(storedData?.highlights) ? storedData.highlights : []))
 		// Ignore malformed entries that are not highlight objects.
@@ -629,7 +611,8 @@ export function handleTextSelection(selection: Selection, notes?: string[]) {
 			currentBatchHighlights = mergeOverlappingHighlights(currentBatchHighlights, newHighlightWithNotes);
 		}
 		
-		highlights = currentBatchHighlights; // Update global highlights with the final merged result
+		// Update global highlights with the final merged result, converting new and merged highlights to markdown
+		highlights = withNewHighlightMarkdown(oldGlobalHighlights, currentBatchHighlights);
 		
 		// Only add to history if something actually changed from the initial global state
 		if (JSON.stringify(oldGlobalHighlights) !== JSON.stringify(highlights)) {
@@ -879,7 +862,7 @@ function addHighlight(highlight: AnyHighlightData, notes?: string[]) {
 		color: highlight.color || getDefaultHighlightColor(),
 		notes: notes || []
 	});
-	const mergedHighlights = mergeOverlappingHighlights(highlights, newHighlight);
+	const mergedHighlights = withNewHighlightMarkdown(oldHighlights, mergeOverlappingHighlights(highlights, newHighlight));
 	highlights = mergedHighlights;
 	addToHistory('add', oldHighlights, mergedHighlights);
 	sortHighlights();
@@ -888,11 +871,20 @@ function addHighlight(highlight: AnyHighlightData, notes?: string[]) {
 	updateHighlighterMenu();
 }
 
+// Convert only the highlights an edit created or merged. Older highlights
+// without markdown are converted when they are read (see getHighlightMarkdown),
+// so a page with many of them doesn't convert them all on its main thread.
+function withNewHighlightMarkdown(previous: AnyHighlightData[], next: AnyHighlightData[]): AnyHighlightData[] {
+	const unchanged = new Set(previous);
+	return next.map(highlight => unchanged.has(highlight) ? highlight : withHighlightMarkdown(highlight, window.location.href));
+}
+
 // Sort highlights based on their vertical position
 export function sortHighlights() {
+	const elements = resolveXPaths(highlights.map(highlight => highlight.xpath));
 	highlights.sort((a, b) => {
-		const elementA = getElementByXPath(a.xpath);
-		const elementB = getElementByXPath(b.xpath);
+		const elementA = elements.get(a.xpath);
+		const elementB = elements.get(b.xpath);
 		if (elementA && elementB) {
 			const verticalDiff = getElementVerticalPosition(elementA) - getElementVerticalPosition(elementB);
 			
@@ -1088,22 +1080,47 @@ function getParents(element: Element): Element[] {
 	return parents;
 }
 
+// Saves are written behind: edits within HIGHLIGHT_SAVE_DELAY_MS of each other,
+// such as handle drags or color changes, become one storage write per page
+const HIGHLIGHT_SAVE_DELAY_MS = 300;
+
+const highlightWrites = new WriteBehindQueue<string, AnyHighlightData[]>({
+	delayMs: HIGHLIGHT_SAVE_DELAY_MS,
+	write: (url, pageHighlights) => {
+		return savePageHighlights(url, pageHighlights.map(highlight => normalizeHighlightData(highlight)));
+	},
+	onError: (error) => {
+		console.error('Failed to persist highlights:', error);
+	}
+});
+
+let flushListenersAdded = false;
+
+// Write pending highlights before the page is hidden or unloaded
+function addFlushListeners() {
+	if (flushListenersAdded) return;
+	flushListenersAdded = true;
+	window.addEventListener('pagehide', () => {
+		flushHighlights();
+	});
+	document.addEventListener('visibilitychange', () => {
+		if (document.visibilityState === 'hidden') {
+			flushHighlights();
+		}
+	});
+}
+
 // Save highlights to browser storage
 export function saveHighlights() {
-	const url = window.location.href;
-	browser.storage.local.get('highlights')
-		.then((result: { highlights?: HighlightsStorage }) => {
-			const allHighlights: HighlightsStorage = result.highlights || {};
-			if (highlights.length > 0) {
-				allHighlights[url] = { highlights: highlights.map(normalizeHighlightData), url };
-			} else {
-				delete allHighlights[url];
-			}
-			return browser.storage.local.set({ highlights: allHighlights });
-		})
-		.catch((error) => {
-			console.error('Failed to persist highlights:', error);
-		});
+	addFlushListeners();
+	highlightWrites.enqueue(window.location.href, [...highlights]);
+}
+
+/**
+ * Write any queued highlight saves now. Resolves once they are stored.
+ */
+export function flushHighlights(): Promise<void> {
+	return highlightWrites.flush();
 }
 
 // Apply all highlights to the page
@@ -1124,9 +1141,12 @@ export function applyHighlights() {
 	isApplyingHighlights = true;
 
 	removeExistingHighlights();
+	// Pages with many highlights paint them into a canvas rather than adding an element per line
+	selectHighlightRenderer(highlights.length);
 	
+	const containers = resolveXPaths(highlights.map(highlight => highlight.xpath));
 	highlights.forEach((highlight, index) => {
-		const container = getElementByXPath(highlight.xpath);
+		const container = containers.get(highlight.xpath);
 		if (container) {
 			planHighlightOverlayRects(container, highlight, index);
 		}
@@ -1260,7 +1280,7 @@ export function selectHighlightById(
 		return false;
 	}
 
-	if (document.querySelectorAll('.obsidian-highlight-overlay').length === 0 && highlights.length > 0) {
+	if (getIndexedOverlays().length === 0 && highlights.length > 0) {
 		highlights.forEach((highlight, index) => {
 			const container = getElementByXPath(highlight.xpath);
 			if (container) {
@@ -1275,9 +1295,9 @@ export function selectHighlightById(
 // Load highlights from browser storage
 export async function loadHighlights() {
 	const url = window.location.href;
-	const result = await browser.storage.local.get('highlights');
-	const allHighlights = (result.highlights || {}) as HighlightsStorage;
-	const mergedHighlights = collectHighlightsForCurrentPage(allHighlights, url);
+	// Include saves still queued, e.g. from before a same-document navigation
+	await flushHighlights();
+	const mergedHighlights = collectHighlightsForCurrentPage(await loadPageHighlights(url));
 	
 	if (mergedHighlights.length > 0) {
 		highlights = mergedHighlights.map(normalizeHighlightData);
@@ -1299,18 +1319,16 @@ export async function loadHighlights() {
 export function clearHighlights() {
 	const url = window.location.href;
 	const oldHighlights = [...highlights];
-	browser.storage.local.get('highlights').then((result: { highlights?: HighlightsStorage }) => {
-		const allHighlights: HighlightsStorage = result.highlights || {};
-		delete allHighlights[url];
-		browser.storage.local.set({ highlights: allHighlights }).then(() => {
-			highlights = [];
-			removeExistingHighlights();
-			console.log('Highlights cleared for:', url);
-			sendRuntimeMessageSafely({ action: "highlightsCleared" });
-			notifyHighlightsUpdated();
-			updateHighlighterMenu();
-			addToHistory('remove', oldHighlights, []);
-		});
+	// Through the queue, so a pending save can't restore the cleared highlights
+	highlightWrites.enqueue(url, []);
+	flushHighlights().then(() => {
+		highlights = [];
+		removeExistingHighlights();
+		console.log('Highlights cleared for:', url);
+		sendRuntimeMessageSafely({ action: "highlightsCleared" });
+		notifyHighlightsUpdated();
+		updateHighlighterMenu();
+		addToHistory('remove', oldHighlights, []);
 	});
 }
 
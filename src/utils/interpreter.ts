@@ -640,7 +640,10 @@ export function replacePromptVariables(promptVariables: PromptVariable[], prompt
 	const allInputs = document.querySelectorAll('input, textarea');
 	allInputs.forEach((input) => {
 		if (input instanceof HTMLInputElement || input instanceof HTMLTextAreaElement) {
-			input.value = input.value.replace(/{{(?:prompt:)?"([\s\S]*?)"(\|[\s\S]*?)?}}/g, (match, promptText, filters) => {
+			// Only touch fields that still contain a prompt placeholder
+			if (!input.value.includes('{{')) return;
+
+			const newValue = input.value.replace(/{{(?:prompt:)?"([\s\S]*?)"(\|[\s\S]*?)?}}/g, (match, promptText, filters) => {
 				const variable = promptVariables.find(v => v.prompt === promptText);
 				if (!variable) return match;
 
@@ -666,6 +669,8 @@ export function replacePromptVariables(promptVariables: PromptVariable[], prompt
 				}
 				return match; // Return original if no match found
 			});
+			if (newValue === input.value) return;
+			input.value = newValue;
 
 			// Adjust height for noteNameField after updating its value
 			if (input.id === 'note-name-field' && input instanceof HTMLTextAreaElement) {
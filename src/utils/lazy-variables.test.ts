@@ -0,0 +1,51 @@
+import { describe, test, expect, vi } from 'vitest';
+import { defineLazyVariable, extendVariables } from './lazy-variables';
+import { render } from './renderer';
+
+describe('Lazy variables', () => {
+	test('computes a value only when read, and only once', () => {
+		const compute = vi.fn(() => 'expensive');
+		const variables: { [key: string]: any } = { '{{title}}': 'Title' };
+		defineLazyVariable(variables, '{{content}}', compute);
+
+		expect(Object.keys(variables)).toEqual(['{{title}}', '{{content}}']);
+		expect(compute).not.toHaveBeenCalled();
+
+		expect(variables['{{content}}']).toBe('expensive');
+		expect(variables['{{content}}']).toBe('expensive');
+		expect(compute).toHaveBeenCalledTimes(1);
+	});
+
+	test('can be reassigned', () => {
+		const compute = vi.fn(() => 'expensive');
+		const variables: { [key: string]: any } = {};
+		defineLazyVariable(variables, '{{content}}', compute);
+
+		variables['{{content}}'] = 'replaced';
+		expect(variables['{{content}}']).toBe('replaced');
+		expect(compute).not.toHaveBeenCalled();
+	});
+
+	test('extendVariables does not compute lazy values', () => {
+		const compute = vi.fn(() => 'expensive');
+		const variables: { [key: string]: any } = {};
+		defineLazyVariable(variables, '{{content}}', compute);
+
+		const scope = extendVariables(variables, { item: 1 });
+		expect(scope.item).toBe(1);
+		expect(compute).not.toHaveBeenCalled();
+		expect(scope['{{content}}']).toBe('expensive');
+		expect(variables['{{content}}']).toBe('expensive');
+		expect(compute).toHaveBeenCalledTimes(1);
+	});
+
+	test('templates only compute the variables they reference', async () => {
+		const compute = vi.fn(() => 'expensive');
+		const variables: { [key: string]: any } = { '{{title}}': 'Title', '{{items}}': ['a', 'b'] };
+		defineLazyVariable(variables, '{{content}}', compute);
+
+		const result = await render('{{title}}{% for item in items %}-{{item}}{% endfor %}', { variables, currentUrl: '' });
+		expect(result.output).toBe('Title-a\n-b');
+		expect(compute).not.toHaveBeenCalled();
+	});
+});
@@ -0,0 +1,63 @@
+// Lazily computed template variables.
+// Expensive page variables ({{content}}, {{selection}}, {{highlights}}, ...) are defined
+// as memoized getters, so a value is only computed when a template actually reads it.
+// Key enumeration (Object.keys, schema shorthand lookups) doesn't trigger computation.
+
+/**
+ * Define a variable whose value is computed on first read.
+ * The variable can still be reassigned (e.g. by {% set %}), which replaces the getter.
+ */
+export function defineLazyVariable(variables: { [key: string]: any }, key: string, compute: () => any): void {
+	Object.defineProperty(variables, key, {
+		get: lazy(compute),
+		set(this: { [key: string]: any }, newValue: any) {
+			Object.defineProperty(this, key, {
+				value: newValue,
+				writable: true,
+				enumerable: true,
+				configurable: true,
+			});
+		},
+		enumerable: true,
+		configurable: true,
+	});
+}
+
+/**
+ * Whether a variable was defined with defineLazyVariable and hasn't been reassigned since.
+ */
+export function isLazyVariable(variables: { [key: string]: any }, key: string): boolean {
+	return typeof Object.getOwnPropertyDescriptor(variables, key)?.get === 'function';
+}
+
+/**
+ * Create a memoized thunk, for values shared by several lazy variables.
+ */
+export function lazy<T>(compute: () => T): () => T {
+	let computed = false;
+	let value: T;
+	return () => {
+		if (!computed) {
+			value = compute();
+			computed = true;
+		}
+		return value;
+	};
+}
+
+/**
+ * Copy variables into a new scope with extra entries, without computing lazy values.
+ * Use instead of object spread, which reads every property.
+ */
+export function extendVariables(variables: { [key: string]: any }, extra: { [key: string]: any }): { [key: string]: any } {
+	const scope = Object.defineProperties({}, Object.getOwnPropertyDescriptors(variables));
+	for (const key of Object.keys(extra)) {
+		Object.defineProperty(scope, key, {
+			value: extra[key],
+			writable: true,
+			enumerable: true,
+			configurable: true,
+		});
+	}
+	return scope;
+}
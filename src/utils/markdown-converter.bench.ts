@@ -0,0 +1,57 @@
+// @vitest-environment jsdom
+import { bench, describe } from 'vitest';
+import { createTurndownService } from './markdown-converter';
+
+// Run with: npm run bench
+//
+// initializePageContent converts every highlight separately, so on a page with
+// 500 highlights the converter used to be set up 500 times. The first group
+// measures the setup cost that createMarkdownContent now pays once per context,
+// the second converts 500 highlight fragments with and without a shared
+// converter. Whole pages are timed in markdown-corpus.bench.ts.
+
+const HIGHLIGHT_COUNT = 500;
+
+// Fragments like those the highlighter stores: text with inline markup, links and the odd list or code
+const fragments = Array.from({ length: HIGHLIGHT_COUNT }, (_, i) => {
+	switch (i % 4) {
+		case 0:
+			return `<p>Highlight ${i} with <strong>bold</strong>, <em>emphasis</em> and <a href="../notes/${i}.html">a relative link</a>.</p>`;
+		case 1:
+			return `<span>Inline highlight ${i} mentioning <code>convert()</code> in passing</span>`;
+		case 2:
+			return `<ul><li>First point of highlight ${i}</li><li>Second point with <a href="https://example.org/${i}">a link</a></li></ul>`;
+		default:
+			return `<blockquote><p>Quoted highlight ${i}</p></blockquote><pre><code class="language-js">const value = ${i};</code></pre>`;
+	}
+});
+
+describe(`converter setup for ${HIGHLIGHT_COUNT} highlights`, () => {
+	bench('new converter per highlight', () => {
+		for (let i = 0; i < HIGHLIGHT_COUNT; i++) {
+			createTurndownService();
+		}
+	});
+
+	bench('shared converter', () => {
+		let shared = null;
+		for (let i = 0; i < HIGHLIGHT_COUNT; i++) {
+			shared = shared || createTurndownService();
+		}
+	});
+});
+
+describe(`converting ${HIGHLIGHT_COUNT} highlights`, () => {
+	bench('new converter per highlight', () => {
+		for (const fragment of fragments) {
+			createTurndownService().turndown(fragment);
+		}
+	});
+
+	bench('shared converter', () => {
+		const shared = createTurndownService();
+		for (const fragment of fragments) {
+			shared.turndown(fragment);
+		}
+	});
+});
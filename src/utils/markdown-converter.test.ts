@@ -0,0 +1,80 @@
+// @vitest-environment jsdom
+import { describe, test, expect } from 'vitest';
+import { readdirSync, readFileSync } from 'fs';
+import { join } from 'path';
+import { createMarkdownContent, createMarkdownContentChunked } from './markdown-converter';
+import { getCacheStats } from './cache';
+
+const PAGES_DIR = join(__dirname, '__fixtures__', 'pages');
+const BASE_URL = 'https://example.com/articles/page.html';
+
+const pages = readdirSync(PAGES_DIR)
+	.filter(file => file.endsWith('.html'))
+	.sort()
+	.map(file => ({ name: file.replace(/\.html$/, ''), html: readFileSync(join(PAGES_DIR, file), 'utf8') }));
+
+describe('Fixture pages', () => {
+	// The expected markdown is kept next to the test, so changes to the output show up in review
+	test.each(pages)('converts $name', async ({ name, html }) => {
+		await expect(createMarkdownContent(html, BASE_URL)).toMatchFileSnapshot(`./__snapshots__/pages/${name}.md`);
+	});
+});
+
+describe('MathML conversion', () => {
+	test('reuses the LaTeX of expressions that differ only in ids', () => {
+		const math = (id: string) => `<math id="${id}"><mi xref="${id}-q">q</mi><mo>+</mo><mn>7919</mn></math>`;
+		const before = getCacheStats().mathmlToLatex ?? { hits: 0, misses: 0 };
+
+		const first = createMarkdownContent(`<p>${math('eq1')}</p>`, BASE_URL);
+		const second = createMarkdownContent(`<p>${math('eq2')}</p>`, BASE_URL);
+
+		expect(second).toBe(first);
+		expect(first).toContain('7919');
+		const after = getCacheStats().mathmlToLatex;
+		expect(after.misses - before.misses).toBe(1);
+		expect(after.hits - before.hits).toBe(1);
+	});
+});
+
+describe('Chunked markdown conversion', () => {
+	test.each(pages)('matches createMarkdownContent for $name', async ({ html }) => {
+		const expected = createMarkdownContent(html, BASE_URL);
+
+		expect(await createMarkdownContentChunked(html, BASE_URL)).toBe(expected);
+		// Break between every pair of blocks
+		expect(await createMarkdownContentChunked(html, BASE_URL, { chunkTextLength: 1 })).toBe(expected);
+	});
+
+	test('keeps line breaks, list spacing and numbering at chunk edges', async () => {
+		const html = [
+			'<p>First line<br></p>',
+			'<ul><li>one</li></ul>',
+			'<ul><li>two</li></ul>',
+			'<ol><li>a</li><li>b</li></ol>',
+			'<p>Text with <span>inline</span> content</p>',
+			'<pre><code>code\n\n\nblock</code></pre>',
+			'<p>Last</p>'
+		].join('\n');
+
+		const expected = createMarkdownContent(html, BASE_URL);
+		expect(await createMarkdownContentChunked(html, BASE_URL, { chunkTextLength: 1 })).toBe(expected);
+	});
+
+	test('reports progress and a preview', async () => {
+		const { html } = pages.find(page => page.name === 'arxiv-paper')!;
+		const progress: number[] = [];
+		let preview = '';
+
+		await createMarkdownContentChunked(html, BASE_URL, {
+			sliceMs: 0,
+			chunkTextLength: 1024,
+			previewSize: 100,
+			onProgress: ({ converted }) => progress.push(converted),
+			onPreview: text => { preview = text; }
+		});
+
+		expect(progress.length).toBeGreaterThan(1);
+		expect(progress[progress.length - 1]).toBe(progress.length);
+		expect(preview).toHaveLength(100);
+	});
+});
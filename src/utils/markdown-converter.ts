@@ -1,34 +1,51 @@
 import TurndownService from 'turndown';
 import { MathMLToLaTeX } from 'mathml-to-latex';
-import { processUrls } from './string-utils';
+import { makeUrlsAbsolute } from './string-utils';
+import { serializeChildren } from './dom-utils';
 import { debugLog } from './debug';
+import { memoize } from './cache';
 
-const footnotes: { [key: string]: string } = {};
+// Bump when a change to the conversion rules changes their output, so that
+// markdown cached with highlights (see highlight-markdown.ts) is regenerated
+export const MARKDOWN_CONVERTER_VERSION = 1;
+
+// Built on first use and reused, since setting up the rules is as expensive
+// as converting a short fragment such as a highlight
+let sharedTurndownService: TurndownService | null = null;
+
+// Math-heavy pages repeat the same expressions (and variables like x or \alpha)
+// many times, so MathML to LaTeX conversions are cached across conversions.
+// Keyed by the MathML itself rather than a hash, since a collision would return
+// the LaTeX of a different expression; the byte budget includes the keys.
+const convertNormalizedMathML = memoize(
+	(mathml: string): string => MathMLToLaTeX.convert(mathml),
+	{ name: 'mathmlToLatex', maxEntries: 2000, maxBytes: 4 * 1024 * 1024, key: (mathml: string) => mathml }
+);
+
+/**
+ * Convert a MathML element to LaTeX.
+ * Attributes that don't affect the output are removed first (ids and
+ * cross-references are unique per occurrence on arXiv pages), so that repeated
+ * expressions share a cache entry.
+ */
+function mathMLToLatex(mathElement: Element): string {
+	const normalized = mathElement.outerHTML.replace(/\s(?:id|xref|alttext)="[^"]*"/g, '');
+	return convertNormalizedMathML(normalized);
+}
 
 /**
  * Helper function to safely get HTML content from an element
  */
 function getElementHTML(element: Element): string {
-	const serializer = new XMLSerializer();
-	let result = '';
-	Array.from(element.childNodes).forEach(node => {
-		if (node.nodeType === Node.ELEMENT_NODE) {
-			result += serializer.serializeToString(node);
-		} else if (node.nodeType === Node.TEXT_NODE) {
-			result += node.textContent;
-		}
-	});
-	return result;
+	return serializeChildren(element);
 }
 
-export function createMarkdownContent(content: string, url: string) {
-	debugLog('Markdown', 'Starting markdown conversion for URL:', url);
-	debugLog('Markdown', 'Content length:', content.length);
-
-	const baseUrl = new URL(url);
-	// Process all URLs at the beginning
-	const processedContent = processUrls(content, baseUrl);
-
+/**
+ * Build a Turndown converter with all of the clipper's rules.
+ * The rules don't depend on the page being converted, so one converter
+ * can be shared by every conversion (see createMarkdownContent).
+ */
+export function createTurndownService(): TurndownService {
 	const turndownService = new TurndownService({
 		headingStyle: 'atx',
 		hr: '---',
@@ -474,7 +491,7 @@ export function createMarkdownContent(content: string, url: string) {
 
 			let latex;
 			try {
-				latex = MathMLToLaTeX.convert(mathElement.outerHTML);
+				latex = mathMLToLatex(mathElement);
 			} catch (error) {
 				console.error('Error converting MathML to LaTeX:', error);
 				return content;
@@ -671,45 +688,291 @@ export function createMarkdownContent(content: string, url: string) {
 
 		const mathNode = element.nodeName.toLowerCase() === 'math' ? element : element.querySelector('math');
 		if (mathNode) {
-			return MathMLToLaTeX.convert(mathNode.outerHTML);
+			return mathMLToLatex(mathNode);
 		}
 
 		const imgNode = element.querySelector('img');
 		return imgNode?.getAttribute('alt') || '';
 	}
 
+	return turndownService;
+}
+
+export function createMarkdownContent(content: string, url: string) {
+	debugLog('Markdown', 'Starting markdown conversion for URL:', url);
+	debugLog('Markdown', 'Content length:', content.length);
+
+	const doc = new DOMParser().parseFromString(content, 'text/html');
+	return createMarkdownFromElement(doc.body, url);
+}
+
+/**
+ * Convert already parsed HTML to markdown, without serializing and re-parsing it.
+ * Relative URLs in the element are made absolute in place.
+ */
+export function createMarkdownFromElement(root: HTMLElement, url: string) {
+	const baseUrl = new URL(url);
+	makeUrlsAbsolute(root, baseUrl);
+
+	const turndownService = getTurndownService();
+
 	try {
-		let markdown = turndownService.turndown(processedContent);
+		const markdown = turndownService.turndown(root);
 		debugLog('Markdown', 'Markdown conversion successful');
+		return finishMarkdown(markdown);
+	} catch (error) {
+		return handleConversionError(error, getElementHTML(root));
+	}
+}
+
+function getTurndownService(): TurndownService {
+	if (!sharedTurndownService) {
+		sharedTurndownService = createTurndownService();
+	}
+	return sharedTurndownService;
+}
+
+// Clean up converted markdown
+function finishMarkdown(markdown: string): string {
+	// Remove the title from the beginning of the content if it exists
+	const titleMatch = markdown.match(/^# .+\n+/);
+	if (titleMatch) {
+		markdown = markdown.slice(titleMatch[0].length);
+	}
+
+	// Remove any empty links e.g. [](example.com) that remain, along with surrounding newlines
+	// But don't affect image links like ![](image.jpg)
+	markdown = markdown.replace(/\n*(?<!!)\[]\([^)]+\)\n*/g, '');
+
+	// Remove any consecutive newlines more than two
+	markdown = markdown.replace(/\n{3,}/g, '\n\n');
+
+	return markdown.trim();
+}
+
+function handleConversionError(error: unknown, processedContent: string): string {
+	console.error('Error converting HTML to Markdown:', error);
+	console.log('Problematic content:', processedContent.substring(0, 1000) + '...');
+	return `Partial conversion completed with errors. Original HTML:\n\n${processedContent}`;
+}
+
+// ============================================================================
+// Chunked conversion
+// ============================================================================
+
+export interface ConversionProgress {
+	/** Number of chunks converted so far */
+	converted: number;
+	/** Total number of chunks */
+	total: number;
+}
+
+export interface ChunkedConversionOptions {
+	/** Time to spend converting before yielding to the event loop, in milliseconds (default 12) */
+	sliceMs?: number;
+	/** Called after each slice */
+	onProgress?: (progress: ConversionProgress) => void;
+	/** Called once with the markdown converted so far, when it reaches previewSize characters */
+	onPreview?: (markdown: string) => void;
+	/** Length of the preview passed to onPreview, in characters (default 16384) */
+	previewSize?: number;
+	/** Stop converting between slices; the returned promise rejects with an AbortError */
+	signal?: AbortSignal;
+	/** Approximate amount of text converted in one Turndown call, in characters (default 16384) */
+	chunkTextLength?: number;
+}
+
+const DEFAULT_SLICE_MS = 12;
+const DEFAULT_PREVIEW_SIZE = 16 * 1024;
+// Approximate amount of text converted in one Turndown call
+const CHUNK_TEXT_LENGTH = 16 * 1024;
 
-		// Remove the title from the beginning of the content if it exists
-		const titleMatch = markdown.match(/^# .+\n+/);
-		if (titleMatch) {
-			markdown = markdown.slice(titleMatch[0].length);
+// Wrappers that Turndown converts to just their contents, so their children can be chunked instead
+const TRANSPARENT_WRAPPERS = new Set(['DIV', 'ARTICLE', 'SECTION', 'MAIN']);
+
+const BLOCK_ELEMENTS = new Set([
+	'ADDRESS', 'ARTICLE', 'ASIDE', 'AUDIO', 'BLOCKQUOTE', 'BODY', 'CANVAS', 'CENTER', 'DD', 'DIR',
+	'DIV', 'DL', 'DT', 'FIELDSET', 'FIGCAPTION', 'FIGURE', 'FOOTER', 'FORM', 'FRAMESET', 'H1', 'H2',
+	'H3', 'H4', 'H5', 'H6', 'HEADER', 'HGROUP', 'HR', 'HTML', 'ISINDEX', 'LI', 'MAIN', 'MENU', 'NAV',
+	'NOFRAMES', 'NOSCRIPT', 'OL', 'OUTPUT', 'P', 'PRE', 'SECTION', 'TABLE', 'TBODY', 'TD', 'TFOOT',
+	'TH', 'THEAD', 'TR', 'UL'
+]);
+
+function isBlockElement(node: Node): boolean {
+	return node.nodeType === Node.ELEMENT_NODE && BLOCK_ELEMENTS.has(node.nodeName);
+}
+
+// Descend through single wrapper elements (e.g. the <article> around extracted
+// content) that don't have rules of their own, to find the blocks to chunk
+function getChunkContainer(root: HTMLElement): Element {
+	let container: Element = root;
+	while (true) {
+		const elements = container.children;
+		if (elements.length !== 1) {
+			return container;
+		}
+		const child = elements[0] as HTMLElement;
+		const hasOwnRule = child.id !== '' || child.classList.contains('markdown-alert') || child.style.display === 'none';
+		const hasText = Array.from(container.childNodes).some(node => node.nodeType === Node.TEXT_NODE && node.textContent!.trim() !== '');
+		if (!TRANSPARENT_WRAPPERS.has(child.nodeName) || hasOwnRule || hasText) {
+			return container;
 		}
+		container = child;
+	}
+}
 
-		// Remove any empty links e.g. [](example.com) that remain, along with surrounding newlines
-		// But don't affect image links like ![](image.jpg)
-		markdown = markdown.replace(/\n*(?<!!)\[]\([^)]+\)\n*/g, '');
+function isWhitespaceText(node: Node): boolean {
+	return node.nodeType === Node.TEXT_NODE && node.textContent!.trim() === '';
+}
 
-		// Remove any consecutive newlines more than two
-		markdown = markdown.replace(/\n{3,}/g, '\n\n');
+// Group the container's children into chunks of roughly chunkTextLength characters.
+// Chunks only break between two block elements (whitespace between them stays with
+// the first), so inline content and the rules that look at siblings see the same
+// neighbours as in a single Turndown call.
+function splitIntoChunks(container: Element, chunkTextLength: number): Node[][] {
+	const chunks: Node[][] = [];
+	let current: Node[] = [];
+	let currentLength = 0;
+	let previousIsBlock = false;
+
+	for (const node of Array.from(container.childNodes)) {
+		const isBlock = isBlockElement(node);
+		if (currentLength >= chunkTextLength && isBlock && previousIsBlock) {
+			chunks.push(current);
+			current = [];
+			currentLength = 0;
+		}
+		current.push(node);
+		currentLength += node.textContent?.length ?? 0;
+		if (!isWhitespaceText(node)) {
+			previousIsBlock = isBlock;
+		}
+	}
 
-		// Append footnotes at the end of the document
-		if (Object.keys(footnotes).length > 0) {
-			markdown += '\n\n---\n\n';
-			for (const [id, content] of Object.entries(footnotes)) {
-				markdown += `[^${id}]: ${content}\n\n`;
-			}
+	if (current.length > 0) {
+		chunks.push(current);
+	}
+	return chunks;
+}
+
+// Marks the edges of a chunk, so Turndown doesn't trim the newlines and trailing
+// spaces (e.g. from a <br>) that the join with the next chunk depends on
+const CHUNK_EDGE = '\uE000';
+
+function getChunkMarkdown(output: string): string {
+	const start = output.indexOf(CHUNK_EDGE);
+	const end = output.lastIndexOf(CHUNK_EDGE);
+	if (start === -1) {
+		return output;
+	}
+	return start === end ? output.slice(0, start) : output.slice(start + 1, end);
+}
+
+// Converted chunks, joined the way Turndown joins converted nodes: the larger
+// number of newlines on either side is kept, up to a blank line. The newlines
+// at the end of the last chunk are held back until the next one is added, so
+// each chunk is scanned once and the parts are joined once at the end.
+class ChunkedMarkdown {
+	private parts: string[] = [];
+	private trailingNewlines = 0;
+	length = 0;
+
+	append(markdown: string): void {
+		const body = markdown.replace(/^\n+/, '');
+		const trimmed = body.replace(/\n+$/, '');
+		this.trailingNewlines = Math.max(this.trailingNewlines, markdown.length - body.length);
+		if (!trimmed) {
+			return;
 		}
-		
-		// Clear the footnotes object for the next conversion
-		Object.keys(footnotes).forEach(key => delete footnotes[key]);
+		const separator = '\n\n'.substring(0, this.trailingNewlines);
+		this.parts.push(separator, trimmed);
+		this.length += separator.length + trimmed.length;
+		this.trailingNewlines = body.length - trimmed.length;
+	}
+
+	toString(): string {
+		return this.parts.join('') + '\n\n'.substring(0, this.trailingNewlines);
+	}
+}
 
-		return markdown.trim();
+export function createAbortError(): Error {
+	const error = new Error('Markdown conversion was cancelled');
+	error.name = 'AbortError';
+	return error;
+}
+
+function yieldToEventLoop(): Promise<void> {
+	return new Promise(resolve => setTimeout(resolve, 0));
+}
+
+/**
+ * Convert HTML to markdown in chunks of top-level blocks, yielding to the event
+ * loop between time slices so that very large pages don't block the thread.
+ * Each block is converted once, so the total work and the resulting markdown are
+ * the same as createMarkdownContent.
+ */
+export async function createMarkdownContentChunked(content: string, url: string, options: ChunkedConversionOptions = {}): Promise<string> {
+	const sliceMs = options.sliceMs ?? DEFAULT_SLICE_MS;
+	const previewSize = options.previewSize ?? DEFAULT_PREVIEW_SIZE;
+	const { signal, onProgress, onPreview } = options;
+	if (signal?.aborted) {
+		throw createAbortError();
+	}
+
+	debugLog('Markdown', 'Starting chunked markdown conversion for URL:', url);
+	debugLog('Markdown', 'Content length:', content.length);
+
+	const doc = new DOMParser().parseFromString(content, 'text/html');
+	const root = doc.body;
+	makeUrlsAbsolute(root, new URL(url));
+
+	const turndownService = getTurndownService();
+	const chunks = splitIntoChunks(getChunkContainer(root), options.chunkTextLength ?? CHUNK_TEXT_LENGTH);
+	const markdown = new ChunkedMarkdown();
+	let previewSent = false;
+
+	try {
+		let sliceStart = Date.now();
+		for (let i = 0; i < chunks.length; i++) {
+			// Wrap the chunk so Turndown converts it in one call; the nodes are
+			// moved out of the parsed document, which isn't used afterwards.
+			// The first chunk has no leading marker, so whitespace at the start
+			// of the content is collapsed as it would be for the whole document.
+			const wrapper = doc.createElement('div');
+			if (i > 0) {
+				wrapper.appendChild(doc.createTextNode(CHUNK_EDGE));
+			}
+			for (const node of chunks[i]) {
+				wrapper.appendChild(node);
+			}
+			wrapper.appendChild(doc.createTextNode(CHUNK_EDGE));
+
+			markdown.append(getChunkMarkdown(turndownService.turndown(wrapper)));
+
+			if (onPreview && !previewSent && markdown.length >= previewSize) {
+				previewSent = true;
+				onPreview(markdown.toString().slice(0, previewSize));
+			}
+
+			if (Date.now() - sliceStart >= sliceMs && i < chunks.length - 1) {
+				onProgress?.({ converted: i + 1, total: chunks.length });
+				await yieldToEventLoop();
+				if (signal?.aborted) {
+					throw createAbortError();
+				}
+				sliceStart = Date.now();
+			}
+		}
 	} catch (error) {
-		console.error('Error converting HTML to Markdown:', error);
-		console.log('Problematic content:', processedContent.substring(0, 1000) + '...');
-		return `Partial conversion completed with errors. Original HTML:\n\n${processedContent}`;
+		if (error instanceof Error && error.name === 'AbortError') {
+			throw error;
+		}
+		// The chunks were moved out of the parsed document, so report the original HTML
+		return handleConversionError(error, content);
 	}
+
+	onProgress?.({ converted: chunks.length, total: chunks.length });
+	debugLog('Markdown', 'Chunked markdown conversion successful:', chunks.length, 'chunks');
+	// Trim the ends as Turndown does for a whole document
+	return finishMarkdown(markdown.toString().replace(/^[\t\r\n]+/, '').replace(/[\t\r\n\s]+$/, ''));
 }
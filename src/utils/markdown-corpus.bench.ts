@@ -0,0 +1,116 @@
+// @vitest-environment jsdom
+import { bench, describe } from 'vitest';
+import { readdirSync, readFileSync } from 'fs';
+import { join } from 'path';
+import { createMarkdownContent, createMarkdownContentChunked } from './markdown-converter';
+import { makeUrlsAbsolute } from './string-utils';
+import { wrapTextWithMark } from './dom-utils';
+import { hashKey } from './cache';
+
+// Run with: npm run bench
+//
+// Converts each page in __fixtures__/pages: a Wikipedia article, an arXiv paper
+// with MathML, a GitHub README, a table-heavy document and a code-heavy blog post.
+// The pages are synthetic, in the structure of those sites, so they can be
+// checked in. Runs offline under jsdom. The expected markdown for each page is
+// checked by markdown-converter.test.ts.
+//
+// Before the timings, a summary table lists throughput, heap growth and a hash
+// of the markdown for each page. A change in a hash means the output changed,
+// so speedups that alter the markdown show up in review.
+
+const PAGES_DIR = join(__dirname, '__fixtures__', 'pages');
+const BASE_URL = 'https://example.com/articles/page.html';
+const SUMMARY_RUNS = 5;
+const HIGHLIGHTS_PER_PAGE = 50;
+
+const pages = readdirSync(PAGES_DIR)
+	.filter(file => file.endsWith('.html'))
+	.sort()
+	.map(file => ({ name: file.replace(/\.html$/, ''), html: readFileSync(join(PAGES_DIR, file), 'utf8') }));
+
+function parse(html: string): HTMLElement {
+	return new DOMParser().parseFromString(html, 'text/html').body;
+}
+
+// Highlight the start of evenly spaced paragraphs, as the highlighter would
+function applyHighlights(body: HTMLElement): void {
+	const paragraphs = Array.from(body.querySelectorAll('p'));
+	const step = Math.max(1, Math.floor(paragraphs.length / HIGHLIGHTS_PER_PAGE));
+	for (let i = 0; i < paragraphs.length; i += step) {
+		const length = paragraphs[i].textContent?.length ?? 0;
+		if (length > 0) {
+			wrapTextWithMark(paragraphs[i], { startOffset: 0, endOffset: Math.min(length, 40) });
+		}
+	}
+}
+
+// Heap is sampled between runs, so the peak is approximate; run node with
+// --expose-gc for steadier numbers
+function printCorpusSummary(): void {
+	const gc = (globalThis as any).gc as (() => void) | undefined;
+	const summary = pages.map(page => {
+		gc?.();
+		const heapBefore = process.memoryUsage().heapUsed;
+		let peakHeap = heapBefore;
+		let markdown = '';
+
+		const start = performance.now();
+		for (let i = 0; i < SUMMARY_RUNS; i++) {
+			markdown = createMarkdownContent(page.html, BASE_URL);
+			peakHeap = Math.max(peakHeap, process.memoryUsage().heapUsed);
+		}
+		const msPerRun = (performance.now() - start) / SUMMARY_RUNS;
+
+		return {
+			page: page.name,
+			'size (KB)': (page.html.length / 1024).toFixed(1),
+			'ms/page': msPerRun.toFixed(2),
+			'MB/s': (page.html.length / 1024 / 1024 / (msPerRun / 1000)).toFixed(2),
+			'peak heap growth (MB)': ((peakHeap - heapBefore) / 1024 / 1024).toFixed(1),
+			'markdown (KB)': (markdown.length / 1024).toFixed(1),
+			'output hash': hashKey(markdown),
+		};
+	});
+	console.table(summary);
+}
+
+printCorpusSummary();
+
+describe('createMarkdownContent', () => {
+	for (const page of pages) {
+		bench(page.name, () => {
+			createMarkdownContent(page.html, BASE_URL);
+		});
+	}
+});
+
+describe('making URLs absolute (includes parsing)', () => {
+	const baseUrl = new URL(BASE_URL);
+	for (const page of pages) {
+		bench(page.name, () => {
+			makeUrlsAbsolute(parse(page.html), baseUrl);
+		});
+	}
+});
+
+describe(`inline highlights, up to ${HIGHLIGHTS_PER_PAGE} per page (includes parsing)`, () => {
+	for (const page of pages) {
+		bench(page.name, () => {
+			applyHighlights(parse(page.html));
+		});
+	}
+});
+
+describe('large page (arXiv paper x 10)', () => {
+	const arxiv = pages.find(page => page.name === 'arxiv-paper');
+	const html = arxiv ? arxiv.html.repeat(10) : '';
+
+	bench('createMarkdownContent', () => {
+		createMarkdownContent(html, BASE_URL);
+	});
+
+	bench('createMarkdownContentChunked', async () => {
+		await createMarkdownContentChunked(html, BASE_URL);
+	});
+});
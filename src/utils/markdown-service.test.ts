@@ -0,0 +1,78 @@
+import { describe, test, expect, vi, afterEach } from 'vitest';
+import { runtime } from './__mocks__/webextension-polyfill';
+import { convertToMarkdown, isAbortError } from './markdown-service';
+
+describe('Off-thread markdown conversion', () => {
+	afterEach(() => {
+		vi.restoreAllMocks();
+	});
+
+	test('returns the markdown converted by the background script', async () => {
+		const sendMessage = vi.spyOn(runtime, 'sendMessage').mockResolvedValue({ success: true, markdown: '# Title' } as any);
+
+		expect(await convertToMarkdown('<h1>Title</h1>', 'https://example.com')).toBe('# Title');
+		expect(sendMessage).toHaveBeenCalledWith(expect.objectContaining({
+			action: 'convertMarkdown',
+			html: '<h1>Title</h1>',
+			url: 'https://example.com'
+		}));
+	});
+
+	test('rejects with the conversion error', async () => {
+		vi.spyOn(runtime, 'sendMessage').mockResolvedValue({ success: false, error: 'Invalid URL' } as any);
+		await expect(convertToMarkdown('<p>a</p>', 'not a url')).rejects.toThrow('Invalid URL');
+	});
+
+	test('cancels a pending conversion', async () => {
+		let respond: (response: any) => void = () => {};
+		const sendMessage = vi.spyOn(runtime, 'sendMessage').mockImplementation(((message: any) => {
+			if (message.action === 'convertMarkdown') {
+				return new Promise(resolve => { respond = resolve; });
+			}
+			return Promise.resolve({});
+		}) as any);
+
+		const controller = new AbortController();
+		const result = convertToMarkdown('<p>a</p>', 'https://example.com', { signal: controller.signal });
+		controller.abort();
+
+		const error = await result.catch(e => e);
+		expect(isAbortError(error)).toBe(true);
+		const id = (sendMessage.mock.calls[0][0] as any).id;
+		expect(sendMessage).toHaveBeenCalledWith({ action: 'cancelMarkdownConversion', id });
+
+		// A late response is ignored
+		respond({ success: true, markdown: 'a' });
+	});
+
+	test('reports progress sent for the request', async () => {
+		const listeners: ((message: any) => void)[] = [];
+		vi.spyOn(runtime.onMessage, 'addListener').mockImplementation(((listener: any) => { listeners.push(listener); }) as any);
+		const removeListener = vi.spyOn(runtime.onMessage, 'removeListener');
+		vi.spyOn(runtime, 'sendMessage').mockImplementation((async (message: any) => {
+			for (const listener of listeners) {
+				listener({ action: 'markdownConversionProgress', id: 'other', progress: { converted: 9, total: 9 } });
+				listener({ action: 'markdownConversionProgress', id: message.id, progress: { converted: 1, total: 2 } });
+				listener({ action: 'markdownConversionProgress', id: message.id, preview: '# Ti' });
+			}
+			return { success: true, markdown: '# Title' };
+		}) as any);
+
+		const onProgress = vi.fn();
+		const onPreview = vi.fn();
+		expect(await convertToMarkdown('<h1>Title</h1>', 'https://example.com', { onProgress, onPreview })).toBe('# Title');
+		expect(onProgress.mock.calls).toEqual([[{ converted: 1, total: 2 }]]);
+		expect(onPreview).toHaveBeenCalledWith('# Ti');
+		expect(removeListener).toHaveBeenCalledWith(listeners[0]);
+	});
+
+	test('rejects immediately if already aborted', async () => {
+		const sendMessage = vi.spyOn(runtime, 'sendMessage');
+		const controller = new AbortController();
+		controller.abort();
+
+		const error = await convertToMarkdown('<p>a</p>', 'https://example.com', { signal: controller.signal }).catch(e => e);
+		expect(isAbortError(error)).toBe(true);
+		expect(sendMessage).not.toHaveBeenCalled();
+	});
+});
@@ -0,0 +1,121 @@
+import browser from './browser-polyfill';
+import { ConversionProgress, createAbortError, createMarkdownContentChunked } from './markdown-converter';
+import { debugLog } from './debug';
+
+// Markdown conversion away from the calling thread
+//
+// Turndown needs DOMParser, which workers don't have, so conversions run in
+// an offscreen document that the background script creates on demand (see
+// offscreen.ts). The popup and content scripts only send the HTML and wait
+// for the result, so a huge page doesn't block the popup UI or the page the
+// content script runs in. Where offscreen documents aren't available
+// (Firefox, Safari) the conversion runs on the calling thread, in time slices.
+
+export interface MarkdownConversionRequest {
+	action: 'convertMarkdown';
+	id: string;
+	html: string;
+	url: string;
+	// Send markdownConversionProgress messages while converting
+	reportProgress?: boolean;
+	previewSize?: number;
+}
+
+export interface MarkdownConversionProgressMessage {
+	action: 'markdownConversionProgress';
+	id: string;
+	progress?: ConversionProgress;
+	preview?: string;
+}
+
+export interface MarkdownConversionResponse {
+	success: boolean;
+	markdown?: string;
+	error?: string;
+	// The background script can't convert off-thread in this browser
+	unsupported?: boolean;
+	cancelled?: boolean;
+}
+
+export interface MarkdownConversionOptions {
+	// Abort to reject the returned promise and stop the conversion
+	signal?: AbortSignal;
+	onProgress?: (progress: ConversionProgress) => void;
+	// Called once with the start of the markdown, before the conversion finishes
+	onPreview?: (markdown: string) => void;
+	previewSize?: number;
+}
+
+let nextRequestId = 0;
+
+export function isAbortError(error: unknown): boolean {
+	return error instanceof Error && error.name === 'AbortError';
+}
+
+/**
+ * Convert HTML to markdown off the calling thread.
+ * Rejects with an AbortError if options.signal is aborted first.
+ * Progress is only reported to extension pages; content scripts don't receive it.
+ */
+export function convertToMarkdown(html: string, url: string, options: MarkdownConversionOptions = {}): Promise<string> {
+	const { signal, onProgress, onPreview, previewSize } = options;
+	if (signal?.aborted) {
+		return Promise.reject(createAbortError());
+	}
+
+	const id = `${Date.now().toString(36)}-${nextRequestId++}`;
+	const reportProgress = !!(onProgress || onPreview);
+	const request: MarkdownConversionRequest = { action: 'convertMarkdown', id, html, url, reportProgress, previewSize };
+
+	// Converting here is still chunked, so the calling thread isn't blocked for long
+	const convertHere = () => createMarkdownContentChunked(html, url, { signal, onProgress, onPreview, previewSize });
+
+	const onProgressMessage = (message: any) => {
+		if (message?.action === 'markdownConversionProgress' && message.id === id) {
+			const progressMessage = message as MarkdownConversionProgressMessage;
+			if (progressMessage.progress) {
+				onProgress?.(progressMessage.progress);
+			}
+			if (progressMessage.preview !== undefined) {
+				onPreview?.(progressMessage.preview);
+			}
+		}
+		return undefined;
+	};
+	if (reportProgress) {
+		browser.runtime.onMessage.addListener(onProgressMessage);
+	}
+
+	return new Promise<string>((resolve, reject) => {
+		const onAbort = () => {
+			reject(createAbortError());
+			browser.runtime.sendMessage({ action: 'cancelMarkdownConversion', id }).catch(() => {});
+		};
+		signal?.addEventListener('abort', onAbort);
+
+		browser.runtime.sendMessage(request)
+			.then((response: MarkdownConversionResponse | undefined) => {
+				if (response?.success) {
+					return response.markdown ?? '';
+				}
+				if (response?.cancelled) {
+					throw createAbortError();
+				}
+				if (response && !response.unsupported) {
+					throw new Error(response.error || 'Markdown conversion failed');
+				}
+				debugLog('Markdown', 'Off-thread conversion unavailable, converting here');
+				return convertHere();
+			}, (error) => {
+				debugLog('Markdown', 'Off-thread conversion failed, converting here:', error);
+				return convertHere();
+			})
+			.then(resolve, reject)
+			.finally(() => {
+				signal?.removeEventListener('abort', onAbort);
+				if (reportProgress) {
+					browser.runtime.onMessage.removeListener(onProgressMessage);
+				}
+			});
+	});
+}
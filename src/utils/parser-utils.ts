@@ -6,6 +6,8 @@ interface ParserState {
 	curlyDepth: number;
 	parenDepth: number;
 	escapeNext: boolean;
+	// Last character added to current, so checks don't need to scan the accumulated string
+	lastChar: string;
 }
 
 export function createParserState(initialCurrent: string = ''): ParserState {
@@ -16,11 +18,25 @@ export function createParserState(initialCurrent: string = ''): ParserState {
 		inRegex: false,
 		curlyDepth: 0,
 		parenDepth: 0,
-		escapeNext: false
+		escapeNext: false,
+		lastChar: initialCurrent.slice(-1)
 	};
 }
 
+/**
+ * Return the trimmed text accumulated so far and start a new segment.
+ */
+export function takeCurrent(state: ParserState): string {
+	const current = state.current.trim();
+	state.current = '';
+	state.lastChar = '';
+	return current;
+}
+
 export function processCharacter(char: string, state: ParserState): void {
+	const previousChar = state.lastChar;
+	state.lastChar = char;
+
 	if (state.escapeNext) {
 		state.current += char;
 		state.escapeNext = false;
@@ -43,7 +59,7 @@ export function processCharacter(char: string, state: ParserState): void {
 	}
 
 	if (char === '/' && !state.inQuote && !state.inRegex && 
-		(state.current.endsWith(':') || state.current.endsWith(','))) {
+		(previousChar === ':' || previousChar === ',')) {
 		state.inRegex = true;
 		state.current += char;
 		return;
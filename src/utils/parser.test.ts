@@ -1,6 +1,7 @@
 import { describe, test, expect } from 'vitest';
 import {
 	parse,
+	collectIdentifiers,
 	ASTNode,
 	TextNode,
 	VariableNode,
@@ -441,4 +442,15 @@ No posts found.
 		});
 	});
 
+
+	describe('Identifier Collection', () => {
+		test('collects identifiers from all node and expression types', () => {
+			const result = parse(
+				'{{title|replace:old}} {{selector:h1}} {% if not draft %}{% for t in tags %}{{t.name}}{% endfor %}{% endif %}{% set x = author ?? "anon" %}'
+			);
+			expect(result.errors).toHaveLength(0);
+			const names = collectIdentifiers(result.ast);
+			expect(names).toEqual(new Set(['title', 'old', 'selector:h1', 'draft', 'tags', 't.name', 'author']));
+		});
+	});
 });
@@ -1706,6 +1706,72 @@ export function validateVariables(ast: ASTNode[]): ParserError[] {
 	return warnings;
 }
 
+// ============================================================================
+// Identifier Collection
+// ============================================================================
+
+/**
+ * Collect the names of all identifiers referenced in the AST, including
+ * conditions, loop iterables, set values and filter arguments.
+ * Used to find out what a template reads before rendering it.
+ */
+export function collectIdentifiers(ast: ASTNode[]): Set<string> {
+	const names = new Set<string>();
+
+	function processExpression(expr: Expression): void {
+		switch (expr.type) {
+			case 'identifier':
+				names.add(expr.name);
+				break;
+			case 'filter':
+				processExpression(expr.value);
+				expr.args.forEach(processExpression);
+				break;
+			case 'binary':
+				processExpression(expr.left);
+				processExpression(expr.right);
+				break;
+			case 'unary':
+				processExpression(expr.argument);
+				break;
+			case 'member':
+				processExpression(expr.object);
+				processExpression(expr.property);
+				break;
+			case 'group':
+				processExpression(expr.expression);
+				break;
+		}
+	}
+
+	function processNode(node: ASTNode): void {
+		switch (node.type) {
+			case 'variable':
+				processExpression(node.expression);
+				break;
+			case 'set':
+				processExpression(node.value);
+				break;
+			case 'if':
+				processExpression(node.condition);
+				node.consequent.forEach(processNode);
+				node.elseifs.forEach(elseif => {
+					processExpression(elseif.condition);
+					elseif.body.forEach(processNode);
+				});
+				node.alternate?.forEach(processNode);
+				break;
+			case 'for':
+				processExpression(node.iterable);
+				node.body.forEach(processNode);
+				break;
+		}
+	}
+
+	ast.forEach(processNode);
+	return names;
+}
+
 // ============================================================================
 // Filter Validation
 // ============================================================================
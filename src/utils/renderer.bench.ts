@@ -0,0 +1,54 @@
+import { bench, describe } from 'vitest';
+import { parse } from './parser';
+import { renderAST, compileAST, RenderContext } from './renderer';
+
+// Run with: npm run bench
+
+function buildLargeTemplate(propertyCount: number): string {
+	const parts: string[] = ['---'];
+	for (let i = 0; i < propertyCount; i++) {
+		parts.push(`prop${i}: {{title|lower|trim}} {{author.name}} {{published ?? "unknown"}}`);
+	}
+	parts.push('---');
+	parts.push('# {{title}}');
+	parts.push('{% if highlights %}');
+	parts.push('{% for highlight in highlights %}');
+	parts.push('> {{highlight.text|trim}}');
+	parts.push('{% if highlight.notes %}{% for note in highlight.notes %}- {{note|upper}}{% endfor %}{% endif %}');
+	parts.push('{% endfor %}');
+	parts.push('{% endif %}');
+	parts.push('{{content}}');
+	return parts.join('\n');
+}
+
+function createContext(highlightCount: number): RenderContext {
+	const highlights = [];
+	for (let i = 0; i < highlightCount; i++) {
+		highlights.push({
+			text: `  Highlight number ${i} with some text  `,
+			notes: i % 3 === 0 ? [`note ${i}`, `another note ${i}`] : [],
+		});
+	}
+	return {
+		variables: {
+			'{{title}}': 'A Fairly Long Article Title',
+			'{{content}}': 'Lorem ipsum dolor sit amet. '.repeat(200),
+			author: { name: 'Jane Doe' },
+			highlights,
+		},
+		currentUrl: 'https://example.com/article',
+	};
+}
+
+const { ast } = parse(buildLargeTemplate(50));
+const compiled = compileAST(ast);
+
+describe('render large template (50 properties, 200 highlights)', () => {
+	bench('renderAST (tree walk)', async () => {
+		await renderAST(ast, createContext(200));
+	});
+
+	bench('compileAST (cached closures)', async () => {
+		await compiled(createContext(200));
+	});
+});
@@ -1,5 +1,6 @@
 import { describe, test, expect } from 'vitest';
-import { render, renderTemplate, RenderContext } from './renderer';
+import { render, renderAST, compileAST, renderTemplate, RenderContext } from './renderer';
+import { parse } from './parser';
 
 // Simple filter implementation for testing (direct invocation)
 function testApplyFilterDirect(value: string, filterName: string, _paramString: string | undefined, _currentUrl: string): string {
@@ -534,4 +535,75 @@ Tags:
 			expect(output).toBe('Hello World!');
 		});
 	});
+
+	describe('Compiled Templates', () => {
+		const templates = [
+			'Hello {{title|upper}}!',
+			'{{author.name}} {{items[1]}} {{missing}}',
+			'{% if count > 1 and show %}many{% elseif count == 1 %}one{% else %}none{% endif %}',
+			'{% for item in items %}{{loop.index}}/{{loop.length}} {{item|trim}}{% endfor %}',
+			'{% set slug = title|lower %}{{slug}} {{title ?? "none"}}',
+			'{{"summarize this"|title}} {{prompt:"tags"}} {{selector:h1}}',
+			'{{title|echo_param:fmt}} {{title|echo_param:"a","b"}} {{title|echo_param:x => x.name}}',
+			'A\n{% if show %}\n  B\n{% endif %}\nC {{ title }}',
+			'{{schema:genre}} {% for d in schema:director[*].name %}{{d}}{% endfor %}',
+		];
+
+		for (const template of templates) {
+			test(`matches renderAST: ${template}`, async () => {
+				const variables = () => ({
+					'{{title}}': ' Hello ',
+					author: { name: 'Jane' },
+					items: ['a', ' b ', 'c'],
+					count: 2,
+					show: true,
+					'{{schema:genre}}': 'Sci-Fi',
+					'{{schema:director}}': JSON.stringify([{ name: 'Nolan' }]),
+				});
+				const { ast } = parse(template);
+				const expected = await renderAST(ast, createContext(variables()));
+				const actual = await compileAST(ast)(createContext(variables()));
+				expect(actual).toEqual(expected);
+			});
+		}
+
+		test('compiling the same AST twice returns the same function', () => {
+			const { ast } = parse('{{title}}');
+			expect(compileAST(ast)).toBe(compileAST(ast));
+		});
+
+		test('compiled template can be rendered with different contexts', async () => {
+			const { ast } = parse('{{title|lower}}');
+			const compiled = compileAST(ast);
+			expect((await compiled(createContext({ title: 'ONE' }))).output).toBe('one');
+			expect((await compiled(createContext({ title: 'TWO' }))).output).toBe('two');
+		});
+
+		test('resolves selectors nested in sync subtrees through the async resolver', async () => {
+			const resolved: string[] = [];
+			const ctx: RenderContext = {
+				...createContext({ items: ['a', 'b'], title: 'T' }),
+				asyncResolver: async (name) => {
+					resolved.push(name);
+					return ['x', 'y'];
+				},
+			};
+			const result = await render(
+				'{{title}}-{% for item in items %}{{item}}{% endfor %}-{% for s in selector:li %}{{s|upper}}{% endfor %}',
+				ctx
+			);
+			expect(result.errors).toHaveLength(0);
+			expect(result.output).toBe('T-a\nb-X\nY');
+			expect(resolved).toEqual(['selector:li']);
+		});
+
+		test('custom filters may return promises', async () => {
+			const ctx: RenderContext = {
+				...createContext({ title: 'hello' }),
+				filters: { shout: async (value: string) => `${value}!` },
+			};
+			const result = await render('{{title|shout}}', ctx);
+			expect(result.output).toBe('hello!');
+		});
+	});
 });
@@ -22,16 +22,15 @@ import {
 	UnaryExpression,
 	FilterExpression,
 	MemberExpression,
-	parse,
 } from './parser';
-import { applyFilterDirect as builtInApplyFilterDirect } from './filters';
+import { applyFilterValue, stringifyFilterValue } from './filters';
+import type { FilterValue } from '../types/types';
+import { parseCached } from './template-cache';
+import { extendVariables } from './lazy-variables';
 
 // Filter application function type for direct invocation (already-parsed filter name and params)
 type ApplyFilterDirectFn = (value: string, filterName: string, paramString: string | undefined, currentUrl: string) => string;
 
-// Default filter implementation using the built-in filters
-const defaultApplyFilterDirect: ApplyFilterDirectFn = builtInApplyFilterDirect;
-
 // ============================================================================
 // Render Context
 // ============================================================================
@@ -60,7 +59,7 @@ export interface RenderContext {
 	/** Custom filter functions (optional, merged with built-in filters) */
 	filters?: Record<string, (...args: any[]) => any>;
 
-	/** Custom applyFilterDirect implementation (optional, uses built-in if not provided) */
+	/** Custom string based applyFilterDirect implementation (optional, built-in filters pass native values along a chain) */
 	applyFilterDirect?: ApplyFilterDirectFn;
 }
 
@@ -105,7 +104,7 @@ export async function render(
 	context: RenderContext,
 	options: RenderOptions = {}
 ): Promise<RenderResult> {
-	const parseResult = parse(template);
+	const parseResult = parseCached(template);
 
 	if (parseResult.errors.length > 0) {
 		return {
@@ -119,11 +118,12 @@ export async function render(
 		};
 	}
 
-	return renderAST(parseResult.ast, context, options);
+	return compileAST(parseResult.ast)(context, options);
 }
 
 /**
- * Render an AST directly (for when you already have parsed AST).
+ * Render an AST directly by walking it (for when you already have parsed AST).
+ * Templates rendered repeatedly should use compileAST instead.
  */
 export async function renderAST(
 	ast: ASTNode[],
@@ -380,12 +380,11 @@ async function renderFor(node: ForNode, state: RenderState): Promise<string> {
 			// Create new context with loop variables
 			const loopContext: RenderContext = {
 				...state.context,
-				variables: {
-					...state.context.variables,
+				variables: extendVariables(state.context.variables, {
 					[node.iterator]: item,
 					[`${node.iterator}_index`]: i,  // Keep for backwards compatibility
 					loop,
-				},
+				}),
 			};
 
 			const loopState: RenderState = {
@@ -449,8 +448,16 @@ async function renderNodes(nodes: ASTNode[], state: RenderState): Promise<string
  * Handles both trimLeft (trim trailing from previous) and trimRight (trim leading from current).
  */
 function appendNodeOutput(output: string, nodeOutput: string, node: ASTNode, state: RenderState): string {
+	return appendOutput(output, nodeOutput, hasTrimLeft(node), state);
+}
+
+function hasTrimLeft(node: ASTNode): boolean {
+	return 'trimLeft' in node && !!(node as any).trimLeft;
+}
+
+function appendOutput(output: string, nodeOutput: string, trimLeft: boolean, state: RenderState): string {
 	// Handle trimLeft - trim trailing whitespace from previous output
-	if ('trimLeft' in node && (node as any).trimLeft && output.length > 0) {
+	if (trimLeft && output.length > 0) {
 		output = trimTrailingWhitespace(output);
 	}
 
@@ -536,7 +543,10 @@ async function evaluateIdentifier(expr: IdentifierExpression, state: RenderState
 async function evaluateMember(expr: MemberExpression, state: RenderState): Promise<any> {
 	const object = await evaluateExpression(expr.object, state);
 	const property = await evaluateExpression(expr.property, state);
+	return readMember(object, property);
+}
 
+function readMember(object: any, property: any): any {
 	if (object === undefined || object === null) {
 		return undefined;
 	}
@@ -573,27 +583,38 @@ async function evaluateBinary(expr: BinaryExpression, state: RenderState): Promi
 	const left = await evaluateExpression(expr.left, state);
 	const right = await evaluateExpression(expr.right, state);
 
-	switch (expr.operator) {
+	const operator = getBinaryOperator(expr.operator);
+	if (!operator) {
+		throw new Error(`Unknown binary operator: ${expr.operator}`);
+	}
+	return operator(left, right);
+}
+
+/**
+ * Look up the implementation of a (non short-circuiting) binary operator.
+ */
+function getBinaryOperator(operator: string): ((left: any, right: any) => any) | null {
+	switch (operator) {
 		case '==':
-			return left == right;
+			return (left, right) => left == right;
 		case '!=':
-			return left != right;
+			return (left, right) => left != right;
 		case '>':
-			return left > right;
+			return (left, right) => left > right;
 		case '<':
-			return left < right;
+			return (left, right) => left < right;
 		case '>=':
-			return left >= right;
+			return (left, right) => left >= right;
 		case '<=':
-			return left <= right;
+			return (left, right) => left <= right;
 		case 'contains':
-			return evaluateContains(left, right);
+			return evaluateContains;
 		case 'and':
-			return isTruthy(left) && isTruthy(right);
+			return (left, right) => isTruthy(left) && isTruthy(right);
 		case 'or':
-			return isTruthy(left) || isTruthy(right);
+			return (left, right) => isTruthy(left) || isTruthy(right);
 		default:
-			throw new Error(`Unknown binary operator: ${expr.operator}`);
+			return null;
 	}
 }
 
@@ -609,9 +630,35 @@ async function evaluateUnary(expr: UnaryExpression, state: RenderState): Promise
 }
 
 async function evaluateFilter(expr: FilterExpression, state: RenderState): Promise<any> {
-	const value = await evaluateExpression(expr.value, state);
+	// Check for custom filters first
+	if (isCustomFilter(expr, state)) {
+		const value = await evaluateExpression(expr.value, state);
+		const args = await evaluateFilterArgs(expr, state);
+		return state.context.filters![expr.name](value, ...args);
+	}
+
+	// Built-in filter chains pass native values between filters and are serialized once at the end
+	return stringifyFilterValue(await evaluateFilterValue(expr, state));
+}
+
+function isCustomFilter(expr: FilterExpression, state: RenderState): boolean {
+	return !!(state.context.filters && state.context.filters[expr.name]);
+}
+
+async function evaluateFilterValue(expr: FilterExpression, state: RenderState): Promise<FilterValue> {
+	const value = expr.value.type === 'filter' && !isCustomFilter(expr.value, state)
+		? await evaluateFilterValue(expr.value, state)
+		: await evaluateExpression(expr.value, state);
+	const args = await evaluateFilterArgs(expr, state);
+
+	// Build parameter string from args (already parsed by AST)
+	// This avoids the round-trip of building "filterName:args" then re-parsing it
+	const paramString = formatFilterParams(args);
 
-	// Evaluate filter arguments
+	return applyBuiltInFilter(state, value, expr.name, paramString);
+}
+
+async function evaluateFilterArgs(expr: FilterExpression, state: RenderState): Promise<any[]> {
 	const args: any[] = [];
 	for (const arg of expr.args) {
 		let argValue = await evaluateExpression(arg, state);
@@ -622,43 +669,45 @@ async function evaluateFilter(expr: FilterExpression, state: RenderState): Promi
 		}
 		args.push(argValue);
 	}
+	return args;
+}
 
-	// Check for custom filters first
-	if (state.context.filters && state.context.filters[expr.name]) {
-		return state.context.filters[expr.name](value, ...args);
+/**
+ * Apply a built-in filter, or the context's string based applyFilterDirect if set.
+ */
+function applyBuiltInFilter(state: RenderState, value: any, name: string, paramString: string | undefined): FilterValue {
+	if (state.context.applyFilterDirect) {
+		return state.context.applyFilterDirect(valueToString(value), name, paramString, state.context.currentUrl);
 	}
+	return applyFilterValue(value, name, paramString, state.context.currentUrl);
+}
 
-	const stringValue = valueToString(value);
-
-	// Build parameter string from args (already parsed by AST)
-	// This avoids the round-trip of building "filterName:args" then re-parsing it
-	let paramString: string | undefined;
-	if (args.length > 0) {
-		const formattedArgs = args.map(a => {
-			if (typeof a === 'string') {
-				// Don't double-quote strings that are already quoted
-				if (isQuotedString(a)) {
-					return a;
-				}
-				// Don't quote arrow function expressions (e.g., map:item => item.name)
-				if (/\s*\w+\s*=>/.test(a)) {
-					return a;
-				}
-				// Don't quote simple values that don't need quoting
-				// e.g., "3:4", "2n", "abc" should stay unquoted
-				if (/^[\w.:+\-*/]+$/.test(a)) {
-					return a;
-				}
-				return `"${a}"`;
-			}
-			return String(a);
-		});
-		paramString = formattedArgs.join(',');
+/**
+ * Format evaluated filter arguments as the parameter string expected by applyFilterDirect.
+ */
+function formatFilterParams(args: any[]): string | undefined {
+	if (args.length === 0) {
+		return undefined;
 	}
-
-	// Use direct filter invocation (optimized path - no re-parsing needed)
-	const applyFilterDirectFn = state.context.applyFilterDirect || defaultApplyFilterDirect;
-	return applyFilterDirectFn(stringValue, expr.name, paramString, state.context.currentUrl);
+	return args.map(a => {
+		if (typeof a === 'string') {
+			// Don't double-quote strings that are already quoted
+			if (isQuotedString(a)) {
+				return a;
+			}
+			// Don't quote arrow function expressions (e.g., map:item => item.name)
+			if (/\s*\w+\s*=>/.test(a)) {
+				return a;
+			}
+			// Don't quote simple values that don't need quoting
+			// e.g., "3:4", "2n", "abc" should stay unquoted
+			if (/^[\w.:+\-*/]+$/.test(a)) {
+				return a;
+			}
+			return `"${a}"`;
+		}
+		return String(a);
+	}).join(',');
 }
 
 function evaluateContains(left: any, right: any): boolean {
@@ -684,6 +733,713 @@ function evaluateContains(left: any, right: any): boolean {
 	return false;
 }
 
+// ============================================================================
+// Compilation
+// ============================================================================
+//
+// compileAST turns a parsed AST into a tree of pre-bound closures. Everything
+// that only depends on the template is resolved once at compile time: node and
+// expression dispatch, operator lookup, literal filter arguments, variable key
+// paths and prompt reconstruction. Rendering a compiled template only does
+// value work. Output must stay identical to renderAST.
+//
+// Only selector identifiers can reach the async resolver, so every compiled
+// node and expression records whether its subtree contains one. Subtrees that
+// don't are compiled to plain synchronous closures; the async closures (and
+// their promise/microtask overhead) are only used on the path to a selector.
+
+/**
+ * A template compiled by compileAST, ready to be rendered repeatedly.
+ */
+export type CompiledTemplate = (context: RenderContext, options?: RenderOptions) => Promise<RenderResult>;
+
+interface CompiledExpression {
+	/** True if evaluation may await the async resolver; evaluate then returns a Promise */
+	async: boolean;
+	evaluate: (state: RenderState) => any;
+}
+
+interface CompiledNode {
+	/** True if rendering may await the async resolver; render then returns a Promise */
+	async: boolean;
+	render: (state: RenderState) => string | Promise<string>;
+}
+
+interface CompiledNodes {
+	async: boolean;
+	render: (state: RenderState) => string | Promise<string>;
+}
+
+// Keyed by AST identity, so ASTs shared through the parse cache compile once
+const compiledTemplates = new WeakMap<ASTNode[], CompiledTemplate>();
+
+/**
+ * Compile an AST into a reusable render function.
+ * Compiling the same AST array twice returns the same function.
+ *
+ * Custom filters (context.filters) may return promises, which the synchronous
+ * fast path can't await, so contexts that provide them fall back to renderAST.
+ */
+export function compileAST(ast: ASTNode[]): CompiledTemplate {
+	const cached = compiledTemplates.get(ast);
+	if (cached) {
+		return cached;
+	}
+
+	const body = compileNodes(ast);
+	const compiled: CompiledTemplate = async (context, options = {}) => {
+		if (context.filters) {
+			return renderAST(ast, context, options);
+		}
+
+		const errors: RenderError[] = [];
+		const state: RenderState = {
+			context,
+			errors,
+			pendingTrimRight: false,
+			hasDeferredVariables: false,
+		};
+
+		let output = body.async ? await body.render(state) : body.render(state) as string;
+
+		if (options.trimOutput) {
+			output = output.trim();
+		}
+
+		return { output, errors, hasDeferredVariables: state.hasDeferredVariables };
+	};
+
+	compiledTemplates.set(ast, compiled);
+	return compiled;
+}
+
+function compileNodes(nodes: ASTNode[]): CompiledNodes {
+	const children = nodes.map(compileNode);
+	const renderers = children.map(child => child.render);
+	const trimLefts = nodes.map(hasTrimLeft);
+
+	if (!children.some(child => child.async)) {
+		return {
+			async: false,
+			render: (state) => {
+				let output = '';
+				for (let i = 0; i < renderers.length; i++) {
+					output = appendOutput(output, renderers[i](state) as string, trimLefts[i], state);
+				}
+				return output;
+			},
+		};
+	}
+
+	const asyncFlags = children.map(child => child.async);
+	return {
+		async: true,
+		render: async (state) => {
+			let output = '';
+			for (let i = 0; i < renderers.length; i++) {
+				const nodeOutput = asyncFlags[i] ? await renderers[i](state) : renderers[i](state) as string;
+				output = appendOutput(output, nodeOutput, trimLefts[i], state);
+			}
+			return output;
+		},
+	};
+}
+
+function compileNode(node: ASTNode): CompiledNode {
+	switch (node.type) {
+		case 'text':
+			return { async: false, render: (state) => renderText(node, state) };
+		case 'variable':
+			return compileVariable(node);
+		case 'if':
+			return compileIf(node);
+		case 'for':
+			return compileFor(node);
+		case 'set':
+			return compileSet(node);
+		default: {
+			const type = (node as any).type;
+			return {
+				async: false,
+				render: (state) => {
+					state.errors.push({
+						message: `Unknown node type: ${type}`,
+					});
+					return '';
+				},
+			};
+		}
+	}
+}
+
+function compileVariable(node: VariableNode): CompiledNode {
+	// Prompts are preserved verbatim for the post-processor, see renderVariable
+	if (getPromptBase(node.expression)) {
+		const reconstructed = reconstructPromptTemplate(node.expression);
+		return {
+			async: false,
+			render: (state) => {
+				if (node.trimRight) {
+					state.pendingTrimRight = true;
+				}
+				state.hasDeferredVariables = true;
+				return reconstructed;
+			},
+		};
+	}
+
+	const expression = compileExpression(node.expression);
+	const evaluate = expression.evaluate;
+
+	const finish = (state: RenderState, value: any): string => {
+		const result = valueToString(value);
+		if (node.trimRight) {
+			state.pendingTrimRight = true;
+		}
+		return result;
+	};
+
+	const fail = (state: RenderState, error: unknown): string => {
+		state.errors.push({
+			message: `Error evaluating variable: ${error}`,
+			line: node.line,
+			column: node.column,
+		});
+		return '';
+	};
+
+	if (!expression.async) {
+		return {
+			async: false,
+			render: (state) => {
+				try {
+					return finish(state, evaluate(state));
+				} catch (error) {
+					return fail(state, error);
+				}
+			},
+		};
+	}
+
+	return {
+		async: true,
+		render: async (state) => {
+			try {
+				return finish(state, await evaluate(state));
+			} catch (error) {
+				return fail(state, error);
+			}
+		},
+	};
+}
+
+function compileIf(node: IfNode): CompiledNode {
+	const condition = compileExpression(node.condition);
+	const consequent = compileNodes(node.consequent);
+	const elseifs = node.elseifs.map(elseif => ({
+		condition: compileExpression(elseif.condition),
+		body: compileNodes(elseif.body),
+	}));
+	const alternate = node.alternate ? compileNodes(node.alternate) : null;
+
+	const fail = (state: RenderState, error: unknown): string => {
+		state.errors.push({
+			message: `Error evaluating if condition: ${error}`,
+			line: node.line,
+			column: node.column,
+		});
+		return '';
+	};
+
+	const isAsync = condition.async || consequent.async || (alternate !== null && alternate.async) ||
+		elseifs.some(elseif => elseif.condition.async || elseif.body.async);
+
+	if (!isAsync) {
+		return {
+			async: false,
+			render: (state) => {
+				try {
+					if (isTruthy(condition.evaluate(state))) {
+						const result = consequent.render(state) as string;
+						if (node.trimRight) {
+							state.pendingTrimRight = true;
+						}
+						return result;
+					}
+
+					for (const elseif of elseifs) {
+						if (isTruthy(elseif.condition.evaluate(state))) {
+							return elseif.body.render(state);
+						}
+					}
+
+					if (alternate) {
+						return alternate.render(state);
+					}
+
+					if (node.trimRight) {
+						state.pendingTrimRight = true;
+					}
+
+					return '';
+				} catch (error) {
+					return fail(state, error);
+				}
+			},
+		};
+	}
+
+	return {
+		async: true,
+		render: async (state) => {
+			try {
+				if (isTruthy(await condition.evaluate(state))) {
+					const result = await consequent.render(state);
+					if (node.trimRight) {
+						state.pendingTrimRight = true;
+					}
+					return result;
+				}
+
+				for (const elseif of elseifs) {
+					if (isTruthy(await elseif.condition.evaluate(state))) {
+						return elseif.body.render(state);
+					}
+				}
+
+				if (alternate) {
+					return alternate.render(state);
+				}
+
+				if (node.trimRight) {
+					state.pendingTrimRight = true;
+				}
+
+				return '';
+			} catch (error) {
+				return fail(state, error);
+			}
+		},
+	};
+}
+
+function compileFor(node: ForNode): CompiledNode {
+	const iterable = compileExpression(node.iterable);
+	const body = compileNodes(node.body);
+	const indexKey = `${node.iterator}_index`;
+
+	const fail = (state: RenderState, error: unknown): string => {
+		state.errors.push({
+			message: `Error in for loop: ${error}`,
+			line: node.line,
+			column: node.column,
+		});
+		return '';
+	};
+
+	// Returns the array to iterate, or null when the loop renders nothing
+	const checkIterable = (state: RenderState, iterableValue: any): any[] | null => {
+		// Silently handle undefined/null - this is expected when optional data doesn't exist
+		if (iterableValue === undefined || iterableValue === null) {
+			if (node.trimRight) {
+				state.pendingTrimRight = true;
+			}
+			return null;
+		}
+
+		if (!Array.isArray(iterableValue)) {
+			state.errors.push({
+				message: `For loop iterable is not an array: ${typeof iterableValue}`,
+				line: node.line,
+				column: node.column,
+			});
+			if (node.trimRight) {
+				state.pendingTrimRight = true;
+			}
+			return null;
+		}
+
+		return iterableValue;
+	};
+
+	const createLoopState = (state: RenderState, items: any[], i: number): RenderState => {
+		const length = items.length;
+		const loop = {
+			index: i + 1,
+			index0: i,
+			first: i === 0,
+			last: i === length - 1,
+			length: length,
+		};
+
+		return {
+			...state,
+			context: {
+				...state.context,
+				variables: extendVariables(state.context.variables, {
+					[node.iterator]: items[i],
+					[indexKey]: i,
+					loop,
+				}),
+			},
+		};
+	};
+
+	const finish = (state: RenderState, results: string[]): string => {
+		if (node.trimRight) {
+			state.pendingTrimRight = true;
+		}
+		return results.join('\n');
+	};
+
+	if (!iterable.async && !body.async) {
+		return {
+			async: false,
+			render: (state) => {
+				try {
+					const items = checkIterable(state, iterable.evaluate(state));
+					if (!items) {
+						return '';
+					}
+
+					const results: string[] = [];
+					for (let i = 0; i < items.length; i++) {
+						const itemResult = body.render(createLoopState(state, items, i)) as string;
+						results.push(itemResult.trim());
+					}
+
+					return finish(state, results);
+				} catch (error) {
+					return fail(state, error);
+				}
+			},
+		};
+	}
+
+	return {
+		async: true,
+		render: async (state) => {
+			try {
+				const items = checkIterable(state, await iterable.evaluate(state));
+				if (!items) {
+					return '';
+				}
+
+				const results: string[] = [];
+				for (let i = 0; i < items.length; i++) {
+					const itemResult = await body.render(createLoopState(state, items, i));
+					results.push(itemResult.trim());
+				}
+
+				return finish(state, results);
+			} catch (error) {
+				return fail(state, error);
+			}
+		},
+	};
+}
+
+function compileSet(node: SetNode): CompiledNode {
+	const value = compileExpression(node.value);
+
+	const assign = (state: RenderState, result: any): string => {
+		// Set the variable in the context (mutates the context)
+		state.context.variables[node.variable] = result;
+		if (node.trimRight) {
+			state.pendingTrimRight = true;
+		}
+		// Set produces no output
+		return '';
+	};
+
+	const fail = (state: RenderState, error: unknown): string => {
+		state.errors.push({
+			message: `Error in set: ${error}`,
+			line: node.line,
+			column: node.column,
+		});
+		return '';
+	};
+
+	if (!value.async) {
+		return {
+			async: false,
+			render: (state) => {
+				try {
+					return assign(state, value.evaluate(state));
+				} catch (error) {
+					return fail(state, error);
+				}
+			},
+		};
+	}
+
+	return {
+		async: true,
+		render: async (state) => {
+			try {
+				return assign(state, await value.evaluate(state));
+			} catch (error) {
+				return fail(state, error);
+			}
+		},
+	};
+}
+
+function compileExpression(expr: Expression): CompiledExpression {
+	switch (expr.type) {
+		case 'literal': {
+			const value = expr.value;
+			return { async: false, evaluate: () => value };
+		}
+
+		case 'identifier':
+			return compileIdentifier(expr);
+
+		case 'binary':
+			return compileBinary(expr);
+
+		case 'unary':
+			return compileUnary(expr);
+
+		case 'filter':
+			return compileFilter(expr);
+
+		case 'group':
+			return compileExpression(expr.expression);
+
+		case 'member':
+			return compileMember(expr);
+
+		default: {
+			const type = (expr as any).type;
+			return {
+				async: false,
+				evaluate: () => {
+					throw new Error(`Unknown expression type: ${type}`);
+				},
+			};
+		}
+	}
+}
+
+function compileIdentifier(expr: IdentifierExpression): CompiledExpression {
+	const name = expr.name;
+	const placeholder = `{{${name}}}`;
+
+	// The only identifiers that can reach the async resolver
+	if (name.startsWith('selector:') || name.startsWith('selectorHtml:')) {
+		return {
+			async: true,
+			evaluate: async (state) => {
+				if (state.context.asyncResolver) {
+					return state.context.asyncResolver(name, state.context);
+				}
+				state.hasDeferredVariables = true;
+				return placeholder;
+			},
+		};
+	}
+
+	if (name.startsWith('schema:')) {
+		return { async: false, evaluate: (state) => resolveSchemaVariable(name, state.context.variables) };
+	}
+
+	if (name.startsWith('prompt:') || name.startsWith('"')) {
+		return {
+			async: false,
+			evaluate: (state) => {
+				state.hasDeferredVariables = true;
+				return placeholder;
+			},
+		};
+	}
+
+	// Same lookup order as resolveVariable, with keys and path prepared once
+	const trimmed = name.trim();
+	const wrappedKey = `{{${trimmed}}}`;
+	const path = trimmed.includes('.') ? compilePath(trimmed) : null;
+
+	return {
+		async: false,
+		evaluate: (state) => {
+			const variables = state.context.variables;
+			const wrappedValue = variables[wrappedKey];
+			if (wrappedValue !== undefined) {
+				return wrappedValue;
+			}
+			if (variables[trimmed] !== undefined) {
+				return variables[trimmed];
+			}
+			return path ? readPath(variables, path) : undefined;
+		},
+	};
+}
+
+function compileMember(expr: MemberExpression): CompiledExpression {
+	const object = compileExpression(expr.object);
+	const property = compileExpression(expr.property);
+
+	if (!object.async && !property.async) {
+		return {
+			async: false,
+			evaluate: (state) => {
+				const objectValue = object.evaluate(state);
+				return readMember(objectValue, property.evaluate(state));
+			},
+		};
+	}
+
+	return {
+		async: true,
+		evaluate: async (state) => {
+			const objectValue = await object.evaluate(state);
+			const propertyValue = await property.evaluate(state);
+			return readMember(objectValue, propertyValue);
+		},
+	};
+}
+
+function compileBinary(expr: BinaryExpression): CompiledExpression {
+	const left = compileExpression(expr.left);
+	const right = compileExpression(expr.right);
+	const isAsync = left.async || right.async;
+
+	// Nullish coalescing short-circuits, so it can't go through getBinaryOperator
+	if (expr.operator === '??') {
+		if (!isAsync) {
+			return {
+				async: false,
+				evaluate: (state) => {
+					const leftValue = left.evaluate(state);
+					return isTruthy(leftValue) ? leftValue : right.evaluate(state);
+				},
+			};
+		}
+		return {
+			async: true,
+			evaluate: async (state) => {
+				const leftValue = await left.evaluate(state);
+				return isTruthy(leftValue) ? leftValue : right.evaluate(state);
+			},
+		};
+	}
+
+	const operatorName = expr.operator;
+	const operator = getBinaryOperator(operatorName);
+	const apply = (leftValue: any, rightValue: any): any => {
+		if (!operator) {
+			throw new Error(`Unknown binary operator: ${operatorName}`);
+		}
+		return operator(leftValue, rightValue);
+	};
+
+	if (!isAsync) {
+		return {
+			async: false,
+			evaluate: (state) => {
+				const leftValue = left.evaluate(state);
+				return apply(leftValue, right.evaluate(state));
+			},
+		};
+	}
+
+	return {
+		async: true,
+		evaluate: async (state) => {
+			const leftValue = await left.evaluate(state);
+			const rightValue = await right.evaluate(state);
+			return apply(leftValue, rightValue);
+		},
+	};
+}
+
+function compileUnary(expr: UnaryExpression): CompiledExpression {
+	const argument = compileExpression(expr.argument);
+	const operator = expr.operator;
+
+	const apply = (value: any): boolean => {
+		if (operator === 'not') {
+			return !isTruthy(value);
+		}
+		throw new Error(`Unknown unary operator: ${operator}`);
+	};
+
+	if (!argument.async) {
+		return { async: false, evaluate: (state) => apply(argument.evaluate(state)) };
+	}
+
+	return { async: true, evaluate: async (state) => apply(await argument.evaluate(state)) };
+}
+
+function compileFilter(expr: FilterExpression): CompiledExpression {
+	// Built-in filter chains pass native values between filters and are serialized once at the end
+	const chain = compileFilterValue(expr);
+
+	if (!chain.async) {
+		return { async: false, evaluate: (state) => stringifyFilterValue(chain.evaluate(state)) };
+	}
+
+	return { async: true, evaluate: async (state) => stringifyFilterValue(await chain.evaluate(state)) };
+}
+
+function compileFilterValue(expr: FilterExpression): CompiledExpression {
+	const name = expr.name;
+	const value = expr.value.type === 'filter' ? compileFilterValue(expr.value) : compileExpression(expr.value);
+
+	// Literal-only arguments (the common case: date:"YYYY-MM-DD", join:", ")
+	// are formatted into the parameter string once
+	const literalArgs = expr.args.every(arg => arg.type === 'literal')
+		? expr.args.map(arg => (arg as LiteralExpression).value)
+		: null;
+	const literalParamString = literalArgs ? formatFilterParams(literalArgs) : undefined;
+
+	const args = expr.args.map(compileExpression);
+	// Identifiers that resolve to undefined fall back to their name, see evaluateFilter
+	const fallbacks = expr.args.map(arg => arg.type === 'identifier' ? arg.name : undefined);
+
+	// Custom filters never reach compiled templates (see compileAST), so only
+	// the built-in filter path is needed here
+	const apply = (state: RenderState, inputValue: any, argValues: any[] | null): FilterValue => {
+		const paramString = argValues ? formatFilterParams(argValues) : literalParamString;
+		return applyBuiltInFilter(state, inputValue, name, paramString);
+	};
+
+	if (!value.async && !args.some(arg => arg.async)) {
+		return {
+			async: false,
+			evaluate: (state) => {
+				const inputValue = value.evaluate(state);
+				if (literalArgs) {
+					return apply(state, inputValue, null);
+				}
+				const argValues: any[] = [];
+				for (let i = 0; i < args.length; i++) {
+					const argValue = args[i].evaluate(state);
+					argValues.push(argValue === undefined && fallbacks[i] !== undefined ? fallbacks[i] : argValue);
+				}
+				return apply(state, inputValue, argValues);
+			},
+		};
+	}
+
+	return {
+		async: true,
+		evaluate: async (state) => {
+			const inputValue = await value.evaluate(state);
+			if (literalArgs) {
+				return apply(state, inputValue, null);
+			}
+			const argValues: any[] = [];
+			for (let i = 0; i < args.length; i++) {
+				const argValue = await args[i].evaluate(state);
+				argValues.push(argValue === undefined && fallbacks[i] !== undefined ? fallbacks[i] : argValue);
+			}
+			return apply(state, inputValue, argValues);
+		},
+	};
+}
+
 // ============================================================================
 // Variable Resolution
 // ============================================================================
@@ -798,36 +1554,64 @@ function resolveVariable(name: string, variables: Record<string, any>): any {
 
 function getNestedValue(obj: any, path: string): any {
 	if (!path || !obj) return undefined;
+	return readPath(obj, compilePath(path));
+}
 
-	const keys = path.split('.');
-	let value = obj;
-
-	for (const key of keys) {
-		if (value === undefined || value === null) return undefined;
+/**
+ * A pre-parsed segment of a dotted variable path.
+ * Bracket segments (items[0], obj["key"]) keep both the numeric index and the
+ * unquoted key so array and object access can be decided at lookup time.
+ */
+type PathSegment =
+	| { bracket: false; key: string; wrappedKey: string }
+	| { bracket: true; arrayKey: string; index: number; objectKey: string };
 
+/**
+ * Split a dotted path (author.name, items[0].title) into segments once,
+ * so repeated lookups don't re-split or re-run the bracket regex.
+ */
+function compilePath(path: string): PathSegment[] {
+	return path.split('.').map((key): PathSegment => {
 		// Handle bracket notation: items[0]
 		if (key.includes('[') && key.includes(']')) {
 			const match = key.match(/^([^\[]*)\[([^\]]+)\]/);
 			if (match) {
 				const [, arrayKey, indexStr] = match;
-				const baseValue = arrayKey ? value[arrayKey] : value;
-				if (Array.isArray(baseValue)) {
-					const index = parseInt(indexStr, 10);
-					value = baseValue[index];
-				} else if (baseValue && typeof baseValue === 'object') {
-					value = baseValue[indexStr.replace(/^["']|["']$/g, '')];
-				} else {
-					return undefined;
-				}
-				continue;
+				return {
+					bracket: true,
+					arrayKey,
+					index: parseInt(indexStr, 10),
+					objectKey: indexStr.replace(/^["']|["']$/g, ''),
+				};
+			}
+		}
+		return { bracket: false, key, wrappedKey: `{{${key}}}` };
+	});
+}
+
+function readPath(obj: any, segments: PathSegment[]): any {
+	let value = obj;
+
+	for (const segment of segments) {
+		if (value === undefined || value === null) return undefined;
+
+		if (segment.bracket) {
+			const baseValue = segment.arrayKey ? value[segment.arrayKey] : value;
+			if (Array.isArray(baseValue)) {
+				value = baseValue[segment.index];
+			} else if (baseValue && typeof baseValue === 'object') {
+				value = baseValue[segment.objectKey];
+			} else {
+				return undefined;
 			}
+			continue;
 		}
 
 		// Try wrapped key first
-		if (value[`{{${key}}}`] !== undefined) {
-			value = value[`{{${key}}}`];
+		if (value[segment.wrappedKey] !== undefined) {
+			value = value[segment.wrappedKey];
 		} else {
-			value = value[key];
+			value = value[segment.key];
 		}
 	}
 
@@ -134,30 +134,17 @@ export function makeUrlAbsolute(element: Element, attributeName: string, baseUrl
 	}
 }
 
-export function processUrls(htmlContent: string, baseUrl: URL): string {
-	const parser = new DOMParser();
-	const doc = parser.parseFromString(htmlContent, 'text/html');
-	
-	// Handle relative URLs for images, links, videos, and audio embeds.
-	doc.querySelectorAll('img').forEach(img => makeUrlAbsolute(img, 'srcset', baseUrl));
-	doc.querySelectorAll('img').forEach(img => makeUrlAbsolute(img, 'src', baseUrl));
-	doc.querySelectorAll('a').forEach(link => makeUrlAbsolute(link, 'href', baseUrl));
-	doc.querySelectorAll('video').forEach(video => makeUrlAbsolute(video, 'src', baseUrl));
-	doc.querySelectorAll('audio').forEach(audio => makeUrlAbsolute(audio, 'src', baseUrl));
-	doc.querySelectorAll(':is(video, audio) :is(source, track)').forEach(sourceOrTrack => makeUrlAbsolute(sourceOrTrack, 'src', baseUrl));
-	
-	// Serialize back to HTML
-	const serializer = new XMLSerializer();
-	let result = '';
-	Array.from(doc.body.childNodes).forEach(node => {
-		if (node.nodeType === Node.ELEMENT_NODE) {
-			result += serializer.serializeToString(node);
-		} else if (node.nodeType === Node.TEXT_NODE) {
-			result += node.textContent;
-		}
-	});
-	
-	return result;
+/**
+ * Make relative URLs of images, links, videos and audio embeds absolute.
+ * Works on an already parsed tree, which is modified in place.
+ */
+export function makeUrlsAbsolute(root: ParentNode, baseUrl: URL): void {
+	root.querySelectorAll('img').forEach(img => makeUrlAbsolute(img, 'srcset', baseUrl));
+	root.querySelectorAll('img').forEach(img => makeUrlAbsolute(img, 'src', baseUrl));
+	root.querySelectorAll('a').forEach(link => makeUrlAbsolute(link, 'href', baseUrl));
+	root.querySelectorAll('video').forEach(video => makeUrlAbsolute(video, 'src', baseUrl));
+	root.querySelectorAll('audio').forEach(audio => makeUrlAbsolute(audio, 'src', baseUrl));
+	root.querySelectorAll(':is(video, audio) :is(source, track)').forEach(sourceOrTrack => makeUrlAbsolute(sourceOrTrack, 'src', baseUrl));
 }
 
 export function formatDuration(ms: number): string {
@@ -0,0 +1,44 @@
+import { describe, test, expect, beforeEach } from 'vitest';
+import { parseCached, getTemplateCacheStats, clearTemplateCache } from './template-cache';
+import { render } from './renderer';
+
+describe('Template cache', () => {
+	beforeEach(() => {
+		clearTemplateCache();
+	});
+
+	test('returns the same parse result for identical source', () => {
+		const first = parseCached('{{title|lower}}');
+		const second = parseCached('{{title|lower}}');
+		expect(second).toBe(first);
+		expect(getTemplateCacheStats()).toMatchObject({ hits: 1, misses: 1, size: 1 });
+	});
+
+	test('parses different source separately', () => {
+		const first = parseCached('{{title}}');
+		const second = parseCached('{{url}}');
+		expect(second).not.toBe(first);
+		expect(getTemplateCacheStats()).toMatchObject({ hits: 0, misses: 2, size: 2 });
+	});
+
+	test('caches parse errors', () => {
+		const first = parseCached('{% if x %}unclosed');
+		const second = parseCached('{% if x %}unclosed');
+		expect(first.errors.length).toBeGreaterThan(0);
+		expect(second).toBe(first);
+	});
+
+	test('render reuses cached AST across calls', async () => {
+		const ctx = { variables: { '{{title}}': 'Hello' }, currentUrl: '' };
+		await render('{{title}}', ctx);
+		const result = await render('{{title}}', ctx);
+		expect(result.output).toBe('Hello');
+		expect(getTemplateCacheStats()).toMatchObject({ hits: 1, misses: 1 });
+	});
+
+	test('clearTemplateCache resets entries and counters', () => {
+		parseCached('{{title}}');
+		clearTemplateCache();
+		expect(getTemplateCacheStats()).toEqual({ hits: 0, misses: 0, evictions: 0, size: 0 });
+	});
+});
@@ -0,0 +1,64 @@
+// Parsed-AST cache for the Web Clipper template engine
+//
+// Templates are re-rendered many times per popup session (note name, content,
+// context and every property, on every refresh), but their source rarely
+// changes. Parsing is a pure function of the source string, so the parse
+// result can be cached keyed by the source itself.
+//
+// The cache lives at module level, so every context that loads the template
+// engine (popup, side panel, embedded iframe) gets its own bounded instance.
+
+import { parse, ParserResult } from './parser';
+import { BoundedCache } from './cache';
+
+/**
+ * Maximum number of parsed templates kept in memory.
+ * Sized for ~40 templates with ~15 properties each plus headroom.
+ */
+const MAX_ENTRIES = 1000;
+
+export interface TemplateCacheStats {
+	hits: number;
+	misses: number;
+	evictions: number;
+	size: number;
+}
+
+// Keyed by the full source rather than a hash, since a collision would
+// render the wrong template
+const cache = new BoundedCache<ParserResult>({ name: 'templateAst', maxEntries: MAX_ENTRIES });
+
+/**
+ * Parse a template string, reusing a cached result for identical source.
+ *
+ * The returned ParserResult is shared between callers and must not be mutated.
+ *
+ * @param source The template string to parse
+ * @returns ParserResult containing the AST and any errors
+ */
+export function parseCached(source: string): ParserResult {
+	const cached = cache.get(source);
+	if (cached) {
+		return cached;
+	}
+
+	const result = parse(source);
+	cache.set(source, result);
+	return result;
+}
+
+/**
+ * Get hit/miss counters for the parsed-AST cache.
+ */
+export function getTemplateCacheStats(): TemplateCacheStats {
+	const { hits, misses, evictions, size } = cache.stats();
+	return { hits, misses, evictions, size };
+}
+
+/**
+ * Drop all cached parse results and reset the counters.
+ */
+export function clearTemplateCache(): void {
+	cache.clear();
+	cache.resetStats();
+}
@@ -0,0 +1,123 @@
+import { describe, test, expect, vi, afterEach } from 'vitest';
+import { tabs } from './__mocks__/webextension-polyfill';
+import { getTemplateDependencies, createFieldCompiler, processVariables, prefetchTemplateSelectors } from './template-compiler';
+
+describe('Template dependencies', () => {
+	test('maps identifiers to variable keys', () => {
+		const deps = getTemplateDependencies('{{title|lower}} {{author.name}}');
+		expect(deps.variableKeys).toEqual(expect.arrayContaining(['{{title}}', 'title', '{{author}}', 'author']));
+		expect(deps.readsSchema).toBe(false);
+		expect(deps.readsDeferred).toBe(false);
+	});
+
+	test('flags schema, selector and prompt reads', () => {
+		expect(getTemplateDependencies('{{schema:author}}').readsSchema).toBe(true);
+		expect(getTemplateDependencies('{{selector:h1}}').readsDeferred).toBe(true);
+		expect(getTemplateDependencies('{{"a summary"}}').readsDeferred).toBe(true);
+	});
+});
+
+describe('Field compiler', () => {
+	test('re-renders only when a dependency changes', async () => {
+		const compileField = createFieldCompiler();
+		const variables = { '{{title}}': 'Hello', '{{url}}': 'https://example.com' };
+
+		const first = await compileField('noteName', 1, '{{title}}', variables, '');
+		expect(first).toBe('Hello');
+
+		// Unrelated variable changed: previous output is reused
+		const unrelated = await compileField('noteName', 1, '{{title}}', { ...variables, '{{url}}': 'https://other.com' }, '');
+		expect(unrelated).toBe('Hello');
+
+		const changed = await compileField('noteName', 1, '{{title}}', { ...variables, '{{title}}': 'World' }, '');
+		expect(changed).toBe('World');
+	});
+
+	test('re-renders when the template changes', async () => {
+		const compileField = createFieldCompiler();
+		const variables = { '{{title}}': 'Hello' };
+		await compileField('path', 1, '{{title}}', variables, '');
+		expect(await compileField('path', 1, '{{title|upper}}', variables, '')).toBe('HELLO');
+	});
+});
+
+describe('Post-render variable processing', () => {
+	test('replaces every remaining variable in one pass', async () => {
+		const variables = { '{{title}}': 'Hello', '{{author}}': 'Jane' };
+		const result = await processVariables(1, 'A {{title|upper}} B {{author}} C {{title|upper}} D', variables, '');
+		expect(result).toBe('A HELLO B Jane C HELLO D');
+	});
+
+	test('does not process replacement values again', async () => {
+		const variables = { '{{title}}': '{{author}}', '{{author}}': 'Jane' };
+		expect(await processVariables(1, '{{title}}!', variables, '')).toBe('{{author}}!');
+	});
+
+	test('returns text without variables unchanged', async () => {
+		expect(await processVariables(1, 'plain text', {}, '')).toBe('plain text');
+	});
+});
+
+
+describe('Selector prefetching', () => {
+	afterEach(() => {
+		vi.restoreAllMocks();
+	});
+
+	test('serves selectors from the prefetch until the render is done', async () => {
+		let heading = 'Before';
+		const sendMessage = vi.spyOn(tabs, 'sendMessage').mockImplementation((async (_tabId: number, message: any) => {
+			return message.action === 'extractContentBatch'
+				? { contents: message.requests.map(() => heading) }
+				: { content: heading };
+		}) as any);
+
+		const release = await prefetchTemplateSelectors(1, ['{{selector:h1}}']);
+		heading = 'After';
+		expect(await processVariables(1, '{{selector:h1}}', {}, '')).toBe('Before');
+		expect(sendMessage).toHaveBeenCalledTimes(1);
+
+		release();
+		expect(await processVariables(1, '{{selector:h1}}', {}, '')).toBe('After');
+	});
+
+	test('releasing an older prefetch keeps the newer one', async () => {
+		const sendMessage = vi.spyOn(tabs, 'sendMessage').mockImplementation((async (_tabId: number, message: any) => {
+			return { contents: message.requests.map(() => 'Prefetched') };
+		}) as any);
+
+		const releaseOlder = await prefetchTemplateSelectors(1, ['{{selector:h1}}']);
+		const releaseNewer = await prefetchTemplateSelectors(1, ['{{selector:h1}}']);
+		releaseOlder();
+
+		expect(await processVariables(1, '{{selector:h1}}', {}, '')).toBe('Prefetched');
+		expect(sendMessage).toHaveBeenCalledTimes(2);
+		releaseNewer();
+	});
+
+	test('an older prefetch that resolves late is ignored', async () => {
+		const responses: ((contents: string[]) => void)[] = [];
+		const sendMessage = vi.spyOn(tabs, 'sendMessage').mockImplementation(((_tabId: number, message: any) => {
+			if (message.action === 'extractContentBatch') {
+				return new Promise(resolve => responses.push(contents => resolve({ contents })));
+			}
+			return Promise.resolve({ content: 'Live' });
+		}) as any);
+
+		const older = prefetchTemplateSelectors(1, ['{{selector:h1}}']);
+		const newer = prefetchTemplateSelectors(1, ['{{selector:h1}}']);
+		await vi.waitFor(() => expect(responses).toHaveLength(2));
+		responses[1](['Newer']);
+		const releaseNewer = await newer;
+		responses[0](['Older']);
+		const releaseOlder = await older;
+
+		expect(await processVariables(1, '{{selector:h1}}', {}, '')).toBe('Newer');
+		releaseOlder();
+		expect(await processVariables(1, '{{selector:h1}}', {}, '')).toBe('Newer');
+		expect(sendMessage).toHaveBeenCalledTimes(2);
+
+		releaseNewer();
+		expect(await processVariables(1, '{{selector:h1}}', {}, '')).toBe('Live');
+	});
+});
@@ -3,9 +3,10 @@
 // integrating the AST-based renderer with the variable processors.
 
 import { render, RenderContext } from './renderer';
-import { applyFilterDirect } from './filters';
+import { ASTNode, collectIdentifiers } from './parser';
+import { parseCached } from './template-cache';
 import { processSimpleVariable } from './variables/simple';
-import { processSelector, resolveSelector } from './variables/selector';
+import { processSelector, resolveSelector, prefetchSelectors } from './variables/selector';
 import { processSchema } from './variables/schema';
 import { processPrompt } from './variables/prompt';
 
@@ -41,7 +42,6 @@ export async function compileTemplate(
 		variables,
 		currentUrl,
 		tabId,
-		applyFilterDirect,
 		asyncResolver,
 	};
 
@@ -66,12 +66,162 @@ export async function compileTemplate(
 	return processedText;
 }
 
+/**
+ * What a template reads from its inputs, derived from its AST.
+ */
+export interface TemplateDependencies {
+	/** Keys in the variables object whose values can affect the output */
+	variableKeys: string[];
+	/** True if the template reads schema: variables, whose shorthand lookups scan every schema key */
+	readsSchema: boolean;
+	/** True if the template uses selectors or prompts, whose values aren't known before rendering */
+	readsDeferred: boolean;
+}
+
+const templateDependencies = new WeakMap<ASTNode[], TemplateDependencies>();
+
+/**
+ * Get the variables a template depends on.
+ * Identifiers are mapped to every key the renderer may look them up under:
+ * "{{name}}", "name", and the same for the root of a nested path (author.name → author).
+ */
+export function getTemplateDependencies(text: string): TemplateDependencies {
+	const ast = parseCached(text).ast;
+	const cached = templateDependencies.get(ast);
+	if (cached) {
+		return cached;
+	}
+
+	const keys = new Set<string>();
+	let readsSchema = false;
+	// String literal variables like {{"summarize"}} are prompts
+	let readsDeferred = /{{\s*"/.test(text);
+
+	for (const name of collectIdentifiers(ast)) {
+		if (name.startsWith('selector:') || name.startsWith('selectorHtml:') ||
+			name.startsWith('prompt:') || name.startsWith('"')) {
+			readsDeferred = true;
+			continue;
+		}
+		if (name.startsWith('schema:')) {
+			readsSchema = true;
+		}
+		const trimmed = name.trim();
+		const root = trimmed.split(/[.[]/)[0];
+		keys.add(`{{${trimmed}}}`).add(trimmed).add(`{{${root}}}`).add(root);
+	}
+
+	const dependencies = { variableKeys: Array.from(keys), readsSchema, readsDeferred };
+	templateDependencies.set(ast, dependencies);
+	return dependencies;
+}
+
+interface CompiledField {
+	tabId: number;
+	text: string;
+	currentUrl: string;
+	inputs: any[];
+	output: string;
+}
+
+/**
+ * Snapshot the values a template depends on, in a stable order.
+ * Schema keys are included as key/value pairs since their set can change.
+ */
+function snapshotInputs(dependencies: TemplateDependencies, variables: { [key: string]: any }): any[] {
+	const inputs: any[] = dependencies.variableKeys.map(key => variables[key]);
+	if (dependencies.readsSchema) {
+		for (const key of Object.keys(variables)) {
+			if (key.startsWith('{{schema:')) {
+				inputs.push(key, variables[key]);
+			}
+		}
+	}
+	return inputs;
+}
+
+function sameInputs(a: any[], b: any[]): boolean {
+	if (a.length !== b.length) {
+		return false;
+	}
+	for (let i = 0; i < a.length; i++) {
+		if (a[i] !== b[i]) {
+			return false;
+		}
+	}
+	return true;
+}
+
+/**
+ * Create a compiler for a set of named fields (note name, content, properties)
+ * that re-renders a field only when its template, the tab, the URL, or one of
+ * the variables it depends on has changed since it was last compiled.
+ * Fields that use selectors or prompts are always re-rendered.
+ *
+ * @returns compileField(fieldId, tabId, text, variables, currentUrl), same result as compileTemplate
+ */
+export function createFieldCompiler() {
+	const fields = new Map<string, CompiledField>();
+
+	return async function compileField(
+		fieldId: string,
+		tabId: number,
+		text: string,
+		variables: { [key: string]: any },
+		currentUrl: string
+	): Promise<string> {
+		const dependencies = getTemplateDependencies(text);
+		const inputs = snapshotInputs(dependencies, variables);
+
+		const previous = fields.get(fieldId);
+		if (previous && !dependencies.readsDeferred &&
+			previous.tabId === tabId &&
+			previous.text === text &&
+			previous.currentUrl === currentUrl &&
+			sameInputs(previous.inputs, inputs)) {
+			return previous.output;
+		}
+
+		const output = await compileTemplate(tabId, text, variables, currentUrl);
+		fields.set(fieldId, { tabId, text, currentUrl, inputs, output });
+		return output;
+	};
+}
+
+/**
+ * Fetch the content of every selector used by the given templates in a single
+ * round trip to the tab, so that compiling them afterwards doesn't message the
+ * content script once per selector.
+ *
+ * @param tabId - Browser tab ID for selector resolution
+ * @param templates - Template strings that are about to be compiled
+ * @returns A function that drops the prefetched content, to call once they are compiled
+ */
+export async function prefetchTemplateSelectors(tabId: number, templates: string[]): Promise<() => void> {
+	const selectors = new Set<string>();
+	for (const text of templates) {
+		if (!text || !text.includes('selector')) {
+			continue;
+		}
+		for (const name of collectIdentifiers(parseCached(text).ast)) {
+			if (name.startsWith('selector:') || name.startsWith('selectorHtml:')) {
+				selectors.add(name);
+			}
+		}
+	}
+
+	return prefetchSelectors(tabId, Array.from(selectors));
+}
+
 /**
  * Process variables and apply filters.
  * Handles special variable types: selector, schema, prompt.
  *
  * This is called after the AST-based renderer to handle any remaining
  * variable interpolations that need special processing.
+ * The text is scanned once; replacements don't depend on each other, so they
+ * are resolved concurrently (once per distinct variable) and the result is
+ * assembled from the text between matches and the resolved values.
  */
 export async function processVariables(
 	tabId: number,
@@ -80,29 +230,55 @@ export async function processVariables(
 	currentUrl: string
 ): Promise<string> {
 	const regex = /{{([\s\S]*?)}}/g;
-	let result = text;
+	const chunks: string[] = [];
+	const replacements: Promise<string>[] = [];
+	const pending = new Map<string, Promise<string>>();
+	let lastIndex = 0;
 	let match;
 
-	while ((match = regex.exec(result)) !== null) {
+	while ((match = regex.exec(text)) !== null) {
 		const fullMatch = match[0];
-		const trimmedMatch = match[1].trim();
-
-		let replacement: string;
-
-		if (trimmedMatch.startsWith('selector:') || trimmedMatch.startsWith('selectorHtml:')) {
-			replacement = await processSelector(tabId, fullMatch, currentUrl);
-		} else if (trimmedMatch.startsWith('schema:')) {
-			replacement = await processSchema(fullMatch, variables, currentUrl);
-		} else if (trimmedMatch.startsWith('"') || trimmedMatch.startsWith('prompt:')) {
-			replacement = await processPrompt(fullMatch, variables, currentUrl);
-		} else {
-			replacement = await processSimpleVariable(trimmedMatch, variables, currentUrl);
+
+		let replacement = pending.get(fullMatch);
+		if (!replacement) {
+			replacement = resolveVariable(tabId, fullMatch, match[1].trim(), variables, currentUrl);
+			pending.set(fullMatch, replacement);
 		}
 
-		result = result.substring(0, match.index) + replacement + result.substring(match.index + fullMatch.length);
-		regex.lastIndex = match.index + replacement.length;
+		chunks.push(text.substring(lastIndex, match.index));
+		replacements.push(replacement);
+		lastIndex = match.index + fullMatch.length;
+	}
+
+	if (replacements.length === 0) {
+		return text;
 	}
 
-	return result;
+	// chunks[i] is the text before replacements[i]
+	const resolved = await Promise.all(replacements);
+	const parts: string[] = [];
+	for (let i = 0; i < chunks.length; i++) {
+		parts.push(chunks[i], resolved[i]);
+	}
+	parts.push(text.substring(lastIndex));
+
+	return parts.join('');
 }
 
+function resolveVariable(
+	tabId: number,
+	fullMatch: string,
+	trimmedMatch: string,
+	variables: { [key: string]: any },
+	currentUrl: string
+): Promise<string> {
+	if (trimmedMatch.startsWith('selector:') || trimmedMatch.startsWith('selectorHtml:')) {
+		return processSelector(tabId, fullMatch, currentUrl);
+	} else if (trimmedMatch.startsWith('schema:')) {
+		return processSchema(fullMatch, variables, currentUrl);
+	} else if (trimmedMatch.startsWith('"') || trimmedMatch.startsWith('prompt:')) {
+		return processPrompt(fullMatch, variables, currentUrl);
+	} else {
+		return processSimpleVariable(trimmedMatch, variables, currentUrl);
+	}
+}
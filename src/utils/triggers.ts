@@ -1,5 +1,5 @@
 import { Template } from '../types/types';
-import { memoize, memoizeWithExpiration } from './memoize';
+import { hashKey, memoize, memoizeAsync } from './cache';
 
 // Modify the memoized function to handle regex patterns correctly
 const memoizedInternalMatchPattern = memoize(
@@ -20,12 +20,11 @@ const memoizedInternalMatchPattern = memoize(
 		}
 	},
 	{
-		resolver: (pattern: string, url: string) => {
-			if (pattern.startsWith('/') && pattern.endsWith('/')) {
-				return `${pattern}:${url}`;
-			}
-			return `${pattern}:${url.split('/').slice(0, 3).join('/')}`;
-		}
+		name: 'triggerPatterns',
+		maxEntries: 500,
+		// Schema patterns don't depend on the URL, only on the page's schema data
+		key: (pattern: string, url: string) => pattern.startsWith('schema:') ? pattern : hashKey(pattern, url),
+		deps: (pattern: string, url: string, schemaOrgData: any) => pattern.startsWith('schema:') ? [schemaOrgData] : []
 	}
 );
 
@@ -77,6 +76,8 @@ const regexTriggers: Array<{ template: Template; regex: RegExp; priority: number
 const schemaTriggers: Array<{ template: Template; pattern: string; priority: number }> = [];
 
 let isInitialized = false;
+// Incremented whenever triggers change, so cached template matches are discarded
+let triggersVersion = 0;
 
 export function initializeTriggers(templates: Template[]): void {
 	urlTrie.root = new TrieNode(); // Reset trie
@@ -99,9 +100,10 @@ export function initializeTriggers(templates: Template[]): void {
 	});
 
 	isInitialized = true;
+	triggersVersion++;
 }
 
-const memoizedFindMatchingTemplate = memoizeWithExpiration(
+const memoizedFindMatchingTemplate = memoizeAsync(
 	async (url: string, getSchemaOrgData: () => Promise<any>): Promise<Template | undefined> => {
 		if (!isInitialized) {
 			console.warn('Triggers not initialized. Call initializeTriggers first.');
@@ -134,8 +136,11 @@ const memoizedFindMatchingTemplate = memoizeWithExpiration(
 		return undefined;
 	},
 	{
-		expirationMs: 30000, // Cache for 30 seconds
-		keyFn: (url: string) => url // Use the full URL as the cache key
+		name: 'templateMatches',
+		maxEntries: 50,
+		ttlMs: 30000, // Cache for 30 seconds
+		key: (url: string) => hashKey(url),
+		deps: () => [triggersVersion]
 	}
 );
 
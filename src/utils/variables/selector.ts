@@ -2,39 +2,142 @@ import browser from '../browser-polyfill';
 import { applyFilters } from '../filters';
 import { debugLog } from '../debug';
 
+type SelectorContent = string | string[];
+
+interface SelectorRequest {
+	selector: string;
+	attribute?: string;
+	extractHtml: boolean;
+}
+
+// Content fetched ahead of rendering by prefetchSelectors, per tab, keyed by getSelectorKey.
+// Kept only until the render that prefetched it is done, since the page can change.
+const prefetchedContent = new Map<number, Map<string, SelectorContent>>();
+// Incremented by each prefetch for a tab. Renders can overlap, so only the
+// latest prefetch may install or drop the tab's results.
+const prefetchGenerations = new Map<number, number>();
+
+function createSelectorRequest(selectorType: string, rawSelector: string, attribute?: string): SelectorRequest {
+	return {
+		// Unescape any escaped quotes and normalize whitespace in the selector
+		selector: rawSelector.replace(/\\"/g, '"').replace(/\s+/g, ' ').trim(),
+		attribute: attribute,
+		extractHtml: selectorType === 'selectorHtml',
+	};
+}
+
 /**
- * Resolve a selector and return the raw content (array or string).
- * Used by the renderer for for loops and conditionals.
+ * Parse a selector expression (selector:... or selectorHtml:...).
+ * May include attribute selector: selector:cssSelector?attr
  */
-export async function resolveSelector(tabId: number, selectorExpr: string): Promise<any> {
-	// Parse the selector expression (selector:... or selectorHtml:...)
-	// Format: selector:cssSelector or selectorHtml:cssSelector
-	// May include attribute selector: selector:cssSelector?attr
+function parseSelectorExpression(selectorExpr: string): SelectorRequest | null {
 	const selectorRegex = /^(selector|selectorHtml):(.*?)(?:\?(.*))?$/;
 	const matches = selectorExpr.match(selectorRegex);
 	if (!matches) {
-		console.error('Invalid selector format:', selectorExpr);
-		return undefined;
+		return null;
 	}
 
 	const [, selectorType, rawSelector, attribute] = matches;
-	const extractHtml = selectorType === 'selectorHtml';
+	return createSelectorRequest(selectorType, rawSelector, attribute);
+}
 
-	// Unescape any escaped quotes and normalize whitespace in the selector
-	const selector = rawSelector.replace(/\\"/g, '"').replace(/\s+/g, ' ').trim();
+function getSelectorKey(request: SelectorRequest): string {
+	return `${request.extractHtml ? 'html' : 'text'}\u0000${request.attribute || ''}\u0000${request.selector}`;
+}
+
+/**
+ * Extract content for a selector, from the prefetched results if available,
+ * otherwise with a round trip to the content script.
+ */
+async function extractSelectorContent(tabId: number, request: SelectorRequest): Promise<SelectorContent | undefined> {
+	const prefetched = prefetchedContent.get(tabId);
+	const key = getSelectorKey(request);
+	if (prefetched && prefetched.has(key)) {
+		return prefetched.get(key);
+	}
+
+	const response = await browser.tabs.sendMessage(tabId, {
+		action: "extractContent",
+		selector: request.selector,
+		attribute: request.attribute,
+		extractHtml: request.extractHtml
+	}) as { content: SelectorContent };
 
+	return response ? response.content : undefined;
+}
+
+/**
+ * Fetch the content of all given selector expressions in one round trip to the
+ * content script. Later selector lookups for this tab are served from the results.
+ * Replaces anything previously prefetched for the tab, so pass every selector
+ * the upcoming render needs.
+ * Returns a function that drops the results; call it when the render is done.
+ */
+export async function prefetchSelectors(tabId: number, selectorExprs: string[]): Promise<() => void> {
+	const requests = new Map<string, SelectorRequest>();
+	for (const selectorExpr of selectorExprs) {
+		const request = parseSelectorExpression(selectorExpr);
+		if (request) {
+			requests.set(getSelectorKey(request), request);
+		}
+	}
+
+	const generation = (prefetchGenerations.get(tabId) ?? 0) + 1;
+	prefetchGenerations.set(tabId, generation);
+	const isLatest = () => prefetchGenerations.get(tabId) === generation;
+	prefetchedContent.delete(tabId);
+	// Leaves the results of a newer prefetch for the tab in place
+	const release = () => {
+		if (isLatest()) {
+			prefetchedContent.delete(tabId);
+		}
+	};
+	if (requests.size === 0) {
+		return release;
+	}
+
+	const batch = Array.from(requests.values());
 	try {
 		const response = await browser.tabs.sendMessage(tabId, {
-			action: "extractContent",
-			selector: selector,
-			attribute: attribute,
-			extractHtml: extractHtml
-		}) as { content: string | string[] };
+			action: "extractContentBatch",
+			requests: batch
+		}) as { contents: SelectorContent[] } | undefined;
+
+		if (!response || !Array.isArray(response.contents) || response.contents.length !== batch.length) {
+			return release;
+		}
+		// A newer prefetch started while this one was waiting
+		if (!isLatest()) {
+			return release;
+		}
+
+		const results = new Map<string, SelectorContent>();
+		batch.forEach((request, i) => results.set(getSelectorKey(request), response.contents[i]));
+		prefetchedContent.set(tabId, results);
+		debugLog('ContentExtractor', `Prefetched ${batch.length} selectors`);
+	} catch (error) {
+		// Selectors will be resolved one by one instead
+		console.error('Error prefetching selectors:', error);
+	}
+	return release;
+}
+
+/**
+ * Resolve a selector and return the raw content (array or string).
+ * Used by the renderer for for loops and conditionals.
+ */
+export async function resolveSelector(tabId: number, selectorExpr: string): Promise<any> {
+	const request = parseSelectorExpression(selectorExpr);
+	if (!request) {
+		console.error('Invalid selector format:', selectorExpr);
+		return undefined;
+	}
 
+	try {
 		// Return the raw content (could be array or string)
-		return response ? response.content : undefined;
+		return await extractSelectorContent(tabId, request);
 	} catch (error) {
-		console.error('Error extracting content by selector:', error, { selector, attribute, extractHtml });
+		console.error('Error extracting content by selector:', error, request);
 		return undefined;
 	}
 }
@@ -48,30 +151,20 @@ export async function processSelector(tabId: number, match: string, currentUrl:
 	}
 
 	const [, selectorType, rawSelector, attribute, filtersString] = matches;
-	const extractHtml = selectorType === 'selectorHtml';
-
-	// Unescape any escaped quotes and normalize whitespace in the selector
-	const selector = rawSelector.replace(/\\"/g, '"').replace(/\s+/g, ' ').trim();
+	const request = createSelectorRequest(selectorType, rawSelector, attribute);
 
 	try {
-		const response = await browser.tabs.sendMessage(tabId, { 
-			action: "extractContent", 
-			selector: selector,
-			attribute: attribute,
-			extractHtml: extractHtml
-		}) as { content: string };
-
-		let content = response ? response.content : '';
-	
+		const content = await extractSelectorContent(tabId, request);
+
 		// Convert content to string if it's an array
-		const contentString = Array.isArray(content) ? JSON.stringify(content) : content;
-	
-		debugLog('ContentExtractor', 'Applying filters:', { selector, filterString: filtersString });
+		const contentString = Array.isArray(content) ? JSON.stringify(content) : (content || '');
+
+		debugLog('ContentExtractor', 'Applying filters:', { selector: request.selector, filterString: filtersString });
 		const filteredContent = applyFilters(contentString, filtersString, currentUrl);
-	
+
 		return filteredContent;
 	} catch (error) {
-		console.error('Error extracting content by selector:', error, { selector, attribute, extractHtml });
+		console.error('Error extracting content by selector:', error, request);
 		return '';
 	}
 }
@@ -0,0 +1,68 @@
+import { describe, test, expect, vi, afterEach } from 'vitest';
+import { WriteBehindQueue } from './write-behind-queue';
+
+describe('WriteBehindQueue', () => {
+	afterEach(() => {
+		vi.useRealTimers();
+	});
+
+	test('coalesces values queued within the delay', async () => {
+		vi.useFakeTimers();
+		const write = vi.fn(async (_key: string, _value: string) => {});
+		const queue = new WriteBehindQueue({ write, delayMs: 300 });
+
+		queue.enqueue('page', 'a');
+		queue.enqueue('page', 'ab');
+		queue.enqueue('page', 'abc');
+		expect(write).not.toHaveBeenCalled();
+
+		await vi.advanceTimersByTimeAsync(300);
+		expect(write.mock.calls).toEqual([['page', 'abc']]);
+		expect(queue.size).toBe(0);
+	});
+
+	test('flush writes immediately and waits for earlier writes', async () => {
+		const order: string[] = [];
+		let finishFirst: () => void = () => {};
+		const write = vi.fn((key: string, value: number) => {
+			order.push(`start ${key}=${value}`);
+			if (value === 1) {
+				return new Promise<void>(resolve => {
+					finishFirst = () => {
+						order.push(`end ${key}=${value}`);
+						resolve();
+					};
+				});
+			}
+			order.push(`end ${key}=${value}`);
+			return Promise.resolve();
+		});
+		const queue = new WriteBehindQueue({ write, delayMs: 1000 });
+
+		queue.enqueue('page', 1);
+		const first = queue.flush();
+		queue.enqueue('page', 2);
+		const second = queue.flush();
+
+		await vi.waitFor(() => expect(write).toHaveBeenCalledTimes(1));
+		expect(order).toEqual(['start page=1']);
+		finishFirst();
+		await Promise.all([first, second]);
+		expect(order).toEqual(['start page=1', 'end page=1', 'start page=2', 'end page=2']);
+	});
+
+	test('keeps writing after a failed write', async () => {
+		const onError = vi.fn();
+		const write = vi.fn(async (key: string) => {
+			if (key === 'bad') throw new Error('quota');
+		});
+		const queue = new WriteBehindQueue({ write, delayMs: 100, onError });
+
+		queue.enqueue('bad', 1);
+		queue.enqueue('good', 2);
+		await queue.flush();
+
+		expect(onError).toHaveBeenCalledWith(expect.any(Error), 'bad');
+		expect(write).toHaveBeenCalledWith('good', 2);
+	});
+});
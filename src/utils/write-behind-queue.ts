@@ -0,0 +1,71 @@
+// Write-behind queue
+//
+// Buffers writes by key for a short delay, keeping only the latest value for
+// each key, then writes them one at a time. Writes never overlap, so a
+// read-modify-write in one can't interleave with another and lose its change.
+
+export interface WriteBehindQueueOptions<K, V> {
+	/** Persist a value; called with the latest value queued for the key */
+	write: (key: K, value: V) => Promise<void>;
+	/** Time from the first queued value until the queue is written, in milliseconds */
+	delayMs: number;
+	/** Called when a write fails; later writes still run (default console.error) */
+	onError?: (error: unknown, key: K) => void;
+}
+
+export class WriteBehindQueue<K, V> {
+	private pending = new Map<K, V>();
+	private timer: ReturnType<typeof setTimeout> | null = null;
+	private writing: Promise<void> = Promise.resolve();
+
+	constructor(private options: WriteBehindQueueOptions<K, V>) {}
+
+	/** Number of keys waiting to be written */
+	get size(): number {
+		return this.pending.size;
+	}
+
+	/**
+	 * Queue a value, replacing any value still queued for the key.
+	 * The delay runs from the first queued value, so steady changes are
+	 * still written at least once per delay.
+	 */
+	enqueue(key: K, value: V): void {
+		this.pending.set(key, value);
+		if (this.timer === null) {
+			this.timer = setTimeout(() => {
+				this.flush();
+			}, this.options.delayMs);
+		}
+	}
+
+	/**
+	 * Write everything queued now. Resolves when this and all earlier writes have finished.
+	 */
+	flush(): Promise<void> {
+		if (this.timer !== null) {
+			clearTimeout(this.timer);
+			this.timer = null;
+		}
+		if (this.pending.size > 0) {
+			const batch = this.pending;
+			this.pending = new Map();
+			this.writing = this.writing.then(() => this.writeBatch(batch));
+		}
+		return this.writing;
+	}
+
+	private async writeBatch(batch: Map<K, V>): Promise<void> {
+		for (const [key, value] of batch) {
+			try {
+				await this.options.write(key, value);
+			} catch (error) {
+				if (this.options.onError) {
+					this.options.onError(error, key);
+				} else {
+					console.error('Write-behind write failed:', error);
+				}
+			}
+		}
+	}
+}
@@ -44,6 +44,7 @@ module.exports = (env, argv) => {
 				settings: './src/core/settings.ts',
 				content: './src/content.ts',
 			background: './src/background.ts',
+			offscreen: './src/offscreen.ts',
 			style: './src/style.scss',
 			highlighter: './src/highlighter.scss',
 			reader: './src/reader.scss',
@@ -146,6 +147,7 @@ module.exports = (env, argv) => {
 						{ from: "src/highlights-panel.html", to: "highlights-panel.html" },
 						{ from: "src/side-panel.html", to: "side-panel.html" },
 					{ from: "src/settings.html", to: "settings.html" },
+					{ from: "src/offscreen.html", to: "offscreen.html" },
 					{ from: "src/icons", to: "icons" },
 					{ from: "node_modules/webextension-polyfill/dist/browser-polyfill.min.js", to: "browser-polyfill.min.js" },
 					{